@@ -1,8 +1,52 @@
-from fastapi import APIRouter
+import hmac
+import os
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+
+from ..services.memory import MEMORY_TRACE_FRAMES, is_tracing, start_tracing, stop_tracing, top_allocators
+
+# Shared secret for admin-only features; admin access is disabled while it is unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
 router = APIRouter()
 
 
+def is_admin(token: Optional[str]) -> bool:
+    """Constant-time check of an X-Admin-Token value against ADMIN_TOKEN"""
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Dependency rejecting requests without a valid X-Admin-Token header"""
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
 @router.post("/")
 async def update_admin():
     return {"message": "Admin getting schwifty"}
+
+
+@router.post("/memory/start")
+def start_memory_tracing(nframes: int = Query(MEMORY_TRACE_FRAMES, ge=1, le=50, description="Stack frames kept per allocation")):
+    """Start tracemalloc; image stages record peaks and snapshots until stopped"""
+    start_tracing(nframes)
+    return {"tracing": is_tracing()}
+
+
+@router.post("/memory/stop")
+def stop_memory_tracing():
+    """Stop tracemalloc and discard the collected snapshots"""
+    stop_tracing()
+    return {"tracing": is_tracing()}
+
+
+@router.get("/memory/top")
+def get_memory_top(
+    stage: Optional[Literal["size_variants", "overlay"]] = None,
+    limit: int = Query(10, ge=1, le=100),
+    key_type: Literal["lineno", "filename", "traceback"] = "lineno",
+):
+    """Top allocators per image stage (from the last traced run of each) and process-wide"""
+    return top_allocators(stage=stage, limit=limit, key_type=key_type)
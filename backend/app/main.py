@@ -1,12 +1,22 @@
 # app/main.py
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
+from datetime import datetime, timedelta
+from typing import List, Literal, Optional
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from . import routes
+from .internal import admin
+from .internal.admin import require_admin
+from .services.embeddings import backfill_filter_metadata
+from .services.log import get_logger
 from .services.logging_db import init_db, close_db
+from .services.metrics import render_prometheus
+
+logger = get_logger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -14,6 +24,10 @@ async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Starting up Creative Automation Pipeline...")
     init_db()
+    try:
+        backfill_filter_metadata()
+    except Exception as e:
+        logger.warning("filter metadata backfill failed", extra={"error": str(e)})
     yield
     # Shutdown
     print("🛑 Shutting down Creative Automation Pipeline...")
@@ -71,9 +85,17 @@ def health_check():
         "endpoints": ["/campaigns/generate"]
     }
 
+# Prometheus metrics (stage latency histograms and counters)
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 # Include campaign routes
 app.include_router(routes.router, prefix="/campaigns", tags=["campaigns"])
 
+# Admin routes (X-Admin-Token required)
+app.include_router(admin.router, prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
 # Add countries endpoint directly to main app
 from .services.country_language import get_country_selector_data
 
@@ -102,19 +124,37 @@ def get_audiences():
         print(f"❌ Error serving audiences data: {e}")
         return {"error": "Failed to load audiences data", "audiences": [], "categories": {}}
 
+@app.get("/api/analytics/latency")
+def get_latency_analytics(
+    window_hours: float = Query(24 * 7, gt=0, description="Look back this many hours (ignored if since is set)"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    group_by: List[Literal["stage", "provider", "country"]] = Query(["stage"]),
+    stage: Optional[str] = None,
+):
+    """p50/p95/p99 stage latency from the campaign_timings history, grouped by stage, provider and/or country"""
+    from .services.logging_db import latency_percentiles
+
+    since = since or datetime.now() - timedelta(hours=window_hours)
+    try:
+        rows = latency_percentiles(since, until, group_by=list(group_by), stage=stage)
+    except Exception as e:
+        logger.error("latency analytics failed", extra={"error": str(e)})
+        raise HTTPException(status_code=500, detail={"error": "Latency analytics failed", "message": str(e)})
+    return {"since": since.isoformat(), "until": until.isoformat() if until else None, "group_by": group_by, "rows": rows}
+
 @app.get("/api/master-manifest")
-def get_master_manifest():
-    """Get the master manifest containing all campaign data"""
+def get_master_manifest(query: dict = Depends(routes.manifest_query)):
+    """Get the master manifest containing all campaign data (see /campaigns/master-manifest for query options)"""
+    if not routes.is_legacy_manifest_query(query):
+        return routes.serve_manifest_query(query)
     try:
-        import json
-        from pathlib import Path
+        from .services.manifest_store import MANIFEST_PATH, LOG_PATH, load_manifest
         
-        manifest_path = Path("assets/generated/master_manifest.json")
-        if not manifest_path.exists():
+        if not MANIFEST_PATH.exists() and not LOG_PATH.exists():
             return {"error": "Master manifest not found. Run generate_master_manifest.py first."}
         
-        with open(manifest_path, 'r', encoding='utf-8') as f:
-            manifest = json.load(f)
+        manifest = load_manifest()
         
         print(f"📋 Serving master manifest with {manifest['manifest_info']['total_campaigns']} campaigns")
         return manifest
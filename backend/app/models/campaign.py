@@ -14,7 +14,20 @@ class CampaignBrief(BaseModel):
     guidance_scale: Optional[float] = 7.5
     num_inference_steps: Optional[int] = 30
     seed: Optional[int] = None
+    # Semantic reuse: serve base images from a near-duplicate prior campaign, re-rendering overlays only
+    reuse_similar: Optional[bool] = False
+    reuse_threshold: Optional[float] = 0.95  # Minimum similarity score (0-1, as in /campaigns/search)
+    # Time budget for the whole campaign in seconds (capped by the server's CAMPAIGN_DEADLINE_SECONDS)
+    deadline_seconds: Optional[float] = None
     
+    @field_validator('deadline_seconds')
+    @classmethod
+    def validate_deadline_seconds(cls, v):
+        """A deadline, if given, must be a positive number of seconds"""
+        if v is not None and v <= 0:
+            raise ValueError("deadline_seconds must be positive")
+        return v
+
     @field_validator('country_name')
     @classmethod
     def validate_country_name(cls, v):
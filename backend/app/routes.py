@@ -1,23 +1,168 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+import time
 import uuid
 import json
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
+from typing import Any, Dict, Literal, Optional
 from pydantic import BaseModel
+from .internal.admin import is_admin
 from .models import CampaignBrief, GenerationResult
-from .services.embeddings import embed_and_store, search_similar
-from .services.generator import generate_creatives, get_last_translation_metadata, get_last_image_generation_metadata
-from .services.logging_db import log_campaign
+from .services.embeddings import embed_and_store, search_similar, build_where_filter
+from .services.search import hybrid_search, find_reusable_campaign
+from .services.generator import generate_creatives, get_last_translation_metadata, get_last_image_generation_metadata, get_last_variant_metadata, reset_generation_metadata
+from .services.logging_db import log_campaign, log_timings, log_usage
 from .services.compliance import check_compliance
+from .services.admission import AdmissionRejected, admit_campaign, release_campaign
+from .services.deadline import DeadlineExceeded, covers, cut, deadline_report, effective_budget, end_deadline, expired, start_deadline
+from .services.campaign_index import get_campaigns, get_manifest_info, iter_campaigns, list_campaigns, decode_cursor
+from .services.manifest_store import MANIFEST_PATH, LOG_PATH, atomic_write_json, load_manifest, record_campaign
+from .services.parquet_export import export_campaigns, images_per_country_per_week
+from .services.log import bind, get_logger, reset
+from .services.memory import campaign_memory, end_campaign_memory, start_campaign_memory
+from .services.profiling import finish_profile, parse_profile_flag, should_sample, start_profiler
+from .services.metrics import CAMPAIGN_SECONDS, CAMPAIGNS, campaign_timings, end_campaign_timings, record_stage, span, start_campaign_timings
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 class SearchQuery(BaseModel):
     query: str
     top_k: int = 3
+    # Filters pushed down into the vector (and keyword) query
+    country_name: Optional[str] = None
+    audience: Optional[str] = None
+    product: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    # "vector" = embeddings only, "hybrid" = embeddings fused with keyword matches via RRF
+    mode: Literal["vector", "hybrid"] = "vector"
+
+def profile_request(
+    profile: Optional[str] = Query(None, description="Admin only: profile this call (pstats or speedscope)"),
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+) -> Optional[str]:
+    """Profiler format requested with ?profile= or the X-Profile header (requires X-Admin-Token)"""
+    try:
+        profile_format = parse_profile_flag(x_profile or profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if profile_format and not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Profiling requires a valid X-Admin-Token")
+    return profile_format
+
 
 @router.post("/generate", response_model=GenerationResult)
-def generate_campaign(brief: CampaignBrief):
+def generate_campaign(brief: CampaignBrief, profile: Optional[str] = Depends(profile_request)):
+    """
+    Generate a campaign and record its latency: per-stage spans are collected into
+    metadata["timings"] and exported on /metrics together with the campaign outcome.
+
+    Admin-requested calls, and a PROFILE_SAMPLE_RATE fraction of all calls, run under a
+    profiler whose output is saved in the campaign directory (metadata["profile"]).
+    Memory high-water marks of the image stages are added as metadata["memory"].
+
+    With a deadline (brief.deadline_seconds or CAMPAIGN_DEADLINE_SECONDS), stages that would
+    overrun it are skipped or degraded and listed in metadata["deadline"]; a campaign that
+    runs out of time before producing any image fails with 504.
+
+    Admission control caps concurrent campaigns: a request waits for a slot (counted against
+    its deadline, reported as metadata["admission"]) and is turned away with 429 when the
+    queue is full or 503 when no slot frees up in time, both with a Retry-After header.
+    """
+    deadline_token = start_deadline(effective_budget(brief.deadline_seconds))
+    try:
+        admission_wait = admit_campaign()
+    except AdmissionRejected as e:
+        end_deadline(deadline_token)
+        CAMPAIGNS.inc(status="rejected")
+        logger.warning("campaign rejected", extra={
+            "status": "rejected",
+            "http_status": e.status_code,
+            "country_name": brief.country_name,
+            "retry_after_s": e.retry_after
+        })
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    token = start_campaign_timings()
+    memory_token = start_campaign_memory()
+    log_token = bind()
+    started = time.perf_counter()
+    status = "error"
+    trigger = "requested" if profile else ("sampled" if should_sample() else None)
+    profiler = start_profiler(profile or "speedscope") if trigger else None
+    try:
+        result = run_campaign(brief)
+        status = "success"
+        if profiler:
+            # Hand the profiler over first so the finally block never stops it a second time
+            finishing, profiler = profiler, None
+            result.metadata["profile"] = finish_profile(
+                finishing, result.metadata.get("campaign_directory"), f"campaign {result.campaign_id}", trigger
+            )
+        result.metadata["timings"] = {
+            "total_ms": round((time.perf_counter() - started) * 1000, 2),
+            "stages": campaign_timings()
+        }
+        memory = campaign_memory()
+        if memory:
+            result.metadata["memory"] = memory
+        deadline = deadline_report()
+        if deadline:
+            result.metadata["deadline"] = deadline
+        result.metadata["admission"] = {"wait_ms": round(admission_wait * 1000, 2)}
+        log_timings(
+            result.campaign_id,
+            brief.country_name,
+            (result.metadata.get("image_generation") or {}).get("provider"),
+            result.metadata.get("reused_from") is not None,
+            result.metadata.get("cost_usd", 0.0),
+            result.metadata["timings"],
+            memory
+        )
+        stages = result.metadata["timings"]["stages"]
+        logger.info("campaign completed", extra={
+            "status": status,
+            "country_name": brief.country_name,
+            "products": len(brief.products),
+            "images": result.metadata.get("total_images"),
+            "compliance_status": (result.compliance or {}).get("status"),
+            "provider": (result.metadata.get("image_generation") or {}).get("provider"),
+            "reused_from": (result.metadata.get("reused_from") or {}).get("campaign_id"),
+            "cost_usd": result.metadata.get("cost_usd"),
+            "total_ms": result.metadata["timings"]["total_ms"],
+            "slowest_stage": next(iter(stages), None),
+            "peak_rss_bytes": (memory or {}).get("peak_rss_bytes"),
+            "deadline_cuts": len(deadline["cuts"]) if deadline else None,
+            "admission_wait_ms": result.metadata["admission"]["wait_ms"],
+            "profile": (result.metadata.get("profile") or {}).get("path")
+        })
+        return result
+    except HTTPException as e:
+        status = {400: "compliance_failed", 504: "deadline_exceeded"}.get(e.status_code, "error")
+        logger.warning("campaign failed", extra={
+            "status": status,
+            "country_name": brief.country_name,
+            "products": len(brief.products),
+            "total_ms": round((time.perf_counter() - started) * 1000, 2)
+        })
+        raise
+    finally:
+        CAMPAIGN_SECONDS.observe(time.perf_counter() - started)
+        CAMPAIGNS.inc(status=status)
+        if profiler:
+            profiler.stop()  # failed campaign: its directory is gone, nothing to save
+        end_campaign_timings(token)
+        end_campaign_memory(memory_token)
+        end_deadline(deadline_token)
+        release_campaign()
+        reset(log_token)
+
+
+def run_campaign(brief: CampaignBrief) -> GenerationResult:
+    """Run the generation pipeline for one brief: embed, generate, compose, check, persist"""
+    reset_generation_metadata()
     campaign_id = str(uuid.uuid4())
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     campaign_dir = None
@@ -26,16 +171,39 @@ def generate_campaign(brief: CampaignBrief):
         # Create campaign directory
         campaign_dir = Path("assets/generated") / f"campaign_{timestamp}_{campaign_id}"
         campaign_dir.mkdir(parents=True, exist_ok=True)
-        print(f"📁 Created campaign directory: {campaign_dir}")
+        bind(campaign_id=campaign_id)
+        logger.debug("created campaign directory", extra={"path": str(campaign_dir)})
+
+        # Look for a near-duplicate prior campaign before this brief is embedded (it would match itself)
+        reused_campaign = None
+        if brief.reuse_similar:
+            with span("reuse_lookup"):
+                reused_campaign = find_reusable_campaign(brief, threshold=brief.reuse_threshold)
+            if reused_campaign:
+                logger.debug("reusing base images", extra={
+                    "reused_from": reused_campaign["campaign_id"], "similarity_score": reused_campaign["similarity_score"]
+                })
+            else:
+                logger.debug("no reusable campaign, generating new images", extra={"reuse_threshold": brief.reuse_threshold})
 
         # Store embeddings
-        embed_and_store(campaign_id, brief.message, brief.model_dump())
+        with span("embed"):
+            embed_and_store(campaign_id, brief.message, brief.model_dump())
 
         # Generate images for each product with comprehensive prompts
         all_outputs = {}
+        variant_stats = {}
 
         for product in brief.products:
-            print(f"🎨 Generating creatives for product: {product}")
+            bind(product=product)
+            # Products after the first are dropped once the budget can't cover another one
+            product_stages = ("crop_resize", "encode", "overlay", "encode")
+            if not reused_campaign:
+                product_stages = ("provider_call",) + product_stages
+            if all_outputs and not covers(*product_stages):
+                cut("product", "skipped", product)
+                continue
+            prompt_started = time.perf_counter()
             
             # Get country and language information
             from .services.country_language import get_legacy_region_mapping, get_primary_language, get_country_by_code
@@ -66,24 +234,33 @@ def generate_campaign(brief: CampaignBrief):
             ])
             
             prompt = ". ".join(prompt_parts)
-            print(f"📝 Generated prompt: {prompt[:150]}...")
+            record_stage("prompt_build", time.perf_counter() - prompt_started)
+            logger.debug("built prompt", extra={"prompt": prompt[:150]})
             
-            product_outputs = generate_creatives(
-                prompt,
-                campaign_id=campaign_id,
-                product=product,
-                country_name=brief.country_name,
-                message=brief.message,
-                campaign_dir=campaign_dir,
-                audience=brief.audience,
-                noise_scheduler=brief.noise_scheduler,
-                unet_backbone=brief.unet_backbone,
-                vae=brief.vae,
-                guidance_scale=brief.guidance_scale,
-                num_inference_steps=brief.num_inference_steps,
-                seed=brief.seed
-            )
+            try:
+                product_outputs = generate_creatives(
+                    prompt,
+                    campaign_id=campaign_id,
+                    product=product,
+                    country_name=brief.country_name,
+                    message=brief.message,
+                    campaign_dir=campaign_dir,
+                    audience=brief.audience,
+                    noise_scheduler=brief.noise_scheduler,
+                    unet_backbone=brief.unet_backbone,
+                    vae=brief.vae,
+                    guidance_scale=brief.guidance_scale,
+                    num_inference_steps=brief.num_inference_steps,
+                    seed=brief.seed,
+                    reuse_base_image=reused_campaign["base_images"][product] if reused_campaign else None
+                )
+            except DeadlineExceeded:
+                if not all_outputs:
+                    raise
+                cut("product", "skipped", product)
+                continue
             all_outputs[product] = product_outputs
+            variant_stats[product] = get_last_variant_metadata()
 
             # Create individual artifacts for each size variant
             for aspect_ratio, image_path in product_outputs.items():
@@ -116,13 +293,12 @@ def generate_campaign(brief: CampaignBrief):
                 # Save size-specific artifact
                 size_dir = Path(image_path).parent
                 artifact_path = size_dir / f"response_artifact_{aspect_ratio.replace(':', 'x')}.json"
-                with open(artifact_path, "w") as f:
+                with span("artifact_write"), open(artifact_path, "w") as f:
                     json.dump(size_artifact, f, indent=2)
-                
-                print(f"📄 Saved artifact for {product} {aspect_ratio}: {artifact_path}")
+                logger.debug("saved size artifact", extra={"aspect_ratio": aspect_ratio, "path": str(artifact_path)})
 
         # Check compliance LAST - after all images are generated but before finalization
-        print(f"🔍 Running compliance check on generated content...")
+        bind(product=None)
         
         # Collect all generated image paths for brand overlay verification
         all_image_paths = []
@@ -130,56 +306,28 @@ def generate_campaign(brief: CampaignBrief):
             for aspect_ratio, image_path in product_outputs.items():
                 all_image_paths.append(image_path)
         
-        print(f"📸 Verifying brand overlay on {len(all_image_paths)} images...")
-        compliance = check_compliance(brief.message, image_paths=all_image_paths)
-        print(f"📋 Compliance check result: {compliance['status']}")
+        with span("compliance"):
+            compliance = check_compliance(brief.message, image_paths=all_image_paths)
+        logger.debug("compliance checked", extra={"compliance_status": compliance["status"], "images": len(all_image_paths)})
         
         # If compliance fails, raise an error
         if compliance['status'] == 'failed':
-            print(f"❌ Compliance check failed: {compliance['message']}")
+            logger.warning("compliance check failed", extra={"compliance": compliance})
             # Clean up the campaign directory since it failed compliance
             import shutil
             if campaign_dir.exists():
                 shutil.rmtree(campaign_dir)
-                print(f"🗑️  Removed campaign directory due to compliance failure")
+                logger.debug("removed campaign directory after compliance failure", extra={"path": str(campaign_dir)})
             
             raise HTTPException(status_code=400, detail={
                 "error": "Compliance check failed",
                 "compliance": compliance
             })
 
-        # Create main response artifact
-        main_artifact = {
-            "campaign_id": campaign_id,
-            "timestamp": timestamp,
-            "request": {
-                "products": brief.products,
-                "country_name": brief.country_name,
-                "audience": brief.audience,
-                "message": brief.message,
-                "assets": brief.assets
-            },
-            "response": {
-                "campaign_id": campaign_id,
-                "outputs": all_outputs,
-                "compliance": compliance
-            },
-            "metadata": {
-                "generated_at": datetime.now().isoformat(),
-                "campaign_directory": str(campaign_dir),
-                "total_products": len(brief.products),
-                "total_images": sum(len(outputs) for outputs in all_outputs.values())
-            }
-        }
-
-        # Save main response artifact
-        main_artifact_path = campaign_dir / "response_artifact.json"
-        with open(main_artifact_path, "w") as f:
-            json.dump(main_artifact, f, indent=2)
-
-        # Log to DuckDB (using first product's outputs for compatibility)
-        first_product_outputs = list(all_outputs.values())[0] if all_outputs else {}
-        log_campaign(campaign_id, brief, first_product_outputs, compliance)
+        reused_from = {
+            "campaign_id": reused_campaign["campaign_id"],
+            "similarity_score": reused_campaign["similarity_score"]
+        } if reused_campaign else None
 
         # Collect metadata (token usage from translations and image generation)
         translation_metadata = get_last_translation_metadata()
@@ -215,8 +363,50 @@ def generate_campaign(brief: CampaignBrief):
         else:
             cost = 0.0
         
+        # Create main response artifact
+        main_artifact = {
+            "campaign_id": campaign_id,
+            "timestamp": timestamp,
+            "request": {
+                "products": brief.products,
+                "country_name": brief.country_name,
+                "audience": brief.audience,
+                "message": brief.message,
+                "assets": brief.assets
+            },
+            "response": {
+                "campaign_id": campaign_id,
+                "outputs": all_outputs,
+                "compliance": compliance
+            },
+            "metadata": {
+                "generated_at": datetime.now().isoformat(),
+                "campaign_directory": str(campaign_dir),
+                "total_products": len(brief.products),
+                "total_images": sum(len(outputs) for outputs in all_outputs.values()),
+                "reused_from": reused_from,
+                "usage": {
+                    "llm_usage": translation_metadata,
+                    "image_generation": image_generation_metadata,
+                    "cost_usd": cost
+                }
+            }
+        }
+
+        # Save main response artifact
+        main_artifact_path = campaign_dir / "response_artifact.json"
+        with span("artifact_write"):
+            atomic_write_json(main_artifact_path, main_artifact)
+            record_campaign(main_artifact, main_artifact_path)
+
+        # Log to DuckDB (every product and variant)
+        with span("db_log"):
+            log_campaign(campaign_id, brief, all_outputs, compliance, variant_stats)
+            log_usage(campaign_id, translation_metadata, image_generation_metadata, cost)
+
         metadata = {
             "generated_at": datetime.now().isoformat(),
+            "campaign_directory": str(campaign_dir),
             "total_products": len(brief.products),
             "total_images": sum(len(outputs) for outputs in all_outputs.values()),
             "llm_usage": translation_metadata if translation_metadata else {
@@ -231,31 +421,33 @@ def generate_campaign(brief: CampaignBrief):
                 "generation_time": "N/A",
                 "dimensions": "N/A"
             },
-            "cost_usd": cost
+            "cost_usd": cost,
+            "reused_from": reused_from
         }
 
-        print(f"📁 Campaign artifacts saved to: {campaign_dir}")
-        print(f"📊 LLM Token usage: {metadata['llm_usage']}")
         return GenerationResult(campaign_id=campaign_id, outputs=all_outputs, compliance=compliance, metadata=metadata)
     except HTTPException:
         # Re-raise HTTP exceptions (like compliance failures)
         raise
     except Exception as e:
-        # Handle unexpected errors
-        print(f"❌ Unexpected error during campaign generation: {e}")
-        import traceback
-        traceback.print_exc()
+        # Out of time (no image before the deadline, or a call cut short by it) or an unexpected error
+        out_of_time = isinstance(e, DeadlineExceeded) or expired()
+        if out_of_time:
+            logger.warning("campaign ran out of time", extra={"error": str(e)})
+        else:
+            logger.error("unexpected error during campaign generation", exc_info=True)
 
         # Clean up campaign directory if it was created
         if campaign_dir and campaign_dir.exists():
             import shutil
             shutil.rmtree(campaign_dir)
-            print(f"🗑️  Cleaned up failed campaign directory: {campaign_dir}")
+            logger.debug("cleaned up failed campaign directory", extra={"path": str(campaign_dir)})
 
-        raise HTTPException(status_code=500, detail={
-            "error": "Campaign generation failed",
+        raise HTTPException(status_code=504 if out_of_time else 500, detail={
+            "error": "Campaign deadline exceeded" if out_of_time else "Campaign generation failed",
             "message": str(e),
-            "campaign_id": campaign_id
+            "campaign_id": campaign_id,
+            **({"deadline": deadline_report()} if out_of_time else {})
         })
 
 
@@ -273,19 +465,26 @@ def search_campaigns(search_query: SearchQuery):
         if search_query.top_k < 1 or search_query.top_k > 20:
             raise HTTPException(status_code=400, detail="top_k must be between 1 and 20")
         
-        print(f"🔍 Searching for similar campaigns: '{search_query.query}'")
+        logger.debug("searching campaigns", extra={"mode": search_query.mode, "query": search_query.query})
         
-        # Search the vector database
-        results = search_similar(search_query.query, top_k=search_query.top_k)
+        filters = {
+            "country_name": search_query.country_name,
+            "audience": search_query.audience,
+            "product": search_query.product,
+            "date_from": search_query.date_from,
+            "date_to": search_query.date_to,
+        }
         
-        # Load master manifest to get full campaign details
-        master_manifest_path = Path("assets/generated/master_manifest.json")
-        campaigns_lookup = {}
+        # Search the vector database (filters are applied inside the query, not afterwards)
+        if search_query.mode == "hybrid":
+            results = hybrid_search(search_query.query, top_k=search_query.top_k, **filters)
+        else:
+            where = build_where_filter(**filters)
+            results = search_similar(search_query.query, top_k=search_query.top_k, where=where)
         
-        if master_manifest_path.exists():
-            with open(master_manifest_path, "r") as f:
-                manifest = json.load(f)
-                campaigns_lookup = {c["campaign_id"]: c for c in manifest.get("campaigns", [])}
+        # Look up full campaign details from the in-memory campaign index
+        result_ids = results["ids"][0] if results and results.get("ids") else []
+        campaigns_lookup = get_campaigns(result_ids)
         
         # Enrich results with full campaign data
         enriched_results = []
@@ -303,35 +502,103 @@ def search_campaigns(search_query: SearchQuery):
                 # Cosine similarity = 1 - (distance / 2) -> ranges from 0 to 1
                 similarity = (1 - (distance / 2)) if distance is not None else None
                 
-                enriched_results.append({
+                result = {
                     "campaign_id": campaign_id,
                     "similarity_score": similarity,
                     "distance": distance,
                     "message": document,
                     "metadata": metadata,
                     "full_campaign": campaign_data
-                })
+                }
+                if "rrf_scores" in results:
+                    result["rrf_score"] = results["rrf_scores"][i]
+                enriched_results.append(result)
         
-        print(f"✅ Found {len(enriched_results)} similar campaigns")
+        logger.info("search completed", extra={"mode": search_query.mode, "results": len(enriched_results)})
         return {
             "results": enriched_results,
             "query": search_query.query,
+            "mode": search_query.mode,
+            "filters": {key: value for key, value in filters.items() if value is not None},
             "total_results": len(enriched_results)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ Search error: {e}")
+        logger.error("search failed", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
+def manifest_query(
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size (enables pagination)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    sort: Literal["desc", "asc"] = Query("desc", description="Order by campaign timestamp"),
+    country_name: Optional[str] = None,
+    audience: Optional[str] = None,
+    product: Optional[str] = None,
+    compliance_status: Optional[str] = None,
+    summary: bool = Query(False, description="Return manifest_info only"),
+    format: Literal["json", "ndjson"] = Query("json", description="ndjson streams one campaign per line"),
+) -> Dict[str, Any]:
+    """Query parameters shared by the master-manifest endpoints"""
+    return {
+        "limit": limit, "cursor": cursor, "sort": sort,
+        "country_name": country_name, "audience": audience, "product": product,
+        "compliance_status": compliance_status, "summary": summary, "format": format,
+    }
+
+
+def is_legacy_manifest_query(query: Dict[str, Any]) -> bool:
+    """No paging, filtering, summary or streaming requested: return the whole manifest as before"""
+    defaults = {"sort": "desc", "summary": False, "format": "json"}
+    return all(value is None or defaults.get(key) == value for key, value in query.items())
+
+
+def serve_manifest_query(query: Dict[str, Any]):
+    """Summary, NDJSON stream or one cursor page of the master manifest"""
+    if query["summary"]:
+        return {"manifest_info": get_manifest_info()}
+
+    filters = {key: query[key] for key in ("sort", "country_name", "audience", "product", "compliance_status")}
+    if query["cursor"]:
+        try:
+            decode_cursor(query["cursor"])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    filters["cursor"] = query["cursor"]
+
+    if query["format"] == "ndjson":
+        def stream():
+            for count, campaign in enumerate(iter_campaigns(**filters), start=1):
+                yield json.dumps(campaign, ensure_ascii=False) + "\n"
+                if query["limit"] and count >= query["limit"]:
+                    break
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    limit = query["limit"] or 50
+    campaigns, next_cursor = list_campaigns(limit=limit, **filters)
+    return {
+        "campaigns": campaigns,
+        "count": len(campaigns),
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "sort": query["sort"],
+        "filters": {key: value for key, value in filters.items() if key not in ("sort", "cursor") and value},
+    }
+
+
 @router.get("/master-manifest")
-def get_master_manifest():
+def get_master_manifest(query: Dict[str, Any] = Depends(manifest_query)):
     """
-    Returns the master manifest containing all campaign history
+    Returns the master manifest containing all campaign history.
+    With query parameters: cursor pagination sorted by timestamp, filters, a
+    summary-only mode, or an NDJSON stream for large exports.
     """
-    master_manifest_path = Path("assets/generated/master_manifest.json")
-    
-    if not master_manifest_path.exists():
+    if not is_legacy_manifest_query(query):
+        return serve_manifest_query(query)
+
+    if not MANIFEST_PATH.exists() and not LOG_PATH.exists():
         return {
             "campaigns": [],
             "total_count": 0,
@@ -339,14 +606,40 @@ def get_master_manifest():
         }
     
     try:
-        with open(master_manifest_path, "r") as f:
-            manifest = json.load(f)
+        manifest = load_manifest()
         return manifest
     except Exception as e:
-        print(f"❌ Error reading master manifest: {e}")
+        logger.error("error reading master manifest", exc_info=True)
         return {
             "campaigns": [],
             "total_count": 0,
             "last_updated": None,
             "error": str(e)
         }
+
+
+@router.post("/export/parquet")
+def export_parquet(full: bool = Query(False, description="Rewrite the whole export instead of appending new campaigns")):
+    """
+    Export campaign history (campaigns, products, variants, usage) to date-partitioned
+    Parquet files under db/parquet. Only campaigns not exported before are appended.
+    """
+    try:
+        return export_campaigns(full=full)
+    except Exception as e:
+        logger.error("parquet export failed", exc_info=True)
+        raise HTTPException(status_code=500, detail={"error": "Parquet export failed", "message": str(e)})
+
+
+@router.get("/analytics/images-per-country")
+def get_images_per_country(date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """Images generated per country per week, queried from the Parquet export"""
+    try:
+        rows = images_per_country_per_week(
+            date_from=date_from.isoformat() if date_from else None,
+            date_to=date_to.isoformat() if date_to else None,
+        )
+        return {"rows": rows}
+    except Exception as e:
+        logger.error("analytics query failed", exc_info=True)
+        raise HTTPException(status_code=500, detail={"error": "Analytics query failed", "message": str(e)})
@@ -0,0 +1,175 @@
+"""
+Admission control and per-provider concurrency limits.
+
+Campaigns: at most MAX_CONCURRENT_CAMPAIGNS run at once (0 = unlimited). Further requests wait
+in a bounded queue of ADMISSION_QUEUE_SIZE for up to ADMISSION_QUEUE_TIMEOUT seconds (or the
+campaign deadline, if sooner). A full queue is rejected with 429 and a queue wait that runs out
+with 503, both with a Retry-After estimated from the mean campaign duration. Waiting happens on
+the request's worker thread, so keep MAX_CONCURRENT_CAMPAIGNS + ADMISSION_QUEUE_SIZE below the
+server's thread pool size (40 by default) or other endpoints will queue behind campaigns.
+
+Providers: `provider_slot(name)` caps in-flight calls per provider to match its quota.
+PROVIDER_CONCURRENCY is a comma-separated list of name=limit; image providers use their
+registry names and translation backends "<backend>_translation". Unlisted providers are
+unlimited. A call that cannot get a slot within PROVIDER_SLOT_TIMEOUT seconds (or the campaign
+deadline) raises ProviderError, so the provider chain falls back or the translation degrades.
+
+Queue depth, in-flight counts, waits and rejections are exported on /metrics.
+"""
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from .deadline import call_timeout
+from .metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT_SECONDS,
+    CAMPAIGN_SECONDS,
+    PROVIDER_IN_FLIGHT,
+    PROVIDER_SLOT_WAIT_SECONDS,
+)
+from .providers import ProviderError
+
+MAX_CONCURRENT_CAMPAIGNS = int(os.getenv("MAX_CONCURRENT_CAMPAIGNS", "8"))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "16"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+PROVIDER_CONCURRENCY = os.getenv("PROVIDER_CONCURRENCY", "huggingface=4,openai=4,openai_translation=8")
+PROVIDER_SLOT_TIMEOUT = float(os.getenv("PROVIDER_SLOT_TIMEOUT", "30"))
+
+# Campaign duration assumed for Retry-After until one has been measured
+DEFAULT_CAMPAIGN_SECONDS = 30.0
+
+
+class AdmissionRejected(Exception):
+    """A campaign was turned away: `status_code` 429 (queue full) or 503 (queue wait timed out)"""
+
+    def __init__(self, status_code: int, message: str, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded concurrency with a bounded, time-limited wait queue"""
+
+    def __init__(self, max_concurrent: int, queue_size: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free: queued work ahead, spread over the running slots"""
+        mean = CAMPAIGN_SECONDS.mean() or DEFAULT_CAMPAIGN_SECONDS
+        return max(1, math.ceil(mean * (self.waiting + 1) / max(self.max_concurrent, 1)))
+
+    def acquire(self) -> float:
+        """Admit one campaign, waiting in the queue if needed; returns the seconds waited"""
+        started = time.monotonic()
+        with self._cond:
+            if self.max_concurrent > 0 and self.in_flight >= self.max_concurrent:
+                if self.waiting >= self.queue_size:
+                    ADMISSION_REJECTED.inc(status="429")
+                    raise AdmissionRejected(429, "Too many campaigns queued", self.retry_after())
+                self.waiting += 1
+                ADMISSION_QUEUE_DEPTH.set(self.waiting)
+                try:
+                    admitted = self._cond.wait_for(
+                        lambda: self.in_flight < self.max_concurrent, timeout=call_timeout(self.queue_timeout)
+                    )
+                finally:
+                    self.waiting -= 1
+                    ADMISSION_QUEUE_DEPTH.set(self.waiting)
+                if not admitted:
+                    ADMISSION_REJECTED.inc(status="503")
+                    raise AdmissionRejected(503, "Timed out waiting for a campaign slot", self.retry_after())
+            self.in_flight += 1
+            ADMISSION_IN_FLIGHT.set(self.in_flight)
+        waited = time.monotonic() - started
+        ADMISSION_WAIT_SECONDS.observe(waited)
+        return waited
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            ADMISSION_IN_FLIGHT.set(self.in_flight)
+            self._cond.notify()
+
+
+def parse_provider_limits(spec: str) -> Dict[str, int]:
+    """"huggingface=4,openai=2" -> {"huggingface": 4, "openai": 2} (limits <= 0 mean unlimited)"""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, limit = item.partition("=")
+        try:
+            value = int(limit)
+        except ValueError:
+            raise ValueError(f"Invalid PROVIDER_CONCURRENCY entry: {item!r} (expected name=limit)")
+        if value > 0:
+            limits[name.strip()] = value
+    return limits
+
+
+_controller = AdmissionController(MAX_CONCURRENT_CAMPAIGNS, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT)
+_provider_limits = parse_provider_limits(PROVIDER_CONCURRENCY)
+_provider_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_semaphores_lock = threading.Lock()
+
+
+def admit_campaign() -> float:
+    """Admit a campaign (raises AdmissionRejected); pair with release_campaign()"""
+    return _controller.acquire()
+
+
+def release_campaign() -> None:
+    _controller.release()
+
+
+def set_provider_limit(name: str, limit: Optional[int]) -> None:
+    """Set (or with None/0 remove) the concurrency limit of one provider"""
+    with _semaphores_lock:
+        _provider_semaphores.pop(name, None)
+        if limit and limit > 0:
+            _provider_limits[name] = limit
+        else:
+            _provider_limits.pop(name, None)
+
+
+def _semaphore(name: str) -> Optional[threading.BoundedSemaphore]:
+    limit = _provider_limits.get(name)
+    if not limit:
+        return None
+    with _semaphores_lock:
+        semaphore = _provider_semaphores.get(name)
+        if semaphore is None:
+            semaphore = _provider_semaphores[name] = threading.BoundedSemaphore(limit)
+        return semaphore
+
+
+@contextmanager
+def provider_slot(name: str) -> Iterator[None]:
+    """Hold one of the provider's concurrency slots for the enclosed call"""
+    semaphore = _semaphore(name)
+    if semaphore is None:
+        yield
+        return
+    started = time.monotonic()
+    acquired = semaphore.acquire(timeout=call_timeout(PROVIDER_SLOT_TIMEOUT))
+    PROVIDER_SLOT_WAIT_SECONDS.observe(time.monotonic() - started, provider=name)
+    if not acquired:
+        raise ProviderError(f"{name}: all {_provider_limits.get(name)} concurrency slots busy")
+    PROVIDER_IN_FLIGHT.inc(provider=name)
+    try:
+        yield
+    finally:
+        PROVIDER_IN_FLIGHT.dec(provider=name)
+        semaphore.release()
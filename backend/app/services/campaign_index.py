@@ -0,0 +1,191 @@
+"""
+In-memory campaign index keyed by campaign_id.
+
+Serves search-result enrichment and manifest listing without re-reading the master manifest
+on every request. The snapshot is reloaded only when its mtime/size changes; campaigns
+committed since then are picked up by reading just the new bytes of the append-only manifest log.
+"""
+import base64
+import bisect
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import manifest_store
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+_lock = threading.Lock()
+_index: Dict[str, Dict[str, Any]] = {}
+# Every manifest entry (entries without a campaign_id, e.g. load errors, are listed but not indexed)
+_campaigns: List[Dict[str, Any]] = []
+_signature: Optional[Tuple[int, int]] = None
+_log_offset = 0
+
+# Derived views, rebuilt lazily when _version changes
+_version = 0
+_sorted_version = -1
+_sorted: List[Dict[str, Any]] = []
+_sort_keys: List[Tuple[str, str]] = []
+_info_version = -1
+_info: Dict[str, Any] = {}
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _refresh() -> None:
+    """Sync with the manifest on disk (two stat calls when nothing changed)"""
+    global _index, _campaigns, _signature, _log_offset, _version
+    signature = _file_signature(manifest_store.MANIFEST_PATH)
+    log_signature = _file_signature(manifest_store.LOG_PATH)
+    log_size = log_signature[1] if log_signature else 0
+    if signature == _signature and log_size == _log_offset:
+        return
+
+    with _lock:
+        try:
+            if signature != _signature or log_size < _log_offset:
+                # Snapshot rewritten (compaction or rebuild): reload everything
+                snapshot = manifest_store.read_snapshot()
+                campaigns = snapshot.get("campaigns", [])
+                index = {c["campaign_id"]: c for c in campaigns if "campaign_id" in c}
+                entries, offset = manifest_store.read_log()
+                _index = index
+                _campaigns = list(campaigns)
+                _signature = signature
+                _log_offset = 0
+                logger.info("campaign index loaded", extra={"campaigns": len(_index)})
+            else:
+                entries, offset = manifest_store.read_log(_log_offset)
+            for campaign in entries:
+                if "campaign_id" in campaign:
+                    if campaign["campaign_id"] in _index:
+                        _campaigns = [c for c in _campaigns if c.get("campaign_id") != campaign["campaign_id"]]
+                    _index[campaign["campaign_id"]] = campaign
+                _campaigns.append(campaign)
+            _log_offset = offset
+            _version += 1
+        except Exception as e:
+            logger.error("failed to load master manifest into campaign index", extra={"error": str(e)})
+
+
+def get_campaign(campaign_id: str) -> Optional[Dict[str, Any]]:
+    """Look up a single campaign by id"""
+    _refresh()
+    return _index.get(campaign_id)
+
+
+def get_campaigns(campaign_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Look up several campaigns by id; unknown ids are omitted"""
+    _refresh()
+    return {campaign_id: _index[campaign_id] for campaign_id in campaign_ids if campaign_id in _index}
+
+
+def invalidate() -> None:
+    """Force the next lookup to reload the manifest from disk"""
+    global _signature
+    with _lock:
+        _signature = None
+
+
+def _sort_key(campaign: Dict[str, Any]) -> Tuple[str, str]:
+    # Campaign timestamps are YYYYmmdd_HHMMSS strings, so string order is chronological
+    return (campaign.get("timestamp") or "", campaign.get("campaign_id") or "")
+
+
+def _sorted_campaigns() -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+    """Campaigns in ascending (timestamp, campaign_id) order, cached until the index changes"""
+    global _sorted_version, _sorted, _sort_keys
+    if _sorted_version != _version:
+        with _lock:
+            campaigns = sorted(_campaigns, key=_sort_key)
+            _sorted, _sort_keys = campaigns, [_sort_key(c) for c in campaigns]
+            _sorted_version = _version
+    return _sorted, _sort_keys
+
+
+def get_manifest_info() -> Dict[str, Any]:
+    """The `manifest_info` summary, cached until the index changes"""
+    global _info_version, _info
+    _refresh()
+    if _info_version != _version:
+        _info = manifest_store.build_manifest_info(_campaigns)
+        _info_version = _version
+    return _info
+
+
+def encode_cursor(campaign: Dict[str, Any]) -> str:
+    timestamp, campaign_id = _sort_key(campaign)
+    return base64.urlsafe_b64encode(json.dumps([timestamp, campaign_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        timestamp, campaign_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (str(timestamp), str(campaign_id))
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def _matches(
+    campaign: Dict[str, Any],
+    country_name: Optional[str],
+    audience: Optional[str],
+    product: Optional[str],
+    compliance_status: Optional[str],
+) -> bool:
+    request = campaign.get("request") or {}
+    if country_name and (request.get("country_name") or request.get("region")) != country_name:
+        return False
+    if audience and request.get("audience") != audience:
+        return False
+    if product and product.lower() not in [p.lower() for p in request.get("products") or []]:
+        return False
+    if compliance_status:
+        compliance = (campaign.get("response") or {}).get("compliance") or {}
+        if compliance.get("status") != compliance_status:
+            return False
+    return True
+
+
+def iter_campaigns(
+    sort: str = "desc",
+    cursor: Optional[str] = None,
+    country_name: Optional[str] = None,
+    audience: Optional[str] = None,
+    product: Optional[str] = None,
+    compliance_status: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield campaigns ordered by timestamp, starting after `cursor`, that match every filter"""
+    _refresh()
+    campaigns, keys = _sorted_campaigns()
+    if sort == "asc":
+        start = bisect.bisect_right(keys, decode_cursor(cursor)) if cursor else 0
+        positions = range(start, len(campaigns))
+    else:
+        start = bisect.bisect_left(keys, decode_cursor(cursor)) if cursor else len(campaigns)
+        positions = range(start - 1, -1, -1)
+    for position in positions:
+        campaign = campaigns[position]
+        if _matches(campaign, country_name, audience, product, compliance_status):
+            yield campaign
+
+
+def list_campaigns(limit: int = 50, **query: Any) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of `iter_campaigns`. Returns (campaigns, next_cursor or None on the last page)."""
+    page: List[Dict[str, Any]] = []
+    iterator = iter_campaigns(**query)
+    for campaign in iterator:
+        page.append(campaign)
+        if len(page) == limit:
+            has_more = next(iterator, None) is not None
+            return page, encode_cursor(campaign) if has_more else None
+    return page, None
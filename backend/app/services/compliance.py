@@ -2,9 +2,13 @@
 from typing import Dict, Optional, List
 import re
 from pathlib import Path
+
+from .log import get_logger
 # from PIL import Image  # For future brand overlay verification
 # import numpy as np  # For future brand overlay verification
 
+logger = get_logger(__name__)
+
 
 # List of inappropriate words and phrases (expandable)
 INAPPROPRIATE_CONTENT = [
@@ -24,7 +28,7 @@ def verify_brand_overlay(image_path: str, brand_reference_path: str = "frontend/
     """
     # Placeholder implementation - assumes brand overlay is applied correctly
     # The add_brand_overlay() function in generator.py handles the actual overlay
-    print(f"✅ Brand overlay check (placeholder) passed for {Path(image_path).name}")
+    logger.debug("brand overlay check (placeholder) passed", extra={"image": Path(image_path).name})
     return True
     
     # Future implementation would use image comparison:
@@ -0,0 +1,128 @@
+"""
+Per-campaign deadline.
+
+A campaign's time budget comes from the brief (`deadline_seconds`) or the server default
+CAMPAIGN_DEADLINE_SECONDS (0 = unbounded); with both set the tighter one wins. The deadline
+lives in a context variable set by generate_campaign, so every provider and LLM call on that
+campaign's thread sees it without extra parameters:
+
+- `call_timeout(default)` caps a network timeout at the remaining budget
+- `covers(*stages)` tells whether the remaining budget is enough for the stages ahead, from
+  their mean duration so far (campaign_stage_duration_seconds) or a conservative default
+- `cut(stage, action)` records a stage that was skipped or degraded to stay within budget
+
+Stages that cannot be cut (compliance, artifact and database writes) always run. The report
+(budget, elapsed, cut stages) is returned as metadata["deadline"].
+"""
+import os
+import threading
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Optional
+
+from .metrics import STAGE_CUTS, STAGE_SECONDS
+
+CAMPAIGN_DEADLINE_SECONDS = float(os.getenv("CAMPAIGN_DEADLINE_SECONDS", "0"))
+
+# Expected stage durations (seconds) until the process has observed some
+DEFAULT_STAGE_SECONDS = {
+    "provider_call": 15.0,
+    "fallback": 20.0,
+    "translation": 3.0,
+    "overlay": 0.5,
+    "encode": 0.2,
+    "crop_resize": 0.05,
+}
+
+# Shortest timeout handed to a network call, so an almost spent budget fails fast but cleanly
+MIN_CALL_TIMEOUT = 0.5
+
+
+class DeadlineExceeded(Exception):
+    """The campaign ran out of time before a stage that cannot be cut"""
+
+
+class _Deadline:
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.started = time.monotonic()
+        self.expires_at = self.started + budget
+        self.cuts: Dict[tuple, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+
+_deadline: ContextVar[Optional[_Deadline]] = ContextVar("campaign_deadline", default=None)
+
+
+def effective_budget(requested: Optional[float]) -> Optional[float]:
+    """The campaign's budget in seconds: the brief's request, capped by the server default"""
+    budgets = [b for b in (requested, CAMPAIGN_DEADLINE_SECONDS) if b and b > 0]
+    return min(budgets) if budgets else None
+
+
+def start_deadline(seconds: Optional[float]) -> Token:
+    """Start the deadline for the campaign running in this context (None = unbounded)"""
+    return _deadline.set(_Deadline(seconds) if seconds else None)
+
+
+def end_deadline(token: Token) -> None:
+    _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the campaign's budget, None without a deadline"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline.expires_at - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def call_timeout(default: Optional[float]) -> Optional[float]:
+    """Timeout for a network call: `default` capped at the remaining budget"""
+    left = remaining()
+    if left is None:
+        return default
+    left = max(left, MIN_CALL_TIMEOUT)
+    return left if default is None else min(default, left)
+
+
+def expected_seconds(*stages: str) -> float:
+    """Expected duration of the given stages: observed means, or the defaults"""
+    return sum(STAGE_SECONDS.mean(stage=stage) or DEFAULT_STAGE_SECONDS.get(stage, 0.0) for stage in stages)
+
+
+def covers(*stages: str) -> bool:
+    """Whether the remaining budget is expected to cover the given stages"""
+    left = remaining()
+    return left is None or left >= expected_seconds(*stages)
+
+
+def cut(stage: str, action: str, detail: Optional[str] = None) -> None:
+    """Record that `stage` was skipped or degraded ("skipped" / "degraded") to meet the deadline"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return
+    STAGE_CUTS.inc(stage=stage, action=action)
+    with deadline.lock:
+        entry = deadline.cuts.setdefault((stage, action, detail), {"stage": stage, "action": action, "count": 0})
+        if detail:
+            entry["detail"] = detail
+        entry["count"] += 1
+        entry.setdefault("at_ms", round((time.monotonic() - deadline.started) * 1000, 2))
+
+
+def deadline_report() -> Optional[Dict[str, Any]]:
+    """Budget, elapsed time and cut stages for the current campaign (None without a deadline)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    elapsed = time.monotonic() - deadline.started
+    return {
+        "budget_s": deadline.budget,
+        "elapsed_s": round(elapsed, 3),
+        "exceeded": elapsed > deadline.budget,
+        "cuts": list(deadline.cuts.values()),
+    }
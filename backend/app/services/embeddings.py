@@ -1,18 +1,129 @@
 """Embeddings service"""
-from typing import Any, Dict
-import chromadb
-from sentence_transformers import SentenceTransformer
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import json
+import os
+import re
+import time
 
-# Initialize ChromaDB with persistence
-client = chromadb.PersistentClient(path="db/chroma")
-# Use cosine distance for better similarity scoring (returns values 0-2, where 0 = identical)
-collection = client.get_or_create_collection(
-    name="campaign_assets",
-    metadata={"hnsw:space": "cosine"}  # Cosine distance
-)
+import numpy as np
 
-# MiniLM embeddings
-model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+
+class HashingEmbedder:
+    """
+    Offline stand-in for the sentence-transformers model (EMBEDDING_MODEL=local): signed feature
+    hashing of word unigrams and bigrams into a unit-length vector. Deterministic and fast, with
+    the same `encode` / `get_sentence_embedding_dimension` interface, so benchmarks and CI run
+    without downloading a model. Similarity is lexical, not semantic.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, text: str) -> np.ndarray:
+        tokens = re.findall(r"\w+", text.lower())
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+            vec[digest % self.dim] += 1.0 if (digest >> 63) else -1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+
+# MiniLM embeddings, or the hashing stand-in with EMBEDDING_MODEL=local
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+if EMBEDDING_MODEL == "local":
+    model = HashingEmbedder()
+else:
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(EMBEDDING_MODEL)
+
+# Vector store backend: "chroma" (persistent HNSW, default) or "numpy" (exact, memory-mapped)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+
+if VECTOR_BACKEND == "numpy":
+    from .vector_index import NumpyVectorIndex
+
+    collection = NumpyVectorIndex(Path("db/vectors"), dim=model.get_sentence_embedding_dimension())
+else:
+    import chromadb
+
+    # Initialize ChromaDB with persistence
+    client = chromadb.PersistentClient(path="db/chroma")
+    # Use cosine distance for better similarity scoring (returns values 0-2, where 0 = identical)
+    collection = client.get_or_create_collection(
+        name="campaign_assets",
+        metadata={"hnsw:space": "cosine"}  # Cosine distance
+    )
+
+def product_key(product: str) -> str:
+    """Metadata key flagging that a campaign contains a product (same slug as the product directory)"""
+    return f"product_{product.replace(' ', '_').lower()}"
+
+def to_epoch(value: Any) -> Optional[int]:
+    """Normalize a datetime, ISO string or campaign timestamp (YYYYmmdd_HHMMSS) to epoch seconds"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    for parse in (datetime.fromisoformat, lambda v: datetime.strptime(v, "%Y%m%d_%H%M%S")):
+        try:
+            return int(parse(str(value)).timestamp())
+        except ValueError:
+            continue
+    return None
+
+def build_embedding_text(text: str, metadata: dict) -> str:
+    """Create rich text for embedding that includes message, country, and audience"""
+    country_name = metadata.get('country_name', '')
+    audience = metadata.get('audience', '')
+    products = metadata.get('products', [])
+    products_str = ', '.join(products) if isinstance(products, list) else str(products)
+
+    # Concatenate for better semantic search
+    return f"{text}. Target: {audience} in {country_name}. Products: {products_str}"
+
+def build_where_filter(
+    country_name: Optional[str] = None,
+    audience: Optional[str] = None,
+    product: Optional[str] = None,
+    date_from: Optional[Any] = None,
+    date_to: Optional[Any] = None,
+    products: Optional[List[str]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Build a Chroma `where` clause so filters are applied inside the vector query
+    rather than on the top_k results afterwards. `products` requires every listed product.
+    """
+    clauses: List[Dict[str, Any]] = []
+    if country_name:
+        clauses.append({"country_name": country_name})
+    if audience:
+        clauses.append({"audience": audience})
+    for required_product in ([product] if product else []) + list(products or []):
+        clauses.append({product_key(required_product): True})
+    if date_from is not None:
+        clauses.append({"created_at": {"$gte": to_epoch(date_from)}})
+    if date_to is not None:
+        clauses.append({"created_at": {"$lte": to_epoch(date_to)}})
+
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
 
 def embed_and_store(campaign_id: str, text: str, metadata: dict):
     import json
@@ -25,22 +136,80 @@ def embed_and_store(campaign_id: str, text: str, metadata: dict):
             clean_metadata[key] = json.dumps(value)
         else:
             clean_metadata[key] = value
-    
-    # Create rich text for embedding that includes message, country, and audience
-    country_name = metadata.get('country_name', '')
-    audience = metadata.get('audience', '')
+
+    # Filterable fields: one boolean flag per product and an epoch timestamp for date ranges
     products = metadata.get('products', [])
-    products_str = ', '.join(products) if isinstance(products, list) else str(products)
-    
-    # Concatenate for better semantic search
-    rich_text = f"{text}. Target: {audience} in {country_name}. Products: {products_str}"
-    
+    for product in products if isinstance(products, list) else []:
+        clean_metadata[product_key(product)] = True
+    clean_metadata["created_at"] = to_epoch(metadata.get("created_at")) or int(time.time())
+
+    rich_text = build_embedding_text(text, metadata)
+
     vec = model.encode(rich_text).tolist()
-    collection.add(ids=[campaign_id], embeddings=[vec], metadatas=[clean_metadata], documents=[text])
+    # Upsert so re-running the backfill refreshes metadata of existing campaigns
+    collection.upsert(ids=[campaign_id], embeddings=[vec], metadatas=[clean_metadata], documents=[text])
 
-def search_similar(query: str, top_k: int = 3) -> Dict[str, Any]:
+def _missing_filter_fields(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Product flags and epoch created_at that metadata stored before filtered search lacks"""
+    products = metadata.get("products")
+    if isinstance(products, str):
+        try:
+            products = json.loads(products)
+        except ValueError:
+            products = []
+    missing: Dict[str, Any] = {
+        product_key(product): True
+        for product in (products if isinstance(products, list) else [])
+        if product_key(product) not in metadata
+    }
+    created_at = metadata.get("created_at")
+    if created_at is not None and not isinstance(created_at, int):
+        epoch = to_epoch(created_at)
+        if epoch is not None:
+            missing["created_at"] = epoch
+    return missing
+
+def backfill_filter_metadata() -> int:
+    """
+    Add the filter fields (product flags, epoch created_at) to Chroma entries stored before
+    filtered search existed, so filtered queries don't silently skip older campaigns. Entries
+    with no recorded creation time still miss date filters; backfill_embeddings.py restores it
+    from the manifest. Returns the number of entries updated.
     """
-    Search for similar campaigns using vector embeddings
+    if VECTOR_BACKEND == "numpy":
+        return 0  # the numpy index has only ever stored entries with the filter fields
+    stored = collection.get(include=["metadatas"])
+    ids, metadatas, undated = [], [], 0
+    for campaign_id, metadata in zip(stored["ids"], stored["metadatas"]):
+        metadata = metadata or {}
+        missing = _missing_filter_fields(metadata)
+        if missing:
+            ids.append(campaign_id)
+            metadatas.append({**metadata, **missing})
+        if not isinstance(missing.get("created_at", metadata.get("created_at")), int):
+            undated += 1
+    if ids:
+        collection.update(ids=ids, metadatas=metadatas)
+        logger.info("added filter metadata to stored campaign embeddings", extra={"campaigns": len(ids)})
+    if undated:
+        logger.warning(
+            "campaign embeddings without created_at are excluded by date filters; re-run backfill_embeddings.py",
+            extra={"campaigns": undated},
+        )
+    return len(ids)
+
+def search_similar(query: str, top_k: int = 3, where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Search for similar campaigns using vector embeddings.
+    An optional Chroma `where` clause restricts the candidates before ranking.
     """
     vec = model.encode(query).tolist()
-    return collection.query(query_embeddings=[vec], n_results=top_k)
\ No newline at end of file
+    if where:
+        return collection.query(query_embeddings=[vec], n_results=top_k, where=where)
+    return collection.query(query_embeddings=[vec], n_results=top_k)
+
+def get_campaign_documents(campaign_ids: List[str]) -> Dict[str, Any]:
+    """Fetch stored metadata and documents for campaigns by id (used for keyword-only hybrid hits)"""
+    if not campaign_ids:
+        return {"ids": [], "metadatas": [], "documents": []}
+    return collection.get(ids=campaign_ids, include=["metadatas", "documents"])
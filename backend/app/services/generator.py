@@ -1,6 +1,10 @@
 import os
+import time
 import httpx
 import base64
+import statistics
+from collections import deque
+from contextvars import ContextVar
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
@@ -8,6 +12,16 @@ from PIL import Image, ImageDraw, ImageFont
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from .admission import provider_slot
+from .deadline import DeadlineExceeded, call_timeout, covers, cut, expired
+from .log import bind, get_logger
+from .memory import memory_span
+from .metrics import PROVIDER_CALLS, PROVIDER_RETRIES, record_stage, span
+from .providers import ImageProvider, ProviderError, backoff_delay, provider_chain, register_provider, retry_after_seconds
+from .translation import get_translation_backend, register_translation_backend
+
+logger = get_logger(__name__)
+
 # Load API keys from .env
 load_dotenv()
 HF_TOKEN = os.getenv("HF_TOKEN")
@@ -17,9 +31,25 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 HF_MODEL = "stabilityai/stable-diffusion-xl-base-1.0"  # Primary: Hugging Face
 # QWEN_MODEL = "Qwen/Qwen-Image"  # Qwen-Image (requires Diffusers) - COMMENTED OUT
 OPENAI_MODEL = "dall-e-3"  # Fallback: OpenAI DALL-E 3
+# "b64_json" returns the image inline; "url" needs a second request to download it
+OPENAI_RESPONSE_FORMAT = os.getenv("OPENAI_RESPONSE_FORMAT", "b64_json")
+# Recent URL-mode download times (ms) that inline images are credited with saving
+OPENAI_DOWNLOAD_WINDOW = 50
+_openai_download_ms: deque = deque(maxlen=OPENAI_DOWNLOAD_WINDOW)
 
 HF_BASE_URL = "https://api-inference.huggingface.co"
 
+# Hugging Face retries: a cold model answers 503 {"estimated_time": seconds} while it loads.
+# Loading, rate-limited and gateway errors are retried (waiting out the load, honouring
+# Retry-After, otherwise jittered exponential backoff) until HF_REQUEST_DEADLINE seconds
+# have passed, then the next provider takes over
+HF_REQUEST_TIMEOUT = float(os.getenv("HF_REQUEST_TIMEOUT", "30"))
+HF_REQUEST_DEADLINE = float(os.getenv("HF_REQUEST_DEADLINE", "90"))
+HF_MAX_ATTEMPTS = int(os.getenv("HF_MAX_ATTEMPTS", "5"))
+HF_BACKOFF_BASE = float(os.getenv("HF_BACKOFF_BASE", "1"))
+HF_BACKOFF_MAX = float(os.getenv("HF_BACKOFF_MAX", "20"))
+HF_RETRY_STATUSES = {429, 502, 503, 504}
+
 OUTPUT_DIR = Path("assets/generated")
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -28,14 +58,24 @@ BRAND_IMAGE_PATH = Path("frontend/images/werkr_brand_image.png")
 BRAND_OVERLAY_SIZE = (350, 350)  # Size of brand overlay (increased from 200x200)
 BRAND_POSITION = "top_left"  # Position of brand overlay
 
+# Output variants rendered for every product: aspect ratio -> pixel size and subdirectory
+SIZE_CONFIGS = {
+    "1:1": {"size": (1024, 1024), "dir": "1x1"},
+    "16:9": {"size": (1024, 576), "dir": "16x9"},
+    "9:16": {"size": (576, 1024), "dir": "9x16"}
+}
+
 # RTL (Right-to-Left) language codes
 RTL_LANGUAGES = {
     'ar', 'he', 'fa', 'ur', 'ps', 'sd', 'ku', 'dv'  # Arabic, Hebrew, Persian, Urdu, Pashto, Sindhi, Kurdish, Dhivehi
 }
 
-# Global variables to store metadata
-_last_translation_metadata = None
-_last_image_generation_metadata = None
+# Translation usage, image provider and per-variant stats of the current campaign's last
+# product; context variables so campaigns running concurrently on the server's thread pool
+# don't see (or bill) each other's
+_last_translation_metadata: ContextVar[Optional[dict]] = ContextVar("last_translation_metadata", default=None)
+_last_image_generation_metadata: ContextVar[Optional[dict]] = ContextVar("last_image_generation_metadata", default=None)
+_last_variant_metadata: ContextVar[dict] = ContextVar("last_variant_metadata", default={})
 
 def is_rtl_language(language_code: str) -> bool:
     """Check if a language code represents an RTL language"""
@@ -45,21 +85,117 @@ def get_text_direction(language_code: str) -> str:
     """Get text direction for a language"""
     return 'rtl' if is_rtl_language(language_code) else 'ltr'
 
+def reset_generation_metadata():
+    """Clear the last-operation metadata at the start of a campaign, so a campaign that skips a
+    stage (e.g. a translation cut by its deadline) never reports an earlier campaign's usage"""
+    _last_translation_metadata.set(None)
+    _last_image_generation_metadata.set(None)
+    _last_variant_metadata.set({})
+
 def get_last_translation_metadata():
     """Get the metadata from the last translation operation"""
-    global _last_translation_metadata
-    return _last_translation_metadata
+    return _last_translation_metadata.get()
 
 def get_last_image_generation_metadata():
     """Get the metadata from the last image generation operation"""
-    global _last_image_generation_metadata
-    return _last_image_generation_metadata
+    return _last_image_generation_metadata.get()
+
+def get_last_variant_metadata():
+    """Get per-variant stats (bytes, width, height, render_ms) from the last create_size_variants call"""
+    return _last_variant_metadata.get()
+
+
+def openai_client() -> OpenAI:
+    """OpenAI client; under a campaign deadline its timeout is the remaining budget and SDK retries are off"""
+    timeout = call_timeout(None)
+    if timeout is None:
+        return OpenAI(api_key=OPENAI_API_KEY)
+    return OpenAI(api_key=OPENAI_API_KEY, timeout=timeout, max_retries=0)
+
+
+def translate_with_openai(message: str, target_language: str, country_full_name: str, audience_context: str = "") -> tuple[str, dict]:
+    """Generate localized copy with the OpenAI chat model (gpt-4.1, falling back to gpt-4o)"""
+    client = openai_client()
+
+    system_prompt = f"""
+You are an integrated marketing AI professional working on the global construction work apparel brand WERKR. 
+Your role is to receive an English seed copy and generate a new, creative, and localized, culturally resonant marketing message in {target_language} for the target audience. 
+
+TASK:
+- Generate a new, different, compelling creative marketing message for a {target_language}-speaking audience.
+- Consider cultural nuances and social preferences of audiences in {country_full_name}.
+- The target audience is: {audience_context}.
+
+OUTPUT RULES:
+- Write the final message directly, with no explanations, prefixes, or commentary.
+- If the target language is not English:
+  - First line: the localized message in {target_language}.
+  - Second line: the English translation of that localized message.
+- If the target language is English:
+  - Output only the English message.
+
+The new, creative, generated copy must be production-ready, in {target_language} and suitable for use in an advertising campaign in {country_full_name}.
+"""
+
+    try:
+        response = client.chat.completions.create(
+            model="gpt-4.1",
+            messages=[
+                {
+                    "role": "system",
+                    "content": system_prompt
+                },
+                {
+                    "role": "user",
+                    "content": message
+                }
+            ],
+            max_tokens=150,
+            temperature=0.7
+        )
+    except Exception as gpt41_error:
+        if not covers("translation"):
+            cut("translation", "degraded", "gpt-4o retry skipped")
+            raise
+        logger.warning("gpt-4.1 translation failed, falling back to gpt-4o", extra={"error": str(gpt41_error)})
+        client = openai_client()
+        response = client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {
+                    "role": "system",
+                    "content": system_prompt
+                },
+                {
+                    "role": "user",
+                    "content": message
+                }
+            ],
+            max_tokens=150,
+            temperature=0.7
+        )
+
+    translated_message = response.choices[0].message.content.strip()
+
+    # Extract token usage metadata
+    usage = response.usage
+    token_metadata = {
+        "prompt_tokens": usage.prompt_tokens if usage else 0,
+        "completion_tokens": usage.completion_tokens if usage else 0,
+        "total_tokens": usage.total_tokens if usage else 0,
+        "model": response.model if hasattr(response, 'model') else "unknown"
+    }
+    return translated_message, token_metadata
+
+
+# The offline "local" backend is built into translation.py
+register_translation_backend("openai", translate_with_openai)
 
 
 def translate_message_with_llm(message: str, country_name: str, audience: str = None) -> str:
     """
-    Use LLM to translate the message into the native language of the country,
-    considering the target audience for better cultural adaptation.
+    Translate the message into the native language of the country with the configured
+    TRANSLATION_BACKEND, considering the target audience for better cultural adaptation.
     """
     from .country_language import get_legacy_region_mapping, get_primary_language, get_country_by_code, get_country_by_name
     
@@ -74,9 +210,12 @@ def translate_message_with_llm(message: str, country_name: str, audience: str =
     if target_language == "English":
         return message
 
+    # Untranslated copy beats a blown deadline
+    if not covers("translation"):
+        cut("translation", "degraded", "original message used")
+        return message
+
     try:
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        
         # Build audience context for better translation
         audience_context = ""
         if audience:
@@ -92,82 +231,22 @@ def translate_message_with_llm(message: str, country_name: str, audience: str =
                 if audience_info.gender:
                     audience_context += f"Gender: {audience_info.gender.value}. "
 
-        system_prompt = f"""
-You are an integrated marketing AI professional working on the global construction work apparel brand WERKR. 
-Your role is to receive an English seed copy and generate a new, creative, and localized, culturally resonant marketing message in {target_language} for the target audience. 
-
-TASK:
-- Generate a new, different, compelling creative marketing message for a {target_language}-speaking audience.
-- Consider cultural nuances and social preferences of audiences in {country_full_name}.
-- The target audience is: {audience_context}.
-
-OUTPUT RULES:
-- Write the final message directly, with no explanations, prefixes, or commentary.
-- If the target language is not English:
-  - First line: the localized message in {target_language}.
-  - Second line: the English translation of that localized message.
-- If the target language is English:
-  - Output only the English message.
-
-The new, creative, generated copy must be production-ready, in {target_language} and suitable for use in an advertising campaign in {country_full_name}.
-"""
-
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4.1",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": message
-                    }
-                ],
-                max_tokens=150,
-                temperature=0.7
-            )
-        except Exception as gpt41_error:
-            print(f"⚠️ GPT-4.1 model failed: {gpt41_error}. Falling back to gpt-4o")
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": message
-                    }
-                ],
-                max_tokens=150,
-                temperature=0.7
-            )
-
-        translated_message = response.choices[0].message.content.strip()
+        backend_name = os.getenv("TRANSLATION_BACKEND", "openai")
+        translate = get_translation_backend(backend_name)
+        with provider_slot(f"{backend_name}_translation"):
+            translated_message, token_metadata = translate(message, target_language, country_full_name, audience_context)
         
-        # Extract token usage metadata
-        usage = response.usage
-        token_metadata = {
-            "prompt_tokens": usage.prompt_tokens if usage else 0,
-            "completion_tokens": usage.completion_tokens if usage else 0,
-            "total_tokens": usage.total_tokens if usage else 0,
-            "model": response.model if hasattr(response, 'model') else "unknown"
-        }
-        
-        print(f"🌍 Translated '{message}' to {target_language} for audience '{audience}': '{translated_message}'")
-        print(f"📊 Token usage: {token_metadata['total_tokens']} tokens (prompt: {token_metadata['prompt_tokens']}, completion: {token_metadata['completion_tokens']})")
+        logger.debug("translated message", extra={
+            "target_language": target_language, "audience": audience, "translated_message": translated_message, **token_metadata
+        })
         
-        # Store metadata globally for later retrieval
-        global _last_translation_metadata
-        _last_translation_metadata = token_metadata
+        # Store metadata for the caller in this campaign's context
+        _last_translation_metadata.set(token_metadata)
         
         return translated_message
 
     except Exception as e:
-        print(f"⚠️ Translation failed for {country_name}: {e}")
+        logger.warning("translation failed, using original message", extra={"country_name": country_name, "error": str(e)})
         return message  # Fallback to original message
 
 
@@ -196,10 +275,12 @@ def add_brand_overlay(image_path: str, product: str, country_name: str, message:
     Add brand overlay, localized text, and translated message to the image.
     """
     # Translate the message to the country's native language
-    translated_message = translate_message_with_llm(message, country_name, audience)
+    with span("translation"):
+        translated_message = translate_message_with_llm(message, country_name, audience)
 
     # Load the main image
-    with Image.open(image_path) as img:
+    with memory_span("overlay"), Image.open(image_path) as img:
+        compose_started = time.perf_counter()
         # Convert to RGBA if needed
         if img.mode != 'RGBA':
             img = img.convert('RGBA')
@@ -300,10 +381,10 @@ def add_brand_overlay(image_path: str, product: str, country_name: str, message:
                     else:
                         font_large = ImageFont.truetype(font_path, 48)
                         font_small = ImageFont.truetype(font_path, 32)
-                    print(f"✅ Using font for {language_code}: {font_path}")
+                    logger.debug("using font", extra={"language": language_code, "font_path": font_path})
                     break
             except Exception as e:
-                print(f"⚠️ Font {font_path} failed: {e}")
+                logger.debug("font failed to load", extra={"font_path": font_path, "error": str(e)})
                 continue
         
         # Final fallback to default font
@@ -311,11 +392,11 @@ def add_brand_overlay(image_path: str, product: str, country_name: str, message:
             try:
                 font_large = ImageFont.load_default()
                 font_small = ImageFont.load_default()
-                print("⚠️ Using default font (limited international support)")
+                logger.warning("using default font (limited international support)", extra={"language": language_code})
             except:
                 font_large = None
                 font_small = None
-                print("❌ No fonts available")
+                logger.error("no fonts available")
 
         # 1. Add translated message (main text) in bottom right
         if translated_message:
@@ -361,7 +442,7 @@ def add_brand_overlay(image_path: str, product: str, country_name: str, message:
             # Draw main text
             draw.text((msg_x, msg_y), translated_message, font=font_large, fill=text_color)
             
-            print(f"🌍 Text direction: {'RTL' if is_rtl else 'LTR'} for language {language_code}")
+            logger.debug("text direction", extra={"direction": "rtl" if is_rtl else "ltr", "language": language_code})
 
         # 2. Add country branding text (smaller, above brand logo)
         from .country_language import get_legacy_region_mapping, get_country_by_code
@@ -403,9 +484,12 @@ def add_brand_overlay(image_path: str, product: str, country_name: str, message:
         # # Draw main region text
         # draw.text((region_x, region_y), region_label, font=font_small, fill=text_color)
 
+        record_stage("overlay", time.perf_counter() - compose_started)
+
         # Save the modified image
-        img.save(image_path, "PNG", quality=95)
-        print(f"🏷️ Added brand overlay, translated message, and localization for {product} in {country_name}")
+        with span("encode"):
+            img.save(image_path, "PNG", quality=95)
+        logger.debug("added brand overlay", extra={"image_path": image_path})
 
     return image_path
 
@@ -451,23 +535,82 @@ def generate_with_huggingface(
     if seed is not None:
         payload["parameters"]["seed"] = seed
 
-    print(f"🚀 Trying Hugging Face model {model_to_use} with {quality} quality...")
-    with httpx.Client(timeout=30) as client:  # Shorter timeout for faster fallback
-        response = client.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        
-        generation_time = time.time() - start_time
-        metadata = {
-            "model": model_to_use,
-            "provider": "Hugging Face",
-            "generation_time": f"{generation_time:.2f}s",
-            "dimensions": f"{width}x{height}",
-            "inference_steps": num_inference_steps,
-            "guidance_scale": guidance_scale,
-            "quality": quality
-        }
+    logger.debug("calling Hugging Face", extra={"model": model_to_use, "quality": quality})
+    deadline = time.monotonic() + call_timeout(HF_REQUEST_DEADLINE)
+    attempts = []
+    with httpx.Client(timeout=HF_REQUEST_TIMEOUT) as client:
+        for attempt in range(1, HF_MAX_ATTEMPTS + 1):
+            record = {"attempt": attempt}
+            attempt_started = time.perf_counter()
+            try:
+                response = client.post(
+                    url, headers=headers, json=payload,
+                    timeout=max(0.1, min(HF_REQUEST_TIMEOUT, deadline - time.monotonic()))
+                )
+                record["status"] = response.status_code
+            except httpx.TransportError as e:  # connection errors and timeouts
+                response = None
+                record["error"] = type(e).__name__
+            record["ms"] = round((time.perf_counter() - attempt_started) * 1000, 2)
+            attempts.append(record)
+
+            if response is not None and response.is_success:
+                break
+            if response is not None and response.status_code not in HF_RETRY_STATUSES:
+                response.raise_for_status()
+
+            delay, needed, reason = hf_retry_delay(response, attempt)
+            record.update(reason=reason, wait_s=round(delay, 2))
+            if attempt == HF_MAX_ATTEMPTS or time.monotonic() + needed >= deadline:
+                raise ProviderError(
+                    f"Hugging Face {reason} after {attempt} attempt(s) "
+                    f"(status {record.get('status', record.get('error'))}, {needed:.0f}s more needed)",
+                    attempts
+                )
+            PROVIDER_RETRIES.inc(provider="huggingface", reason=reason)
+            logger.info("retrying Hugging Face", extra={"model": model_to_use, **record})
+            time.sleep(delay)
+
+    generation_time = time.time() - start_time
+    metadata = {
+        "model": model_to_use,
+        "provider": "Hugging Face",
+        "generation_time": f"{generation_time:.2f}s",
+        "dimensions": f"{width}x{height}",
+        "inference_steps": num_inference_steps,
+        "guidance_scale": guidance_scale,
+        "quality": quality,
+        "attempts": attempts
+    }
 
-        return response.content, metadata
+    return response.content, metadata
+
+
+def hf_retry_delay(response: Optional[httpx.Response], attempt: int) -> tuple[float, float, str]:
+    """
+    How long to wait before retrying a failed Hugging Face call: (delay, seconds until the
+    model should be ready, reason). A loading model is polled at most every HF_BACKOFF_MAX
+    seconds; Retry-After is honoured as sent; anything else backs off exponentially with jitter.
+    """
+    if response is None:
+        delay = backoff_delay(attempt, HF_BACKOFF_BASE, HF_BACKOFF_MAX)
+        return delay, delay, "unreachable"
+
+    retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+    if response.status_code == 503:
+        try:
+            estimated_time = float(response.json().get("estimated_time"))
+        except (ValueError, TypeError, AttributeError):
+            estimated_time = None
+        if estimated_time is not None:
+            needed = retry_after if retry_after is not None else estimated_time
+            return min(needed, HF_BACKOFF_MAX), needed, "loading"
+
+    reason = "rate_limited" if response.status_code == 429 else "unavailable"
+    if retry_after is not None:
+        return retry_after, retry_after, reason
+    delay = backoff_delay(attempt, HF_BACKOFF_BASE, HF_BACKOFF_MAX)
+    return delay, delay, reason
 
 
 # COMMENTED OUT - Qwen-Image functionality
@@ -539,13 +682,19 @@ def generate_with_huggingface(
 
 
 def generate_with_openai(prompt: str, width: int, height: int) -> tuple[bytes, dict]:
-    """Generate image using OpenAI DALL-E 3"""
+    """
+    Generate image using OpenAI DALL-E 3. The image comes back base64-encoded in the API
+    response (OPENAI_RESPONSE_FORMAT=b64_json), so no second request is needed to download it;
+    metadata["transfer"] records the decode time in place of the download, and `saved_ms`, the
+    mean of the last OPENAI_DOWNLOAD_WINDOW URL-mode downloads minus that decode time (None
+    until this process has downloaded an image in URL mode).
+    """
     import time
     start_time = time.time()
     
-    print(f"🔄 Falling back to OpenAI {OPENAI_MODEL}...")
+    logger.debug("calling OpenAI", extra={"model": OPENAI_MODEL, "response_format": OPENAI_RESPONSE_FORMAT})
 
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    client = openai_client()
 
     # DALL-E 3 has fixed sizes, map to closest
     if width == height:  # Square
@@ -561,24 +710,53 @@ def generate_with_openai(prompt: str, width: int, height: int) -> tuple[bytes, d
         size=size,
         quality="standard",
         n=1,
+        response_format=OPENAI_RESPONSE_FORMAT,
     )
+    api_seconds = time.time() - start_time
+    image = response.data[0]
+
+    transfer = {"response_format": OPENAI_RESPONSE_FORMAT, "api_ms": round(api_seconds * 1000, 2)}
+    if image.b64_json:
+        # Decode in memory: no extra round trip or TLS handshake to the image CDN
+        decode_started = time.perf_counter()
+        image_bytes = base64.b64decode(image.b64_json)
+        decode_ms = round((time.perf_counter() - decode_started) * 1000, 2)
+        downloads = list(_openai_download_ms)
+        saved_ms = round(statistics.fmean(downloads) - decode_ms, 2) if downloads else None
+        transfer.update(download_skipped=True, decode_ms=decode_ms, saved_ms=saved_ms)
+    else:
+        # OPENAI_RESPONSE_FORMAT=url (or a gateway that only returns URLs): download the image
+        download_started = time.perf_counter()
+        with span("image_download"), httpx.Client(timeout=call_timeout(5.0)) as http:
+            download = http.get(image.url)
+            download.raise_for_status()
+        image_bytes = download.content
+        download_ms = round((time.perf_counter() - download_started) * 1000, 2)
+        _openai_download_ms.append(download_ms)
+        transfer.update(download_skipped=False, download_ms=download_ms)
+    transfer["payload_bytes"] = len(image_bytes)
+
+    generation_time = time.time() - start_time
+    metadata = {
+        "model": OPENAI_MODEL,
+        "provider": "OpenAI",
+        "generation_time": f"{generation_time:.2f}s",
+        "dimensions": size,
+        "quality": "standard",
+        "transfer": transfer
+    }
+    
+    return image_bytes, metadata
 
-    # Download the image
-    image_url = response.data[0].url
-    with httpx.Client() as client:
-        response = client.get(image_url)
-        response.raise_for_status()
-        
-        generation_time = time.time() - start_time
-        metadata = {
-            "model": OPENAI_MODEL,
-            "provider": "OpenAI",
-            "generation_time": f"{generation_time:.2f}s",
-            "dimensions": size,
-            "quality": "standard"
-        }
-        
-        return response.content, metadata
+
+# Hosted providers; the offline "local" provider is built into providers.py
+register_provider(ImageProvider("huggingface", "Hugging Face", generate_with_huggingface))
+register_provider(ImageProvider(
+    "openai",
+    "OpenAI",
+    lambda prompt, width, height, **params: generate_with_openai(prompt, width, height),
+    is_available=lambda: bool(OPENAI_API_KEY)
+))
 
 
 def generate_single_image(
@@ -597,27 +775,24 @@ def generate_single_image(
     seed: Optional[int] = None
 ) -> str:
     """
-    Generate a single base image using Hugging Face or OpenAI fallback.
-    Returns the path to the base image.
+    Generate a single base image with the first provider in the IMAGE_PROVIDERS chain
+    that succeeds (default: Hugging Face, then OpenAI). Returns the path to the base image.
     """
     # Use provided campaign directory or create a new one
     if campaign_dir is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         campaign_dir = OUTPUT_DIR / f"campaign_{timestamp}_{campaign_id}"
-        print(f"⚠️ No campaign_dir provided, creating new one: {campaign_dir}")
-    else:
-        print(f"✅ Using provided campaign_dir: {campaign_dir}")
+        logger.warning("no campaign_dir provided, creating a new one", extra={"campaign_dir": str(campaign_dir)})
     
     product_dir = campaign_dir / product.replace(" ", "_").lower()
     product_dir.mkdir(parents=True, exist_ok=True)
-    print(f"📁 Created product directory: {product_dir}")
+    logger.debug("created product directory", extra={"path": str(product_dir)})
 
     # Localize the prompt for better cultural relevance
     localized_prompt = localize_prompt(prompt, country_name)
-    print(f"🌍 Localized prompt for {country_name}: {localized_prompt}")
+    logger.debug("localized prompt", extra={"prompt": localized_prompt})
 
     # Generate base image (use square format for best quality)
-    global _last_image_generation_metadata
     
     # COMMENTED OUT - Qwen-Image logic
     # if hf_model == "Qwen/Qwen-Image":
@@ -639,46 +814,84 @@ def generate_single_image(
     #             raise Exception(f"Both Qwen-Image and OpenAI failed for {product}. Qwen: {e}, OpenAI: {openai_error}")
     # else:
     
-    # Use Hugging Face models (Stable Diffusion)
-    try:
-        # Try Hugging Face first
-        image_bytes, metadata = generate_with_huggingface(
-            localized_prompt, 
-            width=1024, 
-            height=1024, 
-            model=hf_model, 
-            quality=image_quality,
-            noise_scheduler=noise_scheduler,
-            unet_backbone=unet_backbone,
-            vae=vae,
-            guidance_scale=guidance_scale,
-            num_inference_steps=num_inference_steps,
-            seed=seed
-        )
-        _last_image_generation_metadata = metadata
-        print(f"✅ Hugging Face generation successful for {product}")
+    # Try each provider in the IMAGE_PROVIDERS chain (default: Hugging Face, then OpenAI)
+    errors = []
+    tried = out_of_time = False
+    for attempt, provider in enumerate(provider_chain()):
+        if not provider.is_available():
+            errors.append(f"{provider.label}: not configured")
+            continue
+        if expired():
+            raise DeadlineExceeded(f"Deadline exceeded before an image for {product} was generated. " + "; ".join(errors))
+        if tried and not covers("fallback"):
+            cut("fallback", "skipped", provider.name)
+            errors.append(f"{provider.label}: skipped, not enough time left before the deadline")
+            out_of_time = True
+            continue
+        tried = True
+        try:
+            with span("provider_call" if attempt == 0 else "fallback"), provider_slot(provider.name):
+                image_bytes, metadata = provider.generate(
+                    localized_prompt,
+                    width=1024,
+                    height=1024,
+                    model=hf_model,
+                    quality=image_quality,
+                    noise_scheduler=noise_scheduler,
+                    unet_backbone=unet_backbone,
+                    vae=vae,
+                    guidance_scale=guidance_scale,
+                    num_inference_steps=num_inference_steps,
+                    seed=seed
+                )
+        except Exception as e:
+            logger.warning("image provider failed", extra={
+                "provider": provider.name, "error": str(e), "attempts": getattr(e, "attempts", None)
+            })
+            PROVIDER_CALLS.inc(provider=provider.name, outcome="error")
+            errors.append(f"{provider.label}: {e}")
+            continue
+        PROVIDER_CALLS.inc(provider=provider.name, outcome="success")
+        _last_image_generation_metadata.set(metadata)
+        logger.debug("image provider succeeded", extra={"provider": provider.name, "fallback": attempt > 0})
+        break
+    else:
+        if out_of_time or expired():
+            raise DeadlineExceeded(f"No image for {product} within the deadline. " + "; ".join(errors))
+        raise Exception(f"All image providers failed for {product}. " + "; ".join(errors))
 
-    except Exception as e:
-        print(f"⚠️ Hugging Face failed for {product}: {e}")
+    # Save the base image
+    base_image_path = product_dir / "base_image.png"
+    with span("artifact_write"), open(base_image_path, "wb") as f:
+        f.write(image_bytes)
 
-        if not OPENAI_API_KEY:
-            raise Exception("Hugging Face failed and no OpenAI API key provided")
+    logger.debug("saved base image", extra={"path": str(base_image_path)})
+    return str(base_image_path)
 
-        try:
-            # Fallback to OpenAI
-            image_bytes, metadata = generate_with_openai(localized_prompt, width=1024, height=1024)
-            _last_image_generation_metadata = metadata
-            print(f"✅ OpenAI fallback successful for {product}")
 
-        except Exception as openai_error:
-            raise Exception(f"Both Hugging Face and OpenAI failed for {product}. HF: {e}, OpenAI: {openai_error}")
+def reuse_single_image(source_image_path: str, product: str, campaign_dir: Path) -> str:
+    """
+    Copy a prior campaign's base image into this campaign's product directory.
+    Returns the path to the new base image.
+    """
+    import shutil
 
-    # Save the base image
+    product_dir = campaign_dir / product.replace(" ", "_").lower()
+    product_dir.mkdir(parents=True, exist_ok=True)
     base_image_path = product_dir / "base_image.png"
-    with open(base_image_path, "wb") as f:
-        f.write(image_bytes)
+    shutil.copyfile(source_image_path, base_image_path)
 
-    print(f"💾 Saved base image for {product} to {base_image_path}")
+    with Image.open(base_image_path) as img:
+        dimensions = f"{img.width}x{img.height}"
+    _last_image_generation_metadata.set({
+        "model": "N/A",
+        "provider": "Reused",
+        "generation_time": "0.00s",
+        "dimensions": dimensions,
+        "source_image": str(source_image_path)
+    })
+
+    logger.debug("reused base image", extra={"source_image": str(source_image_path)})
     return str(base_image_path)
 
 
@@ -692,42 +905,56 @@ def create_size_variants(base_image_path: str, campaign_id: str, product: str, c
     # Use provided campaign_dir to determine product_dir, or fall back to base_path.parent
     if campaign_dir is not None:
         product_dir = campaign_dir / product.replace(" ", "_").lower()
-        print(f"✅ Using campaign_dir for product_dir: {product_dir}")
     else:
         product_dir = base_path.parent
-        print(f"⚠️ No campaign_dir provided, using base_path.parent: {product_dir}")
+        logger.warning("no campaign_dir provided, using the base image directory", extra={"path": str(product_dir)})
 
     # Load the base image
-    with Image.open(base_image_path) as img:
+    with memory_span("size_variants"), Image.open(base_image_path) as img:
         # Convert to RGB if needed
         if img.mode != 'RGB':
             img = img.convert('RGB')
 
         outputs = {}
-        size_configs = {
-            "1:1": {"size": (1024, 1024), "dir": "1x1"},
-            "16:9": {"size": (1024, 576), "dir": "16x9"},
-            "9:16": {"size": (576, 1024), "dir": "9x16"}
-        }
+        variant_metadata = {}
+        for aspect_ratio, config in SIZE_CONFIGS.items():
+            bind(aspect_ratio=aspect_ratio)
+            # The first variant is always rendered; the others only if the deadline allows
+            if outputs and not covers("crop_resize", "encode", "overlay", "encode"):
+                cut("variant", "skipped", aspect_ratio)
+                continue
+            render_started = time.perf_counter()
 
-        for aspect_ratio, config in size_configs.items():
             # Create size subdirectory
             size_dir = product_dir / config["dir"]
             size_dir.mkdir(parents=True, exist_ok=True)
-            print(f"📁 Created size directory: {size_dir}")
+            logger.debug("created size directory", extra={"path": str(size_dir)})
 
             # Smart resize with cropping to maintain aspect ratio
-            resized_img = smart_resize_and_crop(img, config["size"])
+            with span("crop_resize"):
+                resized_img = smart_resize_and_crop(img, config["size"])
 
             # Include size in filename
             size_filename = f"image_{aspect_ratio.replace(':', 'x')}.png"
             image_path = size_dir / size_filename
-            resized_img.save(image_path, "PNG", quality=95)
+            with span("encode"):
+                resized_img.save(image_path, "PNG", quality=95)
 
             # Add brand overlay, localization, and translated message
             final_image_path = add_brand_overlay(str(image_path), product, country_name, message, audience)
             outputs[aspect_ratio] = final_image_path
-            print(f"📐 Created {aspect_ratio} variant for {product}: {final_image_path}")
+            variant_metadata[aspect_ratio] = {
+                "bytes": os.path.getsize(final_image_path),
+                "width": resized_img.width,
+                "height": resized_img.height,
+                "render_ms": round((time.perf_counter() - render_started) * 1000, 2)
+            }
+            logger.debug("created variant", extra={"path": final_image_path, **variant_metadata[aspect_ratio]})
+
+    bind(aspect_ratio=None)
+
+    # Store metadata for the caller in this campaign's context
+    _last_variant_metadata.set(variant_metadata)
 
     return outputs
 
@@ -776,9 +1003,11 @@ def generate_creatives(
     guidance_scale: float = 7.5,
     num_inference_steps: int = 30,
     seed: Optional[int] = None,
+    reuse_base_image: Optional[str] = None,
 ) -> dict:
     """
     Generate one image and create 3 size variants for a specific product.
+    If reuse_base_image is given, that prior base image is copied instead of calling a provider.
     Returns dict with aspect ratios as keys and file paths as values.
     """
     # Validate required parameters
@@ -789,24 +1018,28 @@ def generate_creatives(
     if campaign_dir is None:
         raise ValueError("campaign_dir is required for proper directory structure")
     
-    print(f"🎨 Generating creatives for product '{product}' in campaign_dir: {campaign_dir}")
+    logger.debug("generating creatives", extra={"campaign_dir": str(campaign_dir)})
     
-    # Generate the base image for this product (using fixed Stable Diffusion XL)
-    base_image_path = generate_single_image(
-        prompt, 
-        campaign_id, 
-        product, 
-        country_name, 
-        campaign_dir, 
-        "stabilityai/stable-diffusion-xl-base-1.0", 
-        "standard",
-        noise_scheduler=noise_scheduler,
-        unet_backbone=unet_backbone,
-        vae=vae,
-        guidance_scale=guidance_scale,
-        num_inference_steps=num_inference_steps,
-        seed=seed
-    )
+    if reuse_base_image:
+        # Reuse the base image of a near-duplicate prior campaign (no diffusion call)
+        base_image_path = reuse_single_image(reuse_base_image, product, campaign_dir)
+    else:
+        # Generate the base image for this product (using fixed Stable Diffusion XL)
+        base_image_path = generate_single_image(
+            prompt, 
+            campaign_id, 
+            product, 
+            country_name, 
+            campaign_dir, 
+            "stabilityai/stable-diffusion-xl-base-1.0", 
+            "standard",
+            noise_scheduler=noise_scheduler,
+            unet_backbone=unet_backbone,
+            vae=vae,
+            guidance_scale=guidance_scale,
+            num_inference_steps=num_inference_steps,
+            seed=seed
+        )
 
     # Create size variants for this product
     outputs = create_size_variants(base_image_path, campaign_id, product, country_name, message, campaign_dir, audience)
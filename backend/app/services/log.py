@@ -0,0 +1,143 @@
+"""
+Structured, leveled logging for the generation pipeline.
+
+Every record is one JSON object per line on stdout:
+    {"ts": "...", "level": "INFO", "logger": "app.routes", "msg": "campaign completed",
+     "campaign_id": "...", "product": "...", "total_ms": 812.4, ...}
+
+Context fields (campaign_id, product, aspect_ratio, ...) are bound with `bind()` or
+`log_context()` and carried by a context variable, so concurrent campaigns on different
+threads don't mix. Extra fields are passed with `extra={...}`.
+
+LOG_LEVEL (default INFO) selects the level; per-image detail is logged at DEBUG.
+DEBUG output is rate limited per message to LOG_DEBUG_RATE lines per second (default 20).
+The number of suppressed lines is reported on the next line that gets through.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Tuple
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_DEBUG_RATE = float(os.getenv("LOG_DEBUG_RATE", "20"))
+
+_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RECORD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+
+def bind(**fields: Any) -> Token:
+    """Add fields to the logging context (a value of None removes the field). Returns a reset token."""
+    context = dict(_context.get())
+    for key, value in fields.items():
+        if value is None:
+            context.pop(key, None)
+        else:
+            context[key] = value
+    return _context.set(context)
+
+
+def reset(token: Token) -> None:
+    """Restore the logging context from before the matching `bind()`"""
+    _context.reset(token)
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """Bind fields for the duration of the block"""
+    token = bind(**fields)
+    try:
+        yield
+    finally:
+        reset(token)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: timestamp, level, logger, message, bound context and extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "context", None) or {})
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key != "context":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """Attach the bound logging context to each record"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.context = _context.get()
+        return True
+
+
+class DebugRateLimitFilter(logging.Filter):
+    """Let at most `rate` DEBUG records per second through for each (logger, message template)"""
+
+    def __init__(self, rate: float = LOG_DEBUG_RATE):
+        super().__init__()
+        self.rate = rate
+        self._buckets: Dict[Tuple[str, Any], list] = {}  # key -> [tokens, last refill, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.DEBUG or self.rate <= 0:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.rate, now, 0]
+            bucket[0] = min(self.rate, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure_logging(level: str = LOG_LEVEL, stream: Any = None) -> None:
+    """Install the JSON handler on the `app` logger (idempotent unless called again explicitly with a stream)"""
+    global _configured
+    with _configure_lock:
+        if _configured and stream is None:
+            return
+        handler = logging.StreamHandler(stream or sys.stdout)
+        handler.setFormatter(JsonFormatter())
+        handler.addFilter(ContextFilter())
+        handler.addFilter(DebugRateLimitFilter())
+        root = logging.getLogger("app")
+        root.handlers = [handler]
+        root.setLevel(level)
+        root.propagate = False
+        _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the `app` hierarchy, configured on first use"""
+    configure_logging()
+    return logging.getLogger(name if name.startswith("app") else f"app.{name}")
@@ -1,45 +1,214 @@
-"""Campaign logging to DuckDB"""
+"""
+Campaign logging to DuckDB.
+
+One database connection is opened per process; every thread works through its own cursor
+(`get_connection`), since a single DuckDBPyConnection must not be shared across threads.
+Writes from request handlers are queued and committed by a background writer in batched
+transactions. When the bounded queue is full, the caller writes synchronously instead of
+blocking or dropping rows. `flush()` waits for queued rows; `close_db()` flushes before closing.
+"""
+import ast
+import os
+import queue
+import re
+import threading
+import time
 import duckdb
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 
+from .log import get_logger
+
 # Database file location (will be mounted via Docker volume)
 DB_PATH = Path("db/campaigns.duckdb")
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-# Connection pool (reuse connections)
+# Background writer tuning
+WRITE_QUEUE_SIZE = int(os.getenv("DB_WRITE_QUEUE_SIZE", "1000"))
+WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "100"))
+WRITE_FLUSH_INTERVAL = float(os.getenv("DB_WRITE_FLUSH_INTERVAL", "0.5"))
+# Minimum seconds between full-text index rebuilds after new campaigns are logged
+FTS_REBUILD_INTERVAL = float(os.getenv("FTS_REBUILD_INTERVAL", "60"))
+
+logger = get_logger(__name__)
+
+# Shared database connection; threads get their own cursor from it
 _conn: Optional[duckdb.DuckDBPyConnection] = None
+_conn_lock = threading.Lock()
+_conn_generation = 0
+_local = threading.local()
+
+# Background writer state
+_write_queue: "queue.Queue[Optional[Dict[str, List[list]]]]" = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+_FLUSH: Dict[str, List[list]] = {}  # marker: commit the current batch now
+
+# Full-text index state for keyword search (None = not probed yet). The index is rebuilt by the
+# writer thread; _fts_built_at is when it was last built on the current connection
+_fts_available: Optional[bool] = None
+_fts_dirty = True
+_fts_built_at: Optional[float] = None
+_fts_lock = threading.Lock()
 
 def get_connection() -> duckdb.DuckDBPyConnection:
-    """Get or create a connection to DuckDB"""
+    """Get this thread's cursor on the shared DuckDB connection (created on first use)"""
     global _conn
-    if _conn is None:
-        _conn = duckdb.connect(str(DB_PATH))
-    return _conn
+    cursor = getattr(_local, "cursor", None)
+    if cursor is not None and _local.generation == _conn_generation:
+        return cursor
+    with _conn_lock:
+        if _conn is None:
+            _conn = duckdb.connect(str(DB_PATH))
+        _local.cursor = _conn.cursor()
+        _local.generation = _conn_generation
+    return _local.cursor
+
+CAMPAIGNS_DDL = """
+    CREATE TABLE IF NOT EXISTS campaigns (
+        campaign_id VARCHAR PRIMARY KEY,
+        created_at TIMESTAMP,
+        country_name VARCHAR,
+        audience VARCHAR,
+        message TEXT,
+        compliance_status VARCHAR,
+        compliance_issues VARCHAR[],
+        total_products INTEGER,
+        total_images INTEGER
+    )
+"""
+
+CAMPAIGN_PRODUCTS_DDL = """
+    CREATE TABLE IF NOT EXISTS campaign_products (
+        campaign_id VARCHAR,
+        product VARCHAR,
+        position INTEGER,
+        PRIMARY KEY (campaign_id, product)
+    )
+"""
+
+CAMPAIGN_VARIANTS_DDL = """
+    CREATE TABLE IF NOT EXISTS campaign_variants (
+        campaign_id VARCHAR,
+        product VARCHAR,
+        aspect_ratio VARCHAR,
+        path VARCHAR,
+        bytes BIGINT,
+        width INTEGER,
+        height INTEGER,
+        render_ms DOUBLE,
+        PRIMARY KEY (campaign_id, product, aspect_ratio)
+    )
+"""
+
+CAMPAIGN_USAGE_DDL = """
+    CREATE TABLE IF NOT EXISTS campaign_usage (
+        campaign_id VARCHAR,
+        created_at TIMESTAMP,
+        llm_model VARCHAR,
+        prompt_tokens INTEGER,
+        completion_tokens INTEGER,
+        total_tokens INTEGER,
+        image_provider VARCHAR,
+        image_model VARCHAR,
+        image_generation_seconds DOUBLE,
+        cost_usd DOUBLE
+    )
+"""
+
+CAMPAIGN_TIMINGS_DDL = """
+    CREATE TABLE IF NOT EXISTS campaign_timings (
+        campaign_id VARCHAR,
+        created_at TIMESTAMP,
+        country_name VARCHAR,
+        provider VARCHAR,
+        cache_hit BOOLEAN,
+        stage VARCHAR,
+        ms DOUBLE,
+        calls INTEGER,
+        cost_usd DOUBLE,
+        rss_bytes BIGINT,
+        traced_peak_bytes BIGINT
+    )
+"""
+
+# Insert order within a batch (child rows after their campaign)
+WRITE_TABLES = ("campaigns", "campaign_products", "campaign_variants", "campaign_usage", "campaign_timings")
+
+# Dimensions accepted by latency_percentiles(group_by=...)
+LATENCY_GROUP_COLUMNS = {"stage": "stage", "provider": "provider", "country": "country_name"}
+
+# Columns of the original single-table schema (one row per campaign, first product's outputs only)
+LEGACY_OUTPUT_COLUMNS = {"1:1": "output_square", "16:9": "output_landscape", "9:16": "output_portrait"}
+
+def _parse_list(value: Any) -> List[str]:
+    """Parse a str(list) value written by the legacy schema back into a list of strings"""
+    if value is None or value == "":
+        return []
+    try:
+        parsed = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return [str(value)]
+    if isinstance(parsed, (list, tuple)):
+        return [str(item) for item in parsed]
+    return [str(parsed)]
+
+def _distinct_products(products: Iterable[str]) -> List[str]:
+    """Products in brief order with repeats dropped, as stored in campaign_products"""
+    return list(dict.fromkeys(products))
+
+def _migrate_legacy_campaigns(conn: duckdb.DuckDBPyConnection) -> None:
+    """Move rows from the legacy single `campaigns` table into the normalized tables"""
+    print("🔄 Migrating DuckDB schema: campaigns → campaigns, campaign_products, campaign_variants")
+    legacy_rows = conn.execute(f"""
+        SELECT campaign_id, created_at, products, country_name, audience, message,
+               {", ".join(LEGACY_OUTPUT_COLUMNS.values())}, compliance_status, compliance_issues
+        FROM campaigns
+    """).fetchall()
+
+    campaigns, products, variants = [], [], []
+    for row in legacy_rows:
+        campaign_id, created_at, products_value, country_name, audience, message = row[:6]
+        outputs = dict(zip(LEGACY_OUTPUT_COLUMNS, row[6:9]))
+        compliance_status, compliance_issues = row[9:]
+        product_list = _distinct_products(_parse_list(products_value))
+        outputs = {ratio: path for ratio, path in outputs.items() if path}
+        campaigns.append([
+            campaign_id, created_at, country_name, audience, message, compliance_status,
+            _parse_list(compliance_issues), len(product_list), None
+        ])
+        products.extend([campaign_id, product, position] for position, product in enumerate(product_list))
+        # The legacy table only kept the first product's outputs
+        if product_list:
+            variants.extend(
+                [campaign_id, product_list[0], ratio, path, None, None, None, None]
+                for ratio, path in outputs.items()
+            )
+
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        conn.execute("DROP TABLE campaigns")
+        conn.execute(CAMPAIGNS_DDL)
+        conn.execute(CAMPAIGN_PRODUCTS_DDL)
+        conn.execute(CAMPAIGN_VARIANTS_DDL)
+        if campaigns:
+            conn.executemany("INSERT INTO campaigns VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", campaigns)
+        if products:
+            conn.executemany("INSERT OR IGNORE INTO campaign_products VALUES (?, ?, ?)", products)
+        if variants:
+            conn.executemany("INSERT OR IGNORE INTO campaign_variants VALUES (?, ?, ?, ?, ?, ?, ?, ?)", variants)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    print(f"✅ Migration complete ({len(campaigns)} campaigns)")
 
 def init_db():
     """Initialize the DuckDB tables - called on app startup"""
     try:
         conn = get_connection()
         
-        # Create table with new schema (country_name instead of region)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS campaigns (
-                campaign_id VARCHAR PRIMARY KEY,
-                created_at TIMESTAMP,
-                products VARCHAR,
-                country_name VARCHAR,
-                audience VARCHAR,
-                message TEXT,
-                output_square VARCHAR,
-                output_landscape VARCHAR,
-                output_portrait VARCHAR,
-                compliance_status VARCHAR,
-                compliance_issues TEXT
-            )
-        """)
-        
         # Migrate existing data if region column exists (for backward compatibility)
         try:
             # Check if old 'region' column exists
@@ -50,9 +219,23 @@ def init_db():
                 print("🔄 Migrating DuckDB schema: region → country_name")
                 conn.execute("ALTER TABLE campaigns RENAME COLUMN region TO country_name")
                 print("✅ Migration complete")
+                columns = ['country_name' if col == 'region' else col for col in columns]
         except Exception as migrate_error:
-            # If migration fails, it's likely because the table is already correct
+            # If migration fails, it's likely because the table does not exist yet
             print(f"ℹ️ Schema migration skipped: {migrate_error}")
+            columns = []
+        
+        # Normalize the legacy single-table schema (products and outputs squashed into strings)
+        if 'output_square' in columns:
+            _migrate_legacy_campaigns(conn)
+        
+        conn.execute(CAMPAIGNS_DDL)
+        conn.execute(CAMPAIGN_PRODUCTS_DDL)
+        conn.execute(CAMPAIGN_VARIANTS_DDL)
+        conn.execute(CAMPAIGN_USAGE_DDL)
+        conn.execute(CAMPAIGN_TIMINGS_DDL)
+        conn.execute("ALTER TABLE campaign_timings ADD COLUMN IF NOT EXISTS rss_bytes BIGINT")
+        conn.execute("ALTER TABLE campaign_timings ADD COLUMN IF NOT EXISTS traced_peak_bytes BIGINT")
         
         print("✅ DuckDB initialized successfully")
     except Exception as e:
@@ -60,38 +243,403 @@ def init_db():
         raise
 
 def close_db():
-    """Close the DuckDB connection - called on app shutdown"""
-    global _conn
-    if _conn is not None:
+    """Flush queued writes and close the DuckDB connection - called on app shutdown"""
+    global _conn, _conn_generation, _writer, _fts_built_at, _fts_dirty
+    with _writer_lock:
+        if _writer is not None:
+            _write_queue.put(None)  # sentinel: writer drains what is queued, then exits
+            _writer.join()
+            _writer = None
+    with _conn_lock:
+        if _conn is not None:
+            try:
+                _conn.close()
+                _conn = None
+                _conn_generation += 1  # invalidate per-thread cursors
+                _fts_built_at, _fts_dirty = None, True
+                print("✅ DuckDB connection closed")
+            except Exception as e:
+                print(f"❌ Error closing DuckDB: {e}")
+
+def _write_rows(conn: duckdb.DuckDBPyConnection, items: List[Dict[str, List[list]]]) -> None:
+    """Insert the rows of several queued items in one transaction"""
+    global _fts_dirty
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        for table in WRITE_TABLES:
+            rows = [row for item in items for row in item.get(table, [])]
+            if rows:
+                placeholders = ", ".join("?" for _ in rows[0])
+                conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    if any(item.get("campaigns") for item in items):
+        _fts_dirty = True
+
+def _write_batch(items: List[Dict[str, List[list]]]) -> None:
+    """Commit a batch; if it fails, retry item by item so one bad row doesn't lose the rest"""
+    conn = get_connection()
+    try:
+        _write_rows(conn, items)
+        return
+    except Exception as e:
+        if len(items) == 1:
+            logger.error("DuckDB write failed", extra={"item": _describe(items[0]), "error": str(e)})
+            return
+        logger.warning("DuckDB batch write failed, retrying individually", extra={"items": len(items), "error": str(e)})
+    for item in items:
         try:
-            _conn.close()
-            _conn = None
-            print("✅ DuckDB connection closed")
+            _write_rows(conn, [item])
         except Exception as e:
-            print(f"❌ Error closing DuckDB: {e}")
+            logger.error("DuckDB write failed", extra={"item": _describe(item), "error": str(e)})
+
+def _describe(item: Dict[str, List[list]]) -> str:
+    table = next((t for t in WRITE_TABLES if item.get(t)), "empty")
+    return f"{table} rows for campaign {item[table][0][0]}" if table != "empty" else "empty item"
+
+def _writer_loop() -> None:
+    """Collect queued items into batches of up to WRITE_BATCH_SIZE or WRITE_FLUSH_INTERVAL seconds"""
+    stopping = False
+    while not stopping:
+        try:
+            received = [_write_queue.get(timeout=_fts_rebuild_due_in())]
+        except queue.Empty:
+            _refresh_fts_index()
+            continue
+        deadline = time.monotonic() + WRITE_FLUSH_INTERVAL
+        # Keep collecting until the batch is full, the interval elapses or a flush/stop marker arrives
+        while received[-1] is not None and received[-1] is not _FLUSH and len(received) < WRITE_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                received.append(_write_queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        stopping = received[-1] is None
+        batch = [item for item in received if item is not None and item is not _FLUSH]
+        if batch:
+            _write_batch(batch)
+        _refresh_fts_index()
+        for _ in received:
+            _write_queue.task_done()
+
+def _ensure_writer() -> None:
+    global _writer
+    if _writer is not None and _writer.is_alive():
+        return
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, name="duckdb-writer", daemon=True)
+            _writer.start()
+
+def _enqueue(item: Dict[str, List[list]]) -> None:
+    """Queue rows for the background writer; write synchronously if the queue is full"""
+    _ensure_writer()
+    try:
+        _write_queue.put_nowait(item)
+    except queue.Full:
+        logger.warning("DuckDB write queue full, writing synchronously", extra={"queue_size": _write_queue.maxsize})
+        _write_batch([item])
+
+def flush(timeout: Optional[float] = None) -> bool:
+    """Wait until every queued write has been committed. Returns False on timeout."""
+    if _writer is None:
+        return True
+    try:
+        _write_queue.put_nowait(_FLUSH)
+    except queue.Full:
+        pass  # a full queue reaches WRITE_BATCH_SIZE without waiting for the interval
+    if timeout is None:
+        _write_queue.join()
+        return True
+    deadline = time.monotonic() + timeout
+    while _write_queue.unfinished_tasks:
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def parse_seconds(value: Any) -> Optional[float]:
+    """Parse durations recorded as numbers or strings like '12.34s'"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.match(r"^\s*([0-9.]+)\s*s?\s*$", str(value or ""))
+    return float(match.group(1)) if match else None
+
+def log_campaign(
+    campaign_id: str,
+    brief: Any,
+    outputs: Dict[str, Dict[str, str]],
+    compliance: Dict,
+    variant_stats: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+) -> None:
+    """
+    Queue campaign data for DuckDB: one campaigns row, one row per product and one row per
+    generated variant, committed together in the same transaction. A product repeated in the
+    brief gets a single row, at its first position, and is counted once in total_products.
+    `outputs` maps product -> aspect ratio -> image path; `variant_stats` optionally maps
+    product -> aspect ratio -> {bytes, width, height, render_ms}.
+    """
+    variant_stats = variant_stats or {}
+    product_list = _distinct_products(brief.products)
+    products = [[campaign_id, product, position] for position, product in enumerate(product_list)]
+    variants = []
+    for product, product_outputs in outputs.items():
+        for aspect_ratio, path in product_outputs.items():
+            stats = variant_stats.get(product, {}).get(aspect_ratio, {})
+            variants.append([
+                campaign_id, product, aspect_ratio, path,
+                stats.get("bytes"), stats.get("width"), stats.get("height"), stats.get("render_ms")
+            ])
+    campaign = [
+        campaign_id,
+        datetime.now(),
+        brief.country_name,  # Updated from brief.region
+        brief.audience,
+        brief.message,
+        compliance.get("status", "unknown"),
+        [str(issue) for issue in compliance.get("issues", [])],
+        len(product_list),
+        len(variants)
+    ]
+
+    try:
+        _enqueue({"campaigns": [campaign], "campaign_products": products, "campaign_variants": variants})
+        logger.debug("queued campaign for DuckDB", extra={"products": len(products), "variants": len(variants)})
+    except Exception:
+        logger.error("failed to log campaign to DuckDB", exc_info=True)
+        # Don't raise - logging failure shouldn't break the API response
+
+def log_usage(
+    campaign_id: str,
+    llm_usage: Optional[Dict[str, Any]],
+    image_generation: Optional[Dict[str, Any]],
+    cost_usd: float,
+) -> None:
+    """Queue a usage record (LLM tokens, image provider and cost) for the campaign"""
+    llm_usage = llm_usage or {}
+    image_generation = image_generation or {}
+    usage = [
+        campaign_id,
+        datetime.now(),
+        llm_usage.get("model"),
+        llm_usage.get("prompt_tokens"),
+        llm_usage.get("completion_tokens"),
+        llm_usage.get("total_tokens"),
+        image_generation.get("provider"),
+        image_generation.get("model"),
+        parse_seconds(image_generation.get("generation_time")),
+        cost_usd
+    ]
+    try:
+        _enqueue({"campaign_usage": [usage]})
+    except Exception:
+        logger.error("failed to log campaign usage to DuckDB", exc_info=True)
+
+def _build_fts_index(conn: duckdb.DuckDBPyConnection) -> bool:
+    """(Re)build the full-text index over campaign messages. Returns False if the fts extension is unavailable."""
+    global _fts_available, _fts_dirty, _fts_built_at
+    try:
+        conn.execute("INSTALL fts")
+        conn.execute("LOAD fts")
+        # DuckDB FTS indexes are static snapshots, so campaigns logged later need a rebuild
+        conn.execute("PRAGMA create_fts_index('campaigns', 'campaign_id', 'message', overwrite=1)")
+        _fts_available = True
+        _fts_dirty = False
+        _fts_built_at = time.monotonic()
+    except Exception as e:
+        logger.info("DuckDB fts extension unavailable, using token match scoring", extra={"error": str(e)})
+        _fts_available = False
+    return _fts_available
+
+def _fts_rebuild_due_in() -> Optional[float]:
+    """Seconds until the writer should rebuild the stale full-text index (None if it isn't stale)"""
+    if not _fts_dirty or _fts_available is False:
+        return None
+    if _fts_built_at is None:
+        return 0.0
+    return max(0.0, _fts_built_at + FTS_REBUILD_INTERVAL - time.monotonic())
+
+def _refresh_fts_index() -> None:
+    """Rebuild the full-text index from the writer thread once it is stale and FTS_REBUILD_INTERVAL has passed"""
+    if _fts_rebuild_due_in() != 0.0:
+        return
+    with _fts_lock:
+        _build_fts_index(get_connection())
+
+def _ensure_fts_index(conn: duckdb.DuckDBPyConnection) -> bool:
+    """
+    Searches use the last index the writer built, so campaigns logged since then only match
+    after the next rebuild. Only a connection with no index built yet builds one here.
+    """
+    if _fts_available is False:
+        return False
+    if _fts_built_at is None:
+        with _fts_lock:
+            if _fts_built_at is None:
+                return _build_fts_index(conn)
+    return True
+
+def search_messages(
+    query: str,
+    top_k: int = 10,
+    country_name: Optional[str] = None,
+    audience: Optional[str] = None,
+    product: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> List[Tuple[str, float]]:
+    """
+    Keyword search over campaign messages.
+    Uses DuckDB BM25 full-text search when available, otherwise counts matched query tokens.
+    Returns (campaign_id, score) pairs, best first.
+    """
+    tokens = [t for t in re.findall(r"\w+", query.lower()) if len(t) > 1]
+    if not tokens:
+        return []
+
+    filters = []
+    params: List[Any] = []
+    if country_name:
+        filters.append("country_name = ?")
+        params.append(country_name)
+    if audience:
+        filters.append("audience = ?")
+        params.append(audience)
+    if product:
+        filters.append(
+            "EXISTS (SELECT 1 FROM campaign_products p"
+            " WHERE p.campaign_id = campaigns.campaign_id AND lower(p.product) = lower(?))"
+        )
+        params.append(product)
+    if date_from is not None:
+        filters.append("created_at >= ?")
+        params.append(date_from)
+    if date_to is not None:
+        filters.append("created_at <= ?")
+        params.append(date_to)
+    filter_sql = "".join(f" AND {f}" for f in filters)
 
-def log_campaign(campaign_id: str, brief: Any, outputs: Dict[str, str], compliance: Dict) -> None:
-    """Log campaign data to DuckDB"""
     try:
         conn = get_connection()
-        
-        conn.execute("""
-            INSERT INTO campaigns VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, [
-            campaign_id,
-            datetime.now(),
-            str(brief.products),
-            brief.country_name,  # Updated from brief.region
-            brief.audience,
-            brief.message,
-            outputs.get("1:1", ""),
-            outputs.get("16:9", ""),
-            outputs.get("9:16", ""),
-            compliance.get("status", "unknown"),
-            str(compliance.get("issues", []))
-        ])
-        
-        print(f"✅ Logged campaign {campaign_id} to DuckDB")
+        if _ensure_fts_index(conn):
+            rows = conn.execute(f"""
+                SELECT campaign_id, score FROM (
+                    SELECT *, fts_main_campaigns.match_bm25(campaign_id, ?) AS score FROM campaigns
+                ) AS campaigns WHERE score IS NOT NULL{filter_sql}
+                ORDER BY score DESC LIMIT ?
+            """, [" ".join(tokens), *params, top_k]).fetchall()
+        else:
+            score_sql = " + ".join("CAST(contains(lower(message), ?) AS INTEGER)" for _ in tokens)
+            rows = conn.execute(f"""
+                SELECT campaign_id, score FROM (
+                    SELECT *, ({score_sql}) AS score FROM campaigns
+                ) AS campaigns WHERE score > 0{filter_sql}
+                ORDER BY score DESC, created_at DESC LIMIT ?
+            """, [*tokens, *params, top_k]).fetchall()
+        return [(row[0], float(row[1])) for row in rows]
     except Exception as e:
-        print(f"❌ Failed to log campaign {campaign_id}: {e}")
-        # Don't raise - logging failure shouldn't break the API response
\ No newline at end of file
+        logger.error("keyword search failed", extra={"error": str(e)})
+        return []
+
+def log_timings(
+    campaign_id: str,
+    country_name: str,
+    provider: Optional[str],
+    cache_hit: bool,
+    cost_usd: float,
+    timings: Dict[str, Any],
+    memory: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Queue one campaign_timings row per stage from a metadata["timings"] breakdown,
+    plus a `total` row for the end-to-end latency. With a metadata["memory"] block, the
+    RSS and traced peaks are stored on the matching stage rows (end-of-stage RSS where no
+    high-water mark was measured) and the campaign peaks on the total row.
+    """
+    created_at = datetime.now()
+    memory = memory or {}
+    stage_memory = memory.get("stages", {})
+    rows = []
+    for stage, stage_timing in timings.get("stages", {}).items():
+        measurement = stage_memory.get(stage, {})
+        rows.append([
+            campaign_id, created_at, country_name, provider, cache_hit, stage, stage_timing["ms"], stage_timing["calls"], cost_usd,
+            measurement.get("peak_rss_bytes", measurement.get("rss_bytes")), measurement.get("traced_peak_bytes")
+        ])
+    rows.append([
+        campaign_id, created_at, country_name, provider, cache_hit, "total", timings.get("total_ms"), 1, cost_usd,
+        memory.get("peak_rss_bytes"), memory.get("peak_traced_bytes")
+    ])
+    try:
+        _enqueue({"campaign_timings": rows})
+    except Exception:
+        logger.error("failed to log campaign timings to DuckDB", exc_info=True)
+
+def latency_percentiles(
+    since: datetime,
+    until: Optional[datetime] = None,
+    group_by: Optional[List[str]] = None,
+    stage: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    p50/p95/p99 latency (ms) from campaign_timings between `since` and `until`,
+    grouped by any of stage, provider and country (default: stage), with p95 and max RSS
+    and the max traced peak where memory tracing was on.
+    """
+    group_by = group_by or ["stage"]
+    unknown = [dimension for dimension in group_by if dimension not in LATENCY_GROUP_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown group_by dimension(s): {', '.join(unknown)}")
+    columns = [LATENCY_GROUP_COLUMNS[dimension] for dimension in dict.fromkeys(group_by)]
+
+    filters = ["created_at >= ?"]
+    params: List[Any] = [since]
+    if until is not None:
+        filters.append("created_at <= ?")
+        params.append(until)
+    if stage:
+        filters.append("stage = ?")
+        params.append(stage)
+
+    select_columns = ", ".join(columns)
+    rows = get_connection().execute(f"""
+        SELECT {select_columns},
+               count(*) AS samples,
+               quantile_cont(ms, 0.5) AS p50_ms,
+               quantile_cont(ms, 0.95) AS p95_ms,
+               quantile_cont(ms, 0.99) AS p99_ms,
+               avg(ms) AS mean_ms,
+               avg(CAST(cache_hit AS INTEGER)) AS cache_hit_rate,
+               sum(cost_usd) FILTER (WHERE stage = 'total') AS cost_usd,
+               quantile_disc(rss_bytes, 0.95) AS p95_rss_bytes,
+               max(rss_bytes) AS max_rss_bytes,
+               max(traced_peak_bytes) AS max_traced_peak_bytes
+        FROM campaign_timings
+        WHERE {" AND ".join(filters)}
+        GROUP BY {select_columns}
+        ORDER BY {select_columns}
+    """, params).fetchall()
+
+    names = [dimension for dimension in dict.fromkeys(group_by)]
+    results = []
+    for row in rows:
+        result = dict(zip(names, row[:len(names)]))
+        samples, p50, p95, p99, mean, cache_hit_rate, cost, p95_rss, max_rss, max_traced = row[len(names):]
+        result.update({
+            "samples": samples,
+            "p50_ms": round(p50, 2) if p50 is not None else None,
+            "p95_ms": round(p95, 2) if p95 is not None else None,
+            "p99_ms": round(p99, 2) if p99 is not None else None,
+            "mean_ms": round(mean, 2) if mean is not None else None,
+            "cache_hit_rate": cache_hit_rate,
+            "cost_usd": cost,
+            "p95_rss_bytes": p95_rss,
+            "max_rss_bytes": max_rss,
+            "max_traced_peak_bytes": max_traced,
+        })
+        results.append(result)
+    return results
@@ -0,0 +1,208 @@
+"""
+Incrementally maintained master manifest.
+
+The manifest is stored as two files in assets/generated:
+    master_manifest.json    compacted snapshot (same format generate_master_manifest.py has always written)
+    master_manifest.jsonl   append-only log of campaigns committed since the snapshot
+
+`record_campaign` appends one line per finished campaign, so the manifest is never stale.
+Every MANIFEST_COMPACT_EVERY entries the log is folded into a new snapshot. All snapshot
+writes go to a temporary file that is fsynced and renamed over the old one, so readers
+always see either the previous or the new manifest, never a torn file.
+`generate_master_manifest.py` remains as a recovery tool that rebuilds the snapshot from disk.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .log import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+GENERATED_DIR = Path("assets/generated")
+MANIFEST_PATH = GENERATED_DIR / "master_manifest.json"
+LOG_PATH = GENERATED_DIR / "master_manifest.jsonl"
+LOCK_PATH = GENERATED_DIR / ".master_manifest.lock"
+
+MANIFEST_COMPACT_EVERY = int(os.getenv("MANIFEST_COMPACT_EVERY", "50"))
+GENERATOR_VERSION = "1.1.0"
+
+logger = get_logger(__name__)
+
+_lock = threading.Lock()
+
+
+@contextmanager
+def _manifest_lock():
+    """Serialize writers across threads and (where fcntl exists) across processes"""
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(LOCK_PATH, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def atomic_write_json(path: Path, data: Any, indent: Optional[int] = 2) -> None:
+    """Write JSON to a temp file in the same directory, fsync, then rename over `path`"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def manifest_entry(artifact: Dict[str, Any], artifact_path: Path, stat: Optional[os.stat_result] = None) -> Dict[str, Any]:
+    """Wrap a response artifact with the `_manifest_metadata` block used in the manifest"""
+    entry = dict(artifact)
+    if stat is None and artifact_path.exists():
+        stat = artifact_path.stat()
+    entry['_manifest_metadata'] = {
+        'file_path': str(artifact_path),
+        'file_size': stat.st_size if stat else None,
+        'last_modified': datetime.fromtimestamp(stat.st_mtime).isoformat() if stat else datetime.now().isoformat(),
+        'mtime_ns': stat.st_mtime_ns if stat else None,
+        'campaign_directory': str(artifact_path.parent)
+    }
+    return entry
+
+
+def build_manifest_info(campaigns: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate statistics for the `manifest_info` block"""
+    total_campaigns = 0
+    total_images = 0
+    total_products = 0
+    regions = set()
+    audiences = set()
+
+    for campaign_data in campaigns:
+        total_campaigns += 1
+        if 'error' in campaign_data:
+            continue
+        if 'response' in campaign_data and 'outputs' in campaign_data['response']:
+            for product, sizes in campaign_data['response']['outputs'].items():
+                total_products += 1
+                total_images += len(sizes)
+        request = campaign_data.get('request', {})
+        region = request.get('country_name') or request.get('region')
+        if region:
+            regions.add(region)
+        if request.get('audience'):
+            audiences.add(request['audience'])
+
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'total_campaigns': total_campaigns,
+        'total_images': total_images,
+        'total_products': total_products,
+        'unique_regions': sorted(regions),
+        'unique_audiences': sorted(audiences),
+        'generator_version': GENERATOR_VERSION,
+        'description': 'Master manifest concatenating all campaign response artifacts'
+    }
+
+
+def read_log(offset: int = 0) -> tuple[List[Dict[str, Any]], int]:
+    """Read log entries starting at byte `offset`. Returns (entries, new offset)."""
+    if not LOG_PATH.exists():
+        return [], 0
+    entries = []
+    with open(LOG_PATH, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # partially written line; picked up on the next read
+            offset += len(line)
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return entries, offset
+
+
+def read_snapshot() -> Dict[str, Any]:
+    if not MANIFEST_PATH.exists():
+        return {'manifest_info': build_manifest_info([]), 'campaigns': []}
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def merge_campaigns(snapshot_campaigns: List[Dict[str, Any]], log_entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Most recent first: log entries (newest last in the log) ahead of the snapshot entries they supersede"""
+    logged = {entry.get('campaign_id') for entry in log_entries}
+    return list(reversed(log_entries)) + [
+        campaign for campaign in snapshot_campaigns if campaign.get('campaign_id') not in logged
+    ]
+
+
+def load_manifest() -> Dict[str, Any]:
+    """Current manifest: snapshot plus every committed campaign still in the log"""
+    snapshot = read_snapshot()
+    log_entries, _ = read_log()
+    if not log_entries:
+        return snapshot
+    campaigns = merge_campaigns(snapshot.get('campaigns', []), log_entries)
+    return {'manifest_info': build_manifest_info(campaigns), 'campaigns': campaigns}
+
+
+def write_snapshot(manifest: Dict[str, Any]) -> None:
+    """
+    Atomically replace the snapshot (used by full rebuilds). Log entries for campaigns the
+    new snapshot already contains are dropped; any committed after the rebuild scanned are kept.
+    """
+    with _manifest_lock():
+        atomic_write_json(MANIFEST_PATH, manifest)
+        log_entries, _ = read_log()
+        known = {c.get('campaign_id') for c in manifest.get('campaigns', [])}
+        pending = [entry for entry in log_entries if entry.get('campaign_id') not in known]
+        if pending:
+            tmp_path = LOG_PATH.with_name(f".{LOG_PATH.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in pending:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, LOG_PATH)
+        elif LOG_PATH.exists():
+            LOG_PATH.unlink()
+
+
+def compact() -> None:
+    """Fold the log into a new snapshot"""
+    with _manifest_lock():
+        manifest = load_manifest()
+        atomic_write_json(MANIFEST_PATH, manifest)
+        if LOG_PATH.exists():
+            LOG_PATH.unlink()
+    logger.info("compacted master manifest", extra={"campaigns": manifest["manifest_info"]["total_campaigns"]})
+
+
+def record_campaign(artifact: Dict[str, Any], artifact_path: Path) -> None:
+    """Append a committed campaign to the manifest log, compacting when the log gets long"""
+    entry = manifest_entry(artifact, artifact_path)
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+    with _manifest_lock():
+        LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(LOG_PATH, "rb") as f:
+            pending = sum(1 for _ in f)
+    logger.debug("recorded campaign in master manifest log")
+
+    if pending >= MANIFEST_COMPACT_EVERY:
+        compact()
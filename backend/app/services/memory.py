@@ -0,0 +1,234 @@
+"""
+Memory instrumentation for the image pipeline.
+
+`memory_span(stage)` wraps the image stages (size_variants, overlay). The span sits inside the
+function, so at its end the image locals (base, RGB copy, crop, resize, RGBA copy) are still
+alive and the measurement reflects the stage's high-water mark.
+
+Two measurements:
+- Resident set size, always on: the stage's RSS high-water mark (VmHWM from /proc/self/status,
+  reset through /proc/self/clear_refs when the outermost span starts), so transient buffers
+  freed before the stage ends are still counted, plus RSS at the end of the stage and its growth
+  over the stage (/proc/self/statm). Where the high-water mark can't be reset (non-Linux,
+  restricted /proc) only the end-of-stage numbers are reported. Pillow allocates pixel buffers
+  in C, outside tracemalloc's view, so RSS is the number to size pods and concurrency limits from.
+- tracemalloc, off by default since it slows allocation-heavy code; enable it with
+  MEMORY_TRACING=1 or POST /admin/memory/start. It adds the Python-heap peak of each stage and
+  start/end snapshots whose diff is served on GET /admin/memory/top as top allocators.
+
+Each campaign's peaks go to metadata["memory"] and the campaign_timings table. Both numbers are
+process-wide: with campaigns overlapping they include the other campaigns' allocations, an
+upper bound for the campaign in question.
+"""
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+MEMORY_TRACING = os.getenv("MEMORY_TRACING", "").lower() in ("1", "true", "yes")
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "1"))
+
+# Allocations from the tracer itself and the import machinery are noise in the top list
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_lock = threading.Lock()
+_active_spans = 0
+# Spans measuring RSS, and whether VmHWM was reset when the outermost of them started
+_rss_spans = 0
+_peak_rss_reset = False
+# stage -> (start snapshot, end snapshot, captured at)
+_last_snapshots: Dict[str, Tuple[tracemalloc.Snapshot, tracemalloc.Snapshot, float]] = {}
+# stage -> highest traced peak seen since tracing started
+_stage_peaks: Dict[str, int] = {}
+
+# Per-campaign measurements: stage -> {"peak_rss_bytes", "rss_bytes", "rss_growth_bytes", "traced_peak_bytes"}
+_campaign_memory: ContextVar[Optional[Dict[str, Dict[str, int]]]] = ContextVar("campaign_memory", default=None)
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size (Linux), or None where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """RSS high-water mark since the process started or since reset_peak_rss() (Linux)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def reset_peak_rss() -> bool:
+    """Reset the RSS high-water mark to the current RSS; False where that isn't supported"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def is_tracing() -> bool:
+    return tracemalloc.is_tracing()
+
+
+def start_tracing(nframes: int = MEMORY_TRACE_FRAMES) -> None:
+    """Start tracemalloc (no-op if already tracing)"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(nframes)
+
+
+def stop_tracing() -> None:
+    """Stop tracemalloc and drop collected snapshots"""
+    tracemalloc.stop()
+    with _lock:
+        _last_snapshots.clear()
+        _stage_peaks.clear()
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+def _record(stage: str, measurement: Dict[str, int]) -> None:
+    campaign = _campaign_memory.get()
+    if campaign is None:
+        return
+    entry = campaign.setdefault(stage, {})
+    for key, value in measurement.items():
+        entry[key] = max(entry.get(key, 0), value)
+
+
+@contextmanager
+def memory_span(stage: str) -> Iterator[None]:
+    """Measure RSS (and, while tracing, the traced peak and top allocations) of the enclosed block"""
+    global _active_spans, _rss_spans, _peak_rss_reset
+    with _lock:
+        # The high-water mark is process-wide: only reset it when no other span is measuring against it
+        if _rss_spans == 0:
+            _peak_rss_reset = reset_peak_rss()
+        _rss_spans += 1
+        measure_peak = _peak_rss_reset
+    rss_start = rss_bytes()
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        with _lock:
+            # Only reset the process-wide peak when no other span is measuring against it
+            if _active_spans == 0:
+                tracemalloc.reset_peak()
+            _active_spans += 1
+        before = _snapshot()
+        baseline, _ = tracemalloc.get_traced_memory()
+    try:
+        yield
+    finally:
+        measurement: Dict[str, int] = {}
+        rss_peak = peak_rss_bytes() if measure_peak else None
+        with _lock:
+            _rss_spans -= 1
+        if rss_peak is not None:
+            measurement["peak_rss_bytes"] = rss_peak
+        rss_end = rss_bytes()
+        if rss_end is not None and rss_start is not None:
+            measurement["rss_bytes"] = rss_end
+            measurement["rss_growth_bytes"] = max(0, rss_end - rss_start)
+        if tracing:
+            if tracemalloc.is_tracing():
+                after = _snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                measurement["traced_peak_bytes"] = max(0, peak - baseline)
+                with _lock:
+                    _last_snapshots[stage] = (before, after, time.time())
+                    _stage_peaks[stage] = max(_stage_peaks.get(stage, 0), measurement["traced_peak_bytes"])
+            with _lock:
+                _active_spans -= 1
+        _record(stage, measurement)
+
+
+def start_campaign_memory() -> Token:
+    """Begin collecting memory measurements for the campaign running in this context"""
+    return _campaign_memory.set({})
+
+
+def end_campaign_memory(token: Token) -> None:
+    _campaign_memory.reset(token)
+
+
+def campaign_memory() -> Optional[Dict[str, Any]]:
+    """
+    Memory for the current campaign over its stages: RSS high-water mark (where measurable),
+    largest end-of-stage RSS and traced peak, plus the per-stage measurements, or None if no
+    instrumented stage ran.
+    """
+    stages = _campaign_memory.get()
+    if not stages:
+        return None
+    summary: Dict[str, Any] = {}
+    for key, name in (("peak_rss_bytes", "peak_rss_bytes"), ("rss_bytes", "max_stage_end_rss_bytes"),
+                      ("traced_peak_bytes", "peak_traced_bytes")):
+        values = [measurement[key] for measurement in stages.values() if key in measurement]
+        if values:
+            summary[name] = max(values)
+    summary["stages"] = stages
+    return summary
+
+
+def _format_stats(stats: List[Any], limit: int) -> List[Dict[str, Any]]:
+    top = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        top.append({
+            "location": f"{frame.filename}:{frame.lineno}",
+            "size_bytes": stat.size,
+            "count": stat.count,
+            **({"size_diff_bytes": stat.size_diff, "count_diff": stat.count_diff} if hasattr(stat, "size_diff") else {}),
+        })
+    return top
+
+
+def top_allocators(stage: Optional[str] = None, limit: int = 10, key_type: str = "lineno") -> Dict[str, Any]:
+    """
+    Top allocators per instrumented stage (growth from the stage's start to its end snapshot),
+    plus the current top allocators process-wide.
+    """
+    info: Dict[str, Any] = {"tracing": tracemalloc.is_tracing(), "rss_bytes": rss_bytes(), "stages": {}}
+    if not info["tracing"]:
+        return info
+
+    with _lock:
+        snapshots = dict(_last_snapshots)
+        peaks = dict(_stage_peaks)
+    if stage is not None:
+        snapshots = {name: value for name, value in snapshots.items() if name == stage}
+
+    info["traced_current_bytes"], info["traced_peak_bytes"] = tracemalloc.get_traced_memory()
+    for name, (before, after, captured_at) in sorted(snapshots.items()):
+        info["stages"][name] = {
+            "traced_peak_bytes": peaks.get(name, 0),
+            "captured_at": captured_at,
+            "top": _format_stats(after.compare_to(before, key_type), limit),
+        }
+    info["top"] = _format_stats(_snapshot().statistics(key_type), limit) if stage is None else []
+    return info
+
+
+if MEMORY_TRACING:
+    start_tracing()
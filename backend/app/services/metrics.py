@@ -0,0 +1,221 @@
+"""
+Pipeline latency metrics.
+
+Pure-Python counters and histograms rendered in the Prometheus text exposition format
+(served on /metrics), plus `span(stage)`, a context manager that times one pipeline stage.
+Every span is observed in the `campaign_stage_duration_seconds` histogram and, while a
+campaign is being generated, added to that campaign's timing breakdown. The breakdown lives
+in a context variable, so concurrent campaigns on different threads don't mix.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds: sub-millisecond Pillow ops up to multi-minute diffusion calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        register(self)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels.get(name, "")) for name in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that goes up and down (in-flight requests, queue depth) with optional labels"""
+
+    def set(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # labels -> [per-bucket counts (non-cumulative), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+        register(self)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels: str) -> int:
+        state = self._values.get(tuple(str(labels.get(name, "")) for name in self.labelnames))
+        return state[2] if state else 0
+
+    def mean(self, **labels: str) -> Optional[float]:
+        state = self._values.get(tuple(str(labels.get(name, "")) for name in self.labelnames))
+        return state[1] / state[2] if state and state[2] else None
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+_registry: List[object] = []
+
+
+def register(metric: object) -> None:
+    _registry.append(metric)
+
+
+def render_prometheus() -> str:
+    """All registered metrics in the Prometheus text exposition format (version 0.0.4)"""
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "campaign_stage_duration_seconds", "Time spent in each pipeline stage", labelnames=("stage",)
+)
+STAGE_ERRORS = Counter(
+    "campaign_stage_errors_total", "Pipeline stages that raised an exception", labelnames=("stage",)
+)
+CAMPAIGN_SECONDS = Histogram("campaign_duration_seconds", "End-to-end campaign generation time")
+CAMPAIGNS = Counter("campaigns_total", "Campaign generation requests by outcome", labelnames=("status",))
+PROVIDER_CALLS = Counter(
+    "image_provider_calls_total", "Image provider calls by provider and outcome", labelnames=("provider", "outcome")
+)
+STAGE_CUTS = Counter(
+    "campaign_stage_cuts_total", "Stages skipped or degraded to meet a campaign deadline", labelnames=("stage", "action")
+)
+PROVIDER_RETRIES = Counter(
+    "image_provider_retries_total", "Image provider calls retried, by provider and reason", labelnames=("provider", "reason")
+)
+
+ADMISSION_IN_FLIGHT = Gauge("admission_in_flight", "Campaigns admitted and running")
+ADMISSION_QUEUE_DEPTH = Gauge("admission_queue_depth", "Campaigns waiting for admission")
+ADMISSION_WAIT_SECONDS = Histogram("admission_wait_seconds", "Time campaigns waited in the admission queue")
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total", "Campaigns turned away by admission control, by HTTP status", labelnames=("status",)
+)
+PROVIDER_IN_FLIGHT = Gauge("provider_in_flight", "In-flight calls per rate-limited provider", labelnames=("provider",))
+PROVIDER_SLOT_WAIT_SECONDS = Histogram(
+    "provider_slot_wait_seconds", "Time calls waited for a provider concurrency slot", labelnames=("provider",)
+)
+
+# Per-campaign stage breakdown: stage -> [total seconds, calls]
+_campaign_timings: ContextVar[Optional[Dict[str, list]]] = ContextVar("campaign_timings", default=None)
+
+
+def start_campaign_timings() -> Token:
+    """Begin collecting a timing breakdown for the campaign running in this context"""
+    return _campaign_timings.set({})
+
+
+def end_campaign_timings(token: Token) -> None:
+    _campaign_timings.reset(token)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Record a stage duration measured by the caller (for code that can't be wrapped in `span`)"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _campaign_timings.get()
+    if timings is not None:
+        entry = timings.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time the enclosed block as one occurrence of `stage`; failures are also counted"""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def campaign_timings() -> Dict[str, Dict[str, float]]:
+    """Breakdown for the current campaign: stage -> {ms, calls}, slowest stage first"""
+    timings = _campaign_timings.get() or {}
+    return {
+        stage: {"ms": round(seconds * 1000, 2), "calls": calls}
+        for stage, (seconds, calls) in sorted(timings.items(), key=lambda item: item[1][0], reverse=True)
+    }
@@ -0,0 +1,325 @@
+"""
+Columnar export of campaign history to date-partitioned Parquet via DuckDB.
+
+Four tables are written under db/parquet, each partitioned by campaign date:
+    campaigns/date=YYYY-MM-DD/part_<uuid>.parquet           one row per campaign
+    campaign_products/date=.../part_<uuid>.parquet           one row per (campaign, product)
+    campaign_variants/date=.../part_<uuid>.parquet           one row per generated image
+    campaign_usage/date=.../part_<uuid>.parquet              token usage, image provider and cost
+
+Exports are incremental: campaigns already exported (tracked in _export_state.json) are
+skipped and new ones are appended as new part files, so existing files are never rewritten.
+Each run writes its part files (named run_<run id>_part_<uuid>.parquet) to a staging
+directory, moves them into place and only then records the run in the state file. Whatever an
+interrupted run left behind (staged files, or moved files of a run the state doesn't list) is
+removed by the next export, which then exports those campaigns again, so no rows are doubled.
+`connect_exports()` returns a DuckDB connection with a view per table over the Parquet files,
+so analytical queries run on the columnar files instead of the JSON artifact tree.
+"""
+import json
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import duckdb
+
+from .log import get_logger
+from .logging_db import parse_seconds
+from .manifest_store import atomic_write_json, load_manifest
+
+EXPORT_DIR = Path("db/parquet")
+STATE_FILE = "_export_state.json"
+STAGING_DIR = "_staging"
+
+logger = get_logger(__name__)
+
+# Column definitions per table; `date` is the partition column and is stored in the directory name
+TABLES: Dict[str, List[Tuple[str, str]]] = {
+    "campaigns": [
+        ("campaign_id", "VARCHAR"),
+        ("created_at", "TIMESTAMP"),
+        ("country_name", "VARCHAR"),
+        ("audience", "VARCHAR"),
+        ("message", "VARCHAR"),
+        ("total_products", "INTEGER"),
+        ("total_images", "INTEGER"),
+        ("compliance_status", "VARCHAR"),
+        ("compliance_issues", "VARCHAR[]"),
+        ("reused_from", "VARCHAR"),
+        ("date", "VARCHAR"),
+    ],
+    "campaign_products": [
+        ("campaign_id", "VARCHAR"),
+        ("created_at", "TIMESTAMP"),
+        ("product", "VARCHAR"),
+        ("variant_count", "INTEGER"),
+        ("date", "VARCHAR"),
+    ],
+    "campaign_variants": [
+        ("campaign_id", "VARCHAR"),
+        ("created_at", "TIMESTAMP"),
+        ("product", "VARCHAR"),
+        ("aspect_ratio", "VARCHAR"),
+        ("path", "VARCHAR"),
+        ("bytes", "BIGINT"),
+        ("date", "VARCHAR"),
+    ],
+    "campaign_usage": [
+        ("campaign_id", "VARCHAR"),
+        ("created_at", "TIMESTAMP"),
+        ("llm_model", "VARCHAR"),
+        ("prompt_tokens", "INTEGER"),
+        ("completion_tokens", "INTEGER"),
+        ("total_tokens", "INTEGER"),
+        ("image_provider", "VARCHAR"),
+        ("image_model", "VARCHAR"),
+        ("image_generation_seconds", "DOUBLE"),
+        ("cost_usd", "DOUBLE"),
+        ("date", "VARCHAR"),
+    ],
+}
+
+_lock = threading.Lock()
+
+
+def _created_at(campaign: Dict[str, Any]) -> Optional[datetime]:
+    """Campaign creation time from its YYYYmmdd_HHMMSS timestamp, falling back to generated_at"""
+    timestamp = campaign.get("timestamp")
+    if timestamp:
+        try:
+            return datetime.strptime(timestamp, "%Y%m%d_%H%M%S")
+        except ValueError:
+            pass
+    generated_at = (campaign.get("metadata") or {}).get("generated_at")
+    if generated_at:
+        try:
+            return datetime.fromisoformat(generated_at)
+        except ValueError:
+            pass
+    return None
+
+
+def export_key(campaign: Dict[str, Any]) -> str:
+    """Identity of an exported campaign (ids are not unique across retried campaign directories)"""
+    return f"{campaign.get('campaign_id')}@{campaign.get('timestamp') or ''}"
+
+
+def campaign_rows(campaign: Dict[str, Any]) -> Dict[str, List[tuple]]:
+    """Flatten one manifest entry into rows for each export table"""
+    rows: Dict[str, List[tuple]] = {name: [] for name in TABLES}
+    created_at = _created_at(campaign)
+    if not campaign.get("campaign_id") or created_at is None:
+        return rows
+
+    campaign_id = campaign["campaign_id"]
+    date = created_at.strftime("%Y-%m-%d")
+    request = campaign.get("request") or {}
+    response = campaign.get("response") or {}
+    metadata = campaign.get("metadata") or {}
+    compliance = response.get("compliance") or {}
+    outputs = response.get("outputs") or {}
+    reused_from = metadata.get("reused_from") or {}
+
+    rows["campaigns"].append((
+        campaign_id,
+        created_at,
+        request.get("country_name") or request.get("region"),
+        request.get("audience"),
+        request.get("message"),
+        len(request.get("products") or outputs),
+        sum(len(sizes) for sizes in outputs.values()),
+        compliance.get("status"),
+        [str(issue) for issue in compliance.get("issues") or []],
+        reused_from.get("campaign_id"),
+        date,
+    ))
+
+    for product, sizes in outputs.items():
+        rows["campaign_products"].append((campaign_id, created_at, product, len(sizes), date))
+        for aspect_ratio, path in sizes.items():
+            try:
+                size = Path(path).stat().st_size
+            except OSError:
+                size = None
+            rows["campaign_variants"].append((campaign_id, created_at, product, aspect_ratio, path, size, date))
+
+    usage = metadata.get("usage")
+    if usage:
+        llm_usage = usage.get("llm_usage") or {}
+        image_generation = usage.get("image_generation") or {}
+        rows["campaign_usage"].append((
+            campaign_id,
+            created_at,
+            llm_usage.get("model"),
+            llm_usage.get("prompt_tokens"),
+            llm_usage.get("completion_tokens"),
+            llm_usage.get("total_tokens"),
+            image_generation.get("provider"),
+            image_generation.get("model"),
+            parse_seconds(image_generation.get("generation_time")),
+            usage.get("cost_usd"),
+            date,
+        ))
+    return rows
+
+
+def _load_state(export_dir: Path) -> Dict[str, Any]:
+    state_path = export_dir / STATE_FILE
+    if not state_path.exists():
+        return {"exported": [], "runs": []}
+    with open(state_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _discard_uncommitted(export_dir: Path, state: Dict[str, Any]) -> None:
+    """Remove the leftovers of an interrupted export: staged files, and part files of runs the state doesn't record"""
+    shutil.rmtree(export_dir / STAGING_DIR, ignore_errors=True)
+    committed = set(state.get("runs", []))
+    for name in TABLES:
+        for path in (export_dir / name).glob("date=*/run_*.parquet"):
+            if path.name.split("_")[1] not in committed:
+                path.unlink()
+
+
+def _write_table(conn: duckdb.DuckDBPyConnection, name: str, rows: List[tuple], staging_dir: Path, run_id: str) -> int:
+    """Write rows for table `name` as date-partitioned part files under `staging_dir`"""
+    if not rows:
+        return 0
+    columns = TABLES[name]
+    conn.execute(f"CREATE OR REPLACE TABLE {name} ({', '.join(f'{col} {kind}' for col, kind in columns)})")
+    conn.executemany(f"INSERT INTO {name} VALUES ({', '.join('?' for _ in columns)})", rows)
+    table_dir = staging_dir / name
+    table_dir.mkdir(parents=True, exist_ok=True)
+    conn.execute(
+        f"COPY {name} TO '{table_dir.as_posix()}' "
+        f"(FORMAT PARQUET, PARTITION_BY (date), APPEND, FILENAME_PATTERN 'run_{run_id}_part_{{uuid}}')"
+    )
+    return len(rows)
+
+
+def _publish(staging_dir: Path, export_dir: Path) -> None:
+    """Move every staged part file into its partition of the dataset"""
+    for path in staging_dir.glob("*/date=*/*.parquet"):
+        target = export_dir / path.parent.parent.name / path.parent.name / path.name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, target)
+    shutil.rmtree(staging_dir)
+
+
+def export_campaigns(
+    campaigns: Optional[Iterable[Dict[str, Any]]] = None,
+    full: bool = False,
+    export_dir: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """
+    Export campaigns (default: the current master manifest) that have not been exported yet.
+    `full=True` deletes the existing dataset and exports everything again.
+    Returns the number of campaigns and rows written per table.
+    """
+    export_dir = export_dir or EXPORT_DIR
+    if campaigns is None:
+        campaigns = load_manifest().get("campaigns", [])
+
+    with _lock:
+        if full and export_dir.exists():
+            shutil.rmtree(export_dir)
+        export_dir.mkdir(parents=True, exist_ok=True)
+        state = _load_state(export_dir)
+        _discard_uncommitted(export_dir, state)
+        exported = set(state.get("exported", []))
+
+        pending = {name: [] for name in TABLES}
+        new_keys, seen = [], set()
+        for campaign in campaigns:
+            key = export_key(campaign)
+            if key in exported or key in seen:
+                continue
+            rows = campaign_rows(campaign)
+            if not rows["campaigns"]:
+                continue  # load errors and entries without a usable timestamp
+            for name, table_rows in rows.items():
+                pending[name].extend(table_rows)
+            new_keys.append(key)
+            seen.add(key)
+
+        written = {}
+        if new_keys:
+            run_id = uuid.uuid4().hex
+            staging_dir = export_dir / STAGING_DIR / run_id
+            conn = duckdb.connect()
+            try:
+                for name, rows in pending.items():
+                    written[name] = _write_table(conn, name, rows, staging_dir, run_id)
+            finally:
+                conn.close()
+            _publish(staging_dir, export_dir)
+            state["exported"] = sorted(exported.union(new_keys))
+            state["runs"] = state.get("runs", []) + [run_id]
+            state["last_export_at"] = datetime.now().isoformat()
+            atomic_write_json(export_dir / STATE_FILE, state)
+
+    logger.info("exported campaigns to Parquet", extra={"exported_campaigns": len(new_keys), "previously_exported": len(exported)})
+    return {
+        "exported_campaigns": len(new_keys),
+        "previously_exported": len(exported),
+        "rows": written,
+        "export_dir": str(export_dir),
+    }
+
+
+def connect_exports(export_dir: Optional[Path] = None) -> duckdb.DuckDBPyConnection:
+    """In-memory DuckDB connection with one view per exported table over its Parquet files"""
+    export_dir = export_dir or EXPORT_DIR
+    conn = duckdb.connect()
+    for name in TABLES:
+        table_dir = export_dir / name
+        if any(table_dir.glob("date=*/*.parquet")):
+            conn.execute(
+                f"CREATE VIEW {name} AS SELECT * FROM "
+                f"read_parquet('{table_dir.as_posix()}/*/*.parquet', hive_partitioning = true)"
+            )
+        else:
+            # Same columns as the dataset would have (hive partition values are read back as DATE)
+            columns = ", ".join(f"NULL::{'DATE' if col == 'date' else kind} AS {col}" for col, kind in TABLES[name])
+            conn.execute(f"CREATE VIEW {name} AS SELECT {columns} WHERE false")
+    return conn
+
+
+def images_per_country_per_week(
+    export_dir: Optional[Path] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Generated images per country per ISO week, read from the Parquet export"""
+    conn = connect_exports(export_dir)
+    try:
+        clauses, params = [], []
+        # Filtering on the partition column lets DuckDB skip whole date directories
+        if date_from:
+            clauses.append("v.date >= CAST(? AS DATE)")
+            params.append(date_from)
+        if date_to:
+            clauses.append("v.date <= CAST(? AS DATE)")
+            params.append(date_to)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = conn.execute(f"""
+            SELECT c.country_name,
+                   CAST(date_trunc('week', v.created_at) AS DATE) AS week,
+                   count(*) AS images,
+                   count(DISTINCT v.campaign_id) AS campaigns
+            FROM campaign_variants v
+            JOIN campaigns c ON c.campaign_id = v.campaign_id AND c.created_at = v.created_at
+            {where}
+            GROUP BY ALL
+            ORDER BY week, c.country_name
+        """, params).fetchall()
+    finally:
+        conn.close()
+    return [
+        {"country_name": country, "week": week.isoformat(), "images": images, "campaigns": campaigns}
+        for country, week, images, campaigns in rows
+    ]
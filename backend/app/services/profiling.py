@@ -0,0 +1,202 @@
+"""
+On-demand and sampled profiling of campaign generation.
+
+Two profilers, both scoped to the thread generating the campaign:
+- "pstats": cProfile, deterministic (every call, higher overhead) -> profile.pstats
+  (inspect with `python -m pstats` or snakeviz)
+- "speedscope": a sampling profiler that reads the generating thread's stack every
+  PROFILE_SAMPLE_INTERVAL seconds -> profile.speedscope.json (open in https://www.speedscope.app)
+
+Admins request a profile per call; PROFILE_SAMPLE_RATE (0-1, default 0) additionally runs the
+sampling profiler on that fraction of all campaigns for continuous, low-overhead coverage.
+"""
+import cProfile
+import json
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_FORMATS = ("pstats", "speedscope")
+
+# cProfile can only be enabled on one thread at a time in-process
+_cprofile_lock = threading.Lock()
+
+
+def parse_profile_flag(value: Optional[str]) -> Optional[str]:
+    """Profiler format requested by a header/query flag: "pstats", "speedscope", or a truthy value for pstats"""
+    if value is None:
+        return None
+    value = value.strip().lower()
+    if value in ("", "0", "false", "no", "off"):
+        return None
+    if value in ("1", "true", "yes", "on"):
+        return "pstats"
+    if value not in PROFILE_FORMATS:
+        raise ValueError(f"Unknown profile format: {value}. Use one of {', '.join(PROFILE_FORMATS)}")
+    return value
+
+
+def should_sample() -> bool:
+    """Whether this campaign falls into the continuous-profiling sample"""
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack from a background thread and writes speedscope JSON"""
+
+    format = "speedscope"
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self._frames: Dict[Tuple[str, str, int], int] = {}
+        self._samples: List[List[int]] = []
+        self._weights: List[float] = []
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self.started = self.stopped = 0.0
+
+    def _frame_index(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frames.get(key)
+        if index is None:
+            index = self._frames[key] = len(self._frames)
+        return index
+
+    def _sample_loop(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_index(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()  # speedscope wants root first
+            self._samples.append(stack)
+            self._weights.append(now - last)
+            last = now
+
+    def start(self) -> "SamplingProfiler":
+        self.started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample_loop, name="campaign-profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.stopped = time.perf_counter()
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        frames = [{"name": function, "file": file, "line": line} for (function, file, line) in self._frames]
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(self.stopped - self.started, 6),
+                "samples": self._samples,
+                "weights": [round(w, 6) for w in self._weights],
+            }],
+            "name": name,
+            "exporter": "creative-automation-pipeline",
+        }
+
+    def save(self, directory: Path, name: str) -> Path:
+        path = Path(directory) / "profile.speedscope.json"
+        with open(path, "w") as f:
+            json.dump(self.to_speedscope(name), f)
+        return path
+
+    def summary(self) -> Dict[str, Any]:
+        return {"samples": len(self._samples), "interval_ms": self.interval * 1000}
+
+
+class DeterministicProfiler:
+    """cProfile around the generating thread, saved as a pstats file"""
+
+    format = "pstats"
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+        self._running = False
+        self.started = self.stopped = 0.0
+
+    def start(self) -> "DeterministicProfiler":
+        if not _cprofile_lock.acquire(blocking=False):
+            raise RuntimeError("Another campaign is already being profiled with cProfile")
+        self._running = True
+        self.started = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def stop(self) -> None:
+        # Idempotent: a second stop must not release a lock another campaign may now hold
+        if not self._running:
+            return
+        self._running = False
+        self._profile.disable()
+        self.stopped = time.perf_counter()
+        _cprofile_lock.release()
+
+    def save(self, directory: Path, name: str) -> Path:
+        path = Path(directory) / "profile.pstats"
+        self._profile.dump_stats(str(path))
+        return path
+
+    def summary(self) -> Dict[str, Any]:
+        return {}
+
+
+def start_profiler(format: str):
+    """Start a profiler of the given format on the current thread.
+
+    A deterministic profile falls back to sampling while another cProfile run is active.
+    """
+    if format == "pstats":
+        try:
+            return DeterministicProfiler().start()
+        except RuntimeError:
+            pass
+    return SamplingProfiler().start()
+
+
+def finish_profile(profiler, directory: Optional[Path], name: str, trigger: str) -> Dict[str, Any]:
+    """Stop the profiler and save it in `directory`; returns the metadata["profile"] block.
+
+    A profile that cannot be saved is logged and reported as "error", never raised: the
+    campaign it describes has already succeeded.
+    """
+    profiler.stop()
+    info = {
+        "format": profiler.format,
+        "trigger": trigger,
+        "duration_ms": round((profiler.stopped - profiler.started) * 1000, 2),
+        **profiler.summary(),
+    }
+    if directory is not None and Path(directory).is_dir():
+        try:
+            info["path"] = str(profiler.save(directory, name))
+        except Exception as e:
+            logger.warning("failed to save profile", extra={"format": profiler.format, "error": str(e)})
+            info["error"] = str(e)
+    return info
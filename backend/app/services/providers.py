@@ -0,0 +1,161 @@
+"""
+Image provider registry.
+
+A provider turns a prompt into encoded image bytes plus generation metadata (model, provider,
+generation_time, dimensions). `generate_single_image` tries the providers named in
+IMAGE_PROVIDERS (comma-separated, default "huggingface,openai") in order; the first success wins.
+
+Built in:
+- huggingface, openai: the hosted models, registered by generator.py
+- local: procedural images (seeded gradients and shapes), no network or API keys.
+  LOCAL_PROVIDER_LATENCY / LOCAL_PROVIDER_JITTER simulate generation time in seconds and
+  LOCAL_PROVIDER_FAILURE_RATE (0-1) the fraction of calls that fail, so the full
+  /campaigns/generate path, including fallbacks, can run at volume in CI.
+"""
+import hashlib
+import io
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+LOCAL_PROVIDER_LATENCY = float(os.getenv("LOCAL_PROVIDER_LATENCY", "0"))
+LOCAL_PROVIDER_JITTER = float(os.getenv("LOCAL_PROVIDER_JITTER", "0"))
+LOCAL_PROVIDER_FAILURE_RATE = float(os.getenv("LOCAL_PROVIDER_FAILURE_RATE", "0"))
+LOCAL_PROVIDER_MODEL = "local-procedural"
+
+# Latency and failures draw from their own RNG (seed it for reproducible load tests);
+# the image itself only depends on the prompt and seed
+_chaos = random.Random(os.getenv("LOCAL_PROVIDER_RANDOM_SEED"))
+_chaos_lock = threading.Lock()
+
+
+class ProviderError(Exception):
+    """An image provider failed to produce an image"""
+
+    def __init__(self, message: str, attempts: Optional[List[Dict[str, Any]]] = None):
+        super().__init__(message)
+        self.attempts = attempts or []
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), None if absent or invalid"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+_backoff = random.Random()
+_backoff_lock = threading.Lock()
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2^(attempt-1)))"""
+    with _backoff_lock:
+        return _backoff.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+@dataclass
+class ImageProvider:
+    name: str
+    label: str  # as reported in metadata["image_generation"]["provider"]
+    generate: Callable[..., Tuple[bytes, Dict[str, Any]]]  # (prompt, width, height, **params)
+    is_available: Callable[[], bool] = lambda: True
+
+
+_providers: Dict[str, ImageProvider] = {}
+
+
+def register_provider(provider: ImageProvider) -> None:
+    _providers[provider.name] = provider
+
+
+def get_provider(name: str) -> ImageProvider:
+    try:
+        return _providers[name]
+    except KeyError:
+        raise ValueError(f"Unknown image provider: {name}. Registered: {', '.join(sorted(_providers))}")
+
+
+def list_providers() -> List[str]:
+    return sorted(_providers)
+
+
+def provider_chain(names: Optional[str] = None) -> List[ImageProvider]:
+    """Providers to try in order, from `names` or IMAGE_PROVIDERS"""
+    names = names if names is not None else os.getenv("IMAGE_PROVIDERS", "huggingface,openai")
+    return [get_provider(name.strip()) for name in names.split(",") if name.strip()]
+
+
+def _seed_for(prompt: str, seed: Optional[int]) -> int:
+    if seed is not None:
+        return seed
+    return int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "big")
+
+
+def synthesize_image(prompt: str, width: int, height: int, seed: Optional[int] = None) -> Image.Image:
+    """Deterministic RGB image for a prompt/seed: a diagonal two-colour gradient with random shapes"""
+    rng = np.random.default_rng(_seed_for(prompt, seed))
+    start, end = rng.integers(0, 256, size=(2, 3))
+    ys, xs = np.mgrid[0:height, 0:width]
+    t = ((xs / max(width - 1, 1)) + (ys / max(height - 1, 1))) / 2
+    pixels = start + (end - start) * t[..., None]
+    img = Image.fromarray(pixels.astype(np.uint8), "RGB")
+
+    draw = ImageDraw.Draw(img)
+    for _ in range(int(rng.integers(4, 10))):
+        x0, x1 = sorted(rng.integers(0, width, size=2))
+        y0, y1 = sorted(rng.integers(0, height, size=2))
+        color = tuple(int(c) for c in rng.integers(0, 256, size=3))
+        shape = rng.integers(0, 3)
+        if shape == 0:
+            draw.ellipse((x0, y0, x1, y1), fill=color)
+        elif shape == 1:
+            draw.rectangle((x0, y0, x1, y1), fill=color)
+        else:
+            points = [(int(x), int(y)) for x, y in zip(rng.integers(0, width, 3), rng.integers(0, height, 3))]
+            draw.polygon(points, fill=color)
+    return img
+
+
+def generate_with_local(prompt: str, width: int, height: int, seed: Optional[int] = None, **params: Any) -> Tuple[bytes, Dict[str, Any]]:
+    """Procedural stand-in for a hosted model: simulated latency and failures, PNG bytes out"""
+    start_time = time.time()
+    with _chaos_lock:
+        fail = _chaos.random() < LOCAL_PROVIDER_FAILURE_RATE
+        delay = max(0.0, LOCAL_PROVIDER_LATENCY + _chaos.uniform(-LOCAL_PROVIDER_JITTER, LOCAL_PROVIDER_JITTER))
+    if delay:
+        time.sleep(delay)
+    if fail:
+        raise ProviderError("Simulated local provider failure")
+
+    buffer = io.BytesIO()
+    synthesize_image(prompt, width, height, seed).save(buffer, "PNG")
+    metadata = {
+        "model": LOCAL_PROVIDER_MODEL,
+        "provider": "Local",
+        "generation_time": f"{time.time() - start_time:.2f}s",
+        "dimensions": f"{width}x{height}",
+        "seed": _seed_for(prompt, seed),
+    }
+    return buffer.getvalue(), metadata
+
+
+register_provider(ImageProvider("local", "Local", generate_with_local))
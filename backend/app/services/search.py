@@ -0,0 +1,117 @@
+"""Campaign search: filtered vector search and hybrid (vector + keyword) ranking"""
+from typing import Any, Dict, List, Optional, Sequence
+
+# Standard RRF damping constant (Cormack et al.); keeps any single list from dominating
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[tuple]:
+    """
+    Fuse several ranked id lists into one using reciprocal rank fusion.
+    Each id scores sum(1 / (k + rank)) over the lists it appears in (rank starts at 1).
+    Returns (id, score) pairs, best first.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def hybrid_search(
+    query: str,
+    top_k: int = 3,
+    country_name: Optional[str] = None,
+    audience: Optional[str] = None,
+    product: Optional[str] = None,
+    date_from: Optional[Any] = None,
+    date_to: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Run the filtered vector query and the keyword query, fuse them with RRF and
+    return results in the same shape as a Chroma query response, plus an `rrf_scores` list.
+    Both sides over-fetch so that items ranked just outside top_k on one side can still surface.
+    """
+    from .embeddings import build_where_filter, search_similar, get_campaign_documents
+    from .logging_db import search_messages
+
+    candidates = max(top_k * 3, 10)
+    where = build_where_filter(country_name, audience, product, date_from, date_to)
+    vector_results = search_similar(query, top_k=candidates, where=where)
+    keyword_hits = search_messages(
+        query, top_k=candidates, country_name=country_name, audience=audience,
+        product=product, date_from=date_from, date_to=date_to,
+    )
+
+    vector_ids = vector_results["ids"][0] if vector_results.get("ids") else []
+    keyword_ids = [campaign_id for campaign_id, _ in keyword_hits]
+    fused = reciprocal_rank_fusion([vector_ids, keyword_ids])[:top_k]
+
+    # Index vector-side fields; keyword-only hits are fetched from the collection by id
+    by_id: Dict[str, Dict[str, Any]] = {}
+    for i, campaign_id in enumerate(vector_ids):
+        by_id[campaign_id] = {
+            "distance": vector_results["distances"][0][i] if vector_results.get("distances") else None,
+            "metadata": vector_results["metadatas"][0][i] if vector_results.get("metadatas") else {},
+            "document": vector_results["documents"][0][i] if vector_results.get("documents") else "",
+        }
+    missing = [campaign_id for campaign_id, _ in fused if campaign_id not in by_id]
+    if missing:
+        fetched = get_campaign_documents(missing)
+        for i, campaign_id in enumerate(fetched.get("ids", [])):
+            by_id[campaign_id] = {
+                "distance": None,
+                "metadata": fetched["metadatas"][i] if fetched.get("metadatas") else {},
+                "document": fetched["documents"][i] if fetched.get("documents") else "",
+            }
+
+    ids = [campaign_id for campaign_id, _ in fused]
+    return {
+        "ids": [ids],
+        "distances": [[by_id.get(campaign_id, {}).get("distance") for campaign_id in ids]],
+        "metadatas": [[by_id.get(campaign_id, {}).get("metadata") or {} for campaign_id in ids]],
+        "documents": [[by_id.get(campaign_id, {}).get("document") or "" for campaign_id in ids]],
+        "rrf_scores": [score for _, score in fused],
+    }
+
+
+def find_reusable_campaign(brief: Any, threshold: float = 0.95, top_k: int = 5) -> Optional[Dict[str, Any]]:
+    """
+    Find a prior campaign whose brief is a near-duplicate of `brief`: same country and
+    audience, covering every requested product, and with a similarity score (same 0-1
+    scale as /campaigns/search) of at least `threshold`. Returns the campaign id, score
+    and the existing base image for each product, or None if nothing qualifies.
+    """
+    from pathlib import Path
+    from .embeddings import build_embedding_text, build_where_filter, search_similar
+    from .campaign_index import get_campaign
+
+    where = build_where_filter(country_name=brief.country_name, audience=brief.audience, products=brief.products)
+    query = build_embedding_text(brief.message, brief.model_dump())
+    results = search_similar(query, top_k=top_k, where=where)
+    if not results or not results.get("ids") or not results["ids"][0]:
+        return None
+
+    for i, campaign_id in enumerate(results["ids"][0]):
+        distance = results["distances"][0][i]
+        similarity = 1 - (distance / 2)
+        if similarity < threshold:
+            break  # results are ordered by distance
+
+        campaign = get_campaign(campaign_id)
+        if not campaign:
+            continue
+        campaign_dir = campaign.get("metadata", {}).get("campaign_directory") \
+            or campaign.get("_manifest_metadata", {}).get("campaign_directory")
+        if not campaign_dir:
+            continue
+
+        base_images = {}
+        for product in brief.products:
+            base_image = Path(campaign_dir) / product.replace(" ", "_").lower() / "base_image.png"
+            if not base_image.exists():
+                break
+            base_images[product] = str(base_image)
+        else:
+            return {"campaign_id": campaign_id, "similarity_score": similarity, "base_images": base_images}
+    return None
@@ -0,0 +1,112 @@
+"""
+Translation backends for the overlay message.
+
+A backend is a callable `(message, target_language, country_full_name, audience_context)`
+returning the localized copy and its token usage ({prompt_tokens, completion_tokens,
+total_tokens, model}). TRANSLATION_BACKEND selects one (default "openai").
+
+Built in:
+- openai: the LLM call, registered by generator.py
+- local: deterministic stand-in, no network. Returns script-appropriate sample copy for the
+  target language (Arabic/Hebrew/Persian/Urdu, Chinese/Japanese/Korean, Cyrillic, ...) on the
+  first line and the English seed on the second, like the LLM's output format, so RTL and CJK
+  overlay rendering can be benchmarked offline. LOCAL_TRANSLATION_LATENCY / _JITTER simulate
+  the round trip in seconds; token usage is estimated from the text lengths.
+"""
+import math
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+LOCAL_TRANSLATION_LATENCY = float(os.getenv("LOCAL_TRANSLATION_LATENCY", "0"))
+LOCAL_TRANSLATION_JITTER = float(os.getenv("LOCAL_TRANSLATION_JITTER", "0"))
+LOCAL_TRANSLATION_MODEL = "local-translation"
+# Roughly the size of the LLM system prompt the local backend stands in for
+LOCAL_TRANSLATION_PROMPT_TOKENS = 280
+
+TranslationBackend = Callable[[str, str, str, str], Tuple[str, Dict]]
+
+# Sample marketing copy per language ("Built for the toughest jobs. Safety you can wear.")
+SAMPLE_COPY: Dict[str, str] = {
+    # Right-to-left scripts
+    "Arabic": "مصممة لأصعب المهام. سلامة يمكنك ارتداؤها.",
+    "Hebrew": "נבנה לעבודות הקשות ביותר. בטיחות שאפשר ללבוש.",
+    "Persian": "ساخته شده برای سخت‌ترین کارها. ایمنی که می‌پوشید.",
+    "Urdu": "سخت ترین کاموں کے لیے تیار۔ حفاظت جو آپ پہن سکتے ہیں۔",
+    "Dari": "ساخته شده برای سخت‌ترین کارها. ایمنی که می‌پوشید.",
+    # CJK
+    "Chinese": "为最艰苦的工作而生。穿在身上的安全。",
+    "Japanese": "最も過酷な現場のために。身に着ける安全。",
+    "Korean": "가장 힘든 작업을 위해 만들었습니다. 입는 안전.",
+    # Cyrillic
+    "Russian": "Создано для самой тяжёлой работы. Безопасность, которую можно носить.",
+    "Ukrainian": "Створено для найважчої роботи. Безпека, яку можна носити.",
+    "Bulgarian": "Създадено за най-тежката работа. Безопасност, която носите.",
+    "Serbian": "Направљено за најтеже послове. Безбедност коју носите.",
+    "Kazakh": "Ең ауыр жұмысқа арналған. Киюге болатын қауіпсіздік.",
+    "Belarusian": "Створана для самай цяжкай працы. Бяспека, якую можна насіць.",
+    "Macedonian": "Направено за најтешката работа. Безбедност што ја носите.",
+    "Mongolian": "Хамгийн хүнд ажилд зориулсан. Өмсөж болох аюулгүй байдал.",
+    # Other scripts
+    "Greek": "Φτιαγμένο για τις πιο σκληρές δουλειές. Ασφάλεια που φοράς.",
+    "Hindi": "सबसे कठिन कामों के लिए बना। सुरक्षा जिसे आप पहन सकते हैं।",
+    "Thai": "สร้างมาเพื่องานที่หนักที่สุด ความปลอดภัยที่คุณสวมใส่ได้",
+    # Latin
+    "Spanish": "Hecho para los trabajos más duros. Seguridad que puedes llevar puesta.",
+    "French": "Conçu pour les travaux les plus durs. La sécurité qui se porte.",
+    "Portuguese": "Feito para os trabalhos mais duros. Segurança que você veste.",
+    "German": "Gemacht für die härtesten Jobs. Sicherheit zum Anziehen.",
+    "Turkish": "En zorlu işler için üretildi. Giyebileceğiniz güvenlik.",
+    "Vietnamese": "Được tạo ra cho những công việc khó khăn nhất. An toàn bạn có thể mặc.",
+}
+
+_backends: Dict[str, TranslationBackend] = {}
+_jitter = random.Random(os.getenv("LOCAL_PROVIDER_RANDOM_SEED"))
+_jitter_lock = threading.Lock()
+
+
+def register_translation_backend(name: str, backend: TranslationBackend) -> None:
+    _backends[name] = backend
+
+
+def list_translation_backends() -> List[str]:
+    return sorted(_backends)
+
+
+def get_translation_backend(name: str = None) -> TranslationBackend:
+    """Backend named `name` or TRANSLATION_BACKEND (default "openai")"""
+    name = name or os.getenv("TRANSLATION_BACKEND", "openai")
+    try:
+        return _backends[name]
+    except KeyError:
+        raise ValueError(f"Unknown translation backend: {name}. Registered: {', '.join(list_translation_backends())}")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough BPE token count: ~4 ASCII characters per token, ~1 token per non-ASCII character"""
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return max(1, math.ceil(ascii_chars / 4) + (len(text) - ascii_chars))
+
+
+def translate_with_local(message: str, target_language: str, country_full_name: str, audience_context: str = "") -> Tuple[str, Dict]:
+    """Deterministic sample copy in the target language's script, after a simulated round trip"""
+    with _jitter_lock:
+        delay = max(0.0, LOCAL_TRANSLATION_LATENCY + _jitter.uniform(-LOCAL_TRANSLATION_JITTER, LOCAL_TRANSLATION_JITTER))
+    if delay:
+        time.sleep(delay)
+
+    localized = SAMPLE_COPY.get(target_language, f"[{target_language}] {message}")
+    translated_message = f"{localized}\n{message}"
+    prompt_tokens = LOCAL_TRANSLATION_PROMPT_TOKENS + estimate_tokens(message + audience_context)
+    completion_tokens = estimate_tokens(translated_message)
+    return translated_message, {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "model": LOCAL_TRANSLATION_MODEL,
+    }
+
+
+register_translation_backend("local", translate_with_local)
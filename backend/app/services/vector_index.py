@@ -0,0 +1,225 @@
+"""
+Exact vector index backed by a memory-mapped float16 matrix.
+
+Alternative to the Chroma HNSW collection for small and medium corpora: every query is
+a brute-force cosine similarity over all stored vectors (exact results) followed by
+`argpartition` for top-k. Implements the subset of the Chroma collection API used by
+the embeddings service (`upsert`, `add`, `query`, `get`, `count`) so it can be swapped in.
+
+On-disk layout (under `path`):
+    vectors.f16     row-major float16 matrix, `capacity` rows of `dim` (unit-normalized)
+    records.jsonl   one {"id", "row", "metadata", "document"} line per write; last line per id wins
+    index.json      {"dim", "count", "capacity"} - written atomically after each append
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Rows scored per block; float16 -> float32 conversion dominates query time, and a
+# cache-sized block (~3 MB at dim=384) converts noticeably faster than one large copy
+QUERY_BLOCK_ROWS = 2048
+
+
+def _matches(where: Optional[Dict[str, Any]], metadata: Dict[str, Any]) -> bool:
+    """Evaluate a Chroma-style `where` clause against one metadata dict"""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches(clause, metadata) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(clause, metadata) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, operand in condition.items():
+                if op == "$eq" and value != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$nin" and value in operand:
+                    return False
+                if op in ("$gt", "$gte", "$lt", "$lte"):
+                    if value is None:
+                        return False
+                    if op == "$gt" and not value > operand:
+                        return False
+                    if op == "$gte" and not value >= operand:
+                        return False
+                    if op == "$lt" and not value < operand:
+                        return False
+                    if op == "$lte" and not value <= operand:
+                        return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class NumpyVectorIndex:
+    """Exact cosine-similarity index over a memory-mapped float16 matrix"""
+
+    def __init__(self, path: Path, dim: int, initial_capacity: int = 1024):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.path / "vectors.f16"
+        self._records_path = self.path / "records.jsonl"
+        self._state_path = self.path / "index.json"
+        self._lock = threading.Lock()
+
+        self.dim = dim
+        self.count_rows = 0
+        self.capacity = initial_capacity
+        if self._state_path.exists():
+            state = json.loads(self._state_path.read_text())
+            if state["dim"] != dim:
+                raise ValueError(f"Vector index at {self.path} has dim {state['dim']}, expected {dim}")
+            self.count_rows = state["count"]
+            self.capacity = state["capacity"]
+
+        self._ids: List[Optional[str]] = [None] * self.count_rows
+        self._metadatas: List[Dict[str, Any]] = [{} for _ in range(self.count_rows)]
+        self._documents: List[str] = [""] * self.count_rows
+        self._rows: Dict[str, int] = {}
+        if self._records_path.exists():
+            with open(self._records_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    row = record["row"]
+                    if row >= self.count_rows:
+                        continue  # record written but the append never committed
+                    self._ids[row] = record["id"]
+                    self._metadatas[row] = record.get("metadata") or {}
+                    self._documents[row] = record.get("document") or ""
+                    self._rows[record["id"]] = row
+
+        self._matrix = self._open_matrix(self.capacity)
+
+    def _open_matrix(self, capacity: int) -> np.memmap:
+        size = capacity * self.dim * 2
+        with open(self._vectors_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(self._vectors_path, dtype=np.float16, mode="r+", shape=(capacity, self.dim))
+
+    def _write_state(self) -> None:
+        tmp_path = self._state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"dim": self.dim, "count": self.count_rows, "capacity": self.capacity}))
+        os.replace(tmp_path, self._state_path)
+
+    def count(self) -> int:
+        return len(self._rows)
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        documents: Optional[Sequence[str]] = None,
+    ) -> None:
+        """Append new vectors (or overwrite existing ids in place)"""
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            new_rows = sum(1 for item_id in ids if item_id not in self._rows)
+            if self.count_rows + new_rows > self.capacity:
+                capacity = self.capacity
+                while self.count_rows + new_rows > capacity:
+                    capacity *= 2
+                self._matrix.flush()
+                self._matrix = self._open_matrix(capacity)
+                self.capacity = capacity
+
+            with open(self._records_path, "a", encoding="utf-8") as f:
+                for i, item_id in enumerate(ids):
+                    row = self._rows.get(item_id)
+                    if row is None:
+                        row = self.count_rows
+                        self.count_rows += 1
+                        self._ids.append(item_id)
+                        self._metadatas.append({})
+                        self._documents.append("")
+                        self._rows[item_id] = row
+                    self._matrix[row] = vectors[i]
+                    self._metadatas[row] = dict(metadatas[i]) if metadatas else {}
+                    self._documents[row] = documents[i] if documents else ""
+                    f.write(json.dumps({
+                        "id": item_id,
+                        "row": row,
+                        "metadata": self._metadatas[row],
+                        "document": self._documents[row],
+                    }) + "\n")
+            self._matrix.flush()
+            self._write_state()
+
+    add = upsert
+
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of `query` against every stored row"""
+        scores = np.empty(self.count_rows, dtype=np.float32)
+        block = np.empty((min(QUERY_BLOCK_ROWS, self.count_rows), self.dim), dtype=np.float32)
+        for start in range(0, self.count_rows, QUERY_BLOCK_ROWS):
+            stop = min(start + QUERY_BLOCK_ROWS, self.count_rows)
+            rows = stop - start
+            np.copyto(block[:rows], self._matrix[start:stop])
+            np.matmul(block[:rows], query, out=scores[start:stop])
+        return scores
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """Exact top-k by cosine distance (1 - cosine similarity), Chroma response shape"""
+        result: Dict[str, Any] = {"ids": [], "distances": [], "metadatas": [], "documents": []}
+        with self._lock:
+            candidates = None
+            if where:
+                candidates = np.array(
+                    [row for row in range(self.count_rows) if _matches(where, self._metadatas[row])],
+                    dtype=np.int64,
+                )
+
+            for embedding in query_embeddings:
+                query = np.asarray(embedding, dtype=np.float32)
+                norm = np.linalg.norm(query)
+                query = query / norm if norm else query
+
+                scores = self._scores(query) if self.count_rows else np.empty(0, dtype=np.float32)
+                rows = np.arange(self.count_rows) if candidates is None else candidates
+                scores = scores[rows]
+
+                k = min(n_results, len(rows))
+                if k == 0:
+                    top = np.empty(0, dtype=np.int64)
+                elif k < len(rows):
+                    top = np.argpartition(-scores, k - 1)[:k]
+                    top = top[np.argsort(-scores[top])]
+                else:
+                    top = np.argsort(-scores)
+
+                result["ids"].append([self._ids[rows[i]] for i in top])
+                result["distances"].append([float(1.0 - scores[i]) for i in top])
+                result["metadatas"].append([self._metadatas[rows[i]] for i in top])
+                result["documents"].append([self._documents[rows[i]] for i in top])
+        return result
+
+    def get(self, ids: Sequence[str], include: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Fetch stored metadata and documents by id, Chroma response shape"""
+        with self._lock:
+            rows = [self._rows[item_id] for item_id in ids if item_id in self._rows]
+            return {
+                "ids": [self._ids[row] for row in rows],
+                "metadatas": [self._metadatas[row] for row in rows],
+                "documents": [self._documents[row] for row in rows],
+            }
@@ -1,7 +1,6 @@
 """
-Backfill embeddings from existing campaigns in master_manifest.json
+Backfill embeddings from existing campaigns in the master manifest
 """
-import json
 from pathlib import Path
 import sys
 
@@ -9,18 +8,16 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent / "backend"))
 
 from app.services.embeddings import embed_and_store
+from app.services.manifest_store import MANIFEST_PATH, LOG_PATH, load_manifest
 
 def backfill_embeddings():
     """Load existing campaigns and create embeddings"""
-    manifest_path = Path("assets/generated/master_manifest.json")
-    
-    if not manifest_path.exists():
+    if not MANIFEST_PATH.exists() and not LOG_PATH.exists():
         print("❌ master_manifest.json not found")
         return
     
     print("📚 Loading master manifest...")
-    with open(manifest_path, 'r') as f:
-        manifest = json.load(f)
+    manifest = load_manifest()
     
     campaigns = manifest.get("campaigns", [])
     print(f"📊 Found {len(campaigns)} campaigns")
@@ -43,7 +40,8 @@ def backfill_embeddings():
                 "products": request.get("products", []),
                 "country_name": request.get("country_name") or request.get("region", ""),
                 "audience": request.get("audience", ""),
-                "message": message
+                "message": message,
+                "created_at": campaign.get("timestamp")
             }
             
             # Store embedding
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Image operations benchmark: the Pillow hot path of create_size_variants
+
+Times each step per aspect ratio in generator.SIZE_CONFIGS on a deterministic 1024x1024 source
+image (the local provider's output for a fixed prompt and seed):
+- crop_resize: smart_resize_and_crop to the variant size
+- png_save:    PNG encode of the resized variant (in memory)
+- overlay:     add_brand_overlay end to end (decode, logo paste, outlined text, PNG save), once
+               per script: Latin (US), Arabic (SA), CJK (JP), Cyrillic (RU). Copy comes from the
+               local translation backend; "compose" is the logo and text compositing alone.
+
+Each case runs --rounds rounds after a warmup, each round lasting at least --min-round-time
+seconds (or a fixed --number of operations); the table shows the median round (ops/s, ms/op)
+and the spread between the fastest and slowest round. Allocations come from one extra, untimed
+operation: the tracemalloc peak (Python heap, e.g. font and text layout objects) and the Pillow
+images/blocks allocated, since Pillow's pixel buffers bypass tracemalloc.
+
+Usage:
+    python benchmarks/bench_image_ops.py
+    python benchmarks/bench_image_ops.py --ops overlay --scripts Arabic CJK --rounds 7
+    python benchmarks/bench_image_ops.py --json bench_image_ops.json
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+INVOCATION_DIR = Path.cwd()
+
+# Offline copy for the overlay; BRAND_IMAGE_PATH is relative to the repository root
+os.environ["TRANSLATION_BACKEND"] = "local"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("EMBEDDING_MODEL", "local")
+os.chdir(REPO_ROOT)
+
+# Add backend to path
+sys.path.insert(0, str(REPO_ROOT / "backend"))
+
+from app.services.generator import SIZE_CONFIGS, add_brand_overlay, smart_resize_and_crop
+from app.services.metrics import campaign_timings, end_campaign_timings, start_campaign_timings
+from app.services.providers import synthesize_image
+
+OPS = ["crop_resize", "png_save", "overlay"]
+SCRIPTS = {"Latin": "US", "Arabic": "SA", "CJK": "JP", "Cyrillic": "RU"}
+PRODUCT = "hard hat"
+MESSAGE = "Built for the toughest jobs. Safety you can wear."
+
+
+def pillow_stats() -> dict:
+    return Image.core.get_stats()
+
+
+def measure_allocations(op) -> dict:
+    """Python heap peak and Pillow allocations of a single operation"""
+    tracemalloc.start()
+    before = pillow_stats()
+    op()
+    after = pillow_stats()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "py_peak_kib": round(peak / 1024, 1),
+        "pil_images": after["new_count"] - before["new_count"],
+        "pil_blocks": after["allocated_blocks"] - before["allocated_blocks"],
+    }
+
+
+def run_case(op, setup, rounds: int, number: Optional[int], warmup: int, min_round_time: float) -> dict:
+    """
+    Median-round throughput of `op`; `setup` runs untimed before every call. Without a fixed
+    `number`, rounds are sized from the warmup so each lasts at least `min_round_time` seconds.
+    """
+    warmup_seconds = 0.0
+    for _ in range(max(warmup, 1)):
+        setup()
+        started = time.perf_counter()
+        op()
+        warmup_seconds = time.perf_counter() - started
+    if number is None:
+        number = max(1, math.ceil(min_round_time / max(warmup_seconds, 1e-6)))
+
+    round_times, compose_seconds = [], 0.0
+    for _ in range(rounds):
+        token = start_campaign_timings()
+        elapsed = 0.0
+        for _ in range(number):
+            setup()
+            started = time.perf_counter()
+            op()
+            elapsed += time.perf_counter() - started
+        compose_seconds += campaign_timings().get("overlay", {}).get("ms", 0.0) / 1000
+        end_campaign_timings(token)
+        round_times.append(elapsed / number)
+
+    setup()
+    median = statistics.median(round_times)
+    result = {
+        "ops_per_sec": round(1 / median, 2),
+        "ms_per_op": round(median * 1000, 3),
+        "spread_pct": round((max(round_times) - min(round_times)) / median * 100, 1),
+        "ops_per_round": number,
+        **measure_allocations(op),
+    }
+    if compose_seconds:
+        result["compose_ms_per_op"] = round(compose_seconds / (rounds * number) * 1000, 3)
+    return result
+
+
+def build_cases(ops, scripts, workdir: Path):
+    source = synthesize_image("hard hat on a construction site", 1024, 1024, seed=0)
+    cases = []
+    for aspect_ratio, config in SIZE_CONFIGS.items():
+        size = config["size"]
+        resized = smart_resize_and_crop(source, size)
+
+        if "crop_resize" in ops:
+            cases.append(("crop_resize", aspect_ratio, "-", lambda size=size: smart_resize_and_crop(source, size), lambda: None))
+        if "png_save" in ops:
+            cases.append(("png_save", aspect_ratio, "-", lambda img=resized: img.save(io.BytesIO(), "PNG", quality=95), lambda: None))
+        if "overlay" in ops:
+            buffer = io.BytesIO()
+            resized.save(buffer, "PNG", quality=95)
+            encoded = buffer.getvalue()
+            path = workdir / f"image_{config['dir']}.png"
+            for script in scripts:
+                country = SCRIPTS[script]
+                cases.append((
+                    "overlay", aspect_ratio, script,
+                    lambda path=path, country=country: add_brand_overlay(str(path), PRODUCT, country, MESSAGE, "construction_workers"),
+                    # add_brand_overlay rewrites the file in place, so restore the plain variant first
+                    lambda path=path, encoded=encoded: path.write_bytes(encoded),
+                ))
+    return cases
+
+
+def print_table(results):
+    header = f"{'op':<12} {'ratio':<5} {'script':<8} {'ops/s':>9} {'ms/op':>9} {'±%':>6} {'compose':>9} {'py KiB':>8} {'pil img':>7} {'pil blk':>7}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        compose = f"{r['compose_ms_per_op']:.2f}" if "compose_ms_per_op" in r else "-"
+        print(f"{r['op']:<12} {r['aspect_ratio']:<5} {r['script']:<8} {r['ops_per_sec']:>9.2f} {r['ms_per_op']:>9.2f} "
+              f"{r['spread_pct']:>6.1f} {compose:>9} {r['py_peak_kib']:>8.1f} {r['pil_images']:>7} {r['pil_blocks']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", nargs="+", choices=OPS, default=OPS)
+    parser.add_argument("--scripts", nargs="+", choices=list(SCRIPTS), default=list(SCRIPTS))
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per case (median reported)")
+    parser.add_argument("--number", type=int, help="Operations per round (default: sized by --min-round-time)")
+    parser.add_argument("--min-round-time", type=float, default=0.5, help="Minimum seconds per round")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed operations per case")
+    parser.add_argument("--json", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for op_name, aspect_ratio, script, op, setup in build_cases(args.ops, args.scripts, Path(tmp)):
+            result = run_case(op, setup, args.rounds, args.number, args.warmup, args.min_round_time)
+            results.append({"op": op_name, "aspect_ratio": aspect_ratio, "script": script, **result})
+
+    print(f"\n📊 Image operations ({args.rounds} rounds per case, median round)\n")
+    print_table(results)
+
+    if args.json:
+        args.json = INVOCATION_DIR / args.json
+        args.json.write_text(json.dumps({
+            "config": {"rounds": args.rounds, "number": args.number, "min_round_time": args.min_round_time, "warmup": args.warmup},
+            "results": results,
+        }, indent=2))
+        print(f"\n✅ Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmark
+
+Drives generate_campaign (the /campaigns/generate handler) with the offline stand-ins: local
+image provider, local translation backend, hashing embeddings and the NumPy vector index.
+Scenarios cover product counts and languages (Latin, Arabic, CJK, Cyrillic); every campaign
+renders all three aspect ratios, whose render times come from the campaign_variants rows.
+The run happens in a temporary workspace (frontend/ is linked in for the brand image), so
+nothing is written to the repository's assets/ or db/.
+
+Reports per-stage and end-to-end latency, images/s, CPU time per campaign and peak RSS, saves
+the results as JSON and compares them with a stored baseline: any metric worse than the
+baseline by more than its threshold is flagged as a regression and the exit status is 1.
+Timings are machine-specific, so baselines are local (benchmarks/baselines/ is not committed)
+and a baseline recorded on a different machine or with a different configuration is skipped
+with a warning instead of compared.
+
+Usage:
+    python benchmarks/bench_pipeline.py                           # run and compare with the baseline
+    python benchmarks/bench_pipeline.py --products 1 3 --countries US JP --iterations 5
+    python benchmarks/bench_pipeline.py --json bench_pipeline.json
+    python benchmarks/bench_pipeline.py --save-baseline           # refresh the stored baseline
+    python benchmarks/bench_pipeline.py --provider-latency 0.5    # simulate hosted-model latency
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).parent.parent
+BASELINE_PATH = Path(__file__).parent / "baselines" / "bench_pipeline.json"
+
+PRODUCTS = ["hard hat", "safety vest", "work gloves", "steel toe boots", "ear protection"]
+COUNTRIES = {"US": "Latin", "SA": "Arabic", "JP": "CJK", "RU": "Cyrillic"}
+AUDIENCE = "construction_workers"
+MESSAGE = "Built for the toughest jobs. Safety you can wear."
+
+# Relative slowdown tolerated before a metric is flagged, and the absolute floor below which
+# stage differences are treated as noise
+DEFAULT_THRESHOLDS = {"latency": 0.15, "throughput": 0.15, "cpu": 0.20, "memory": 0.25}
+MIN_STAGE_DELTA_MS = 2.0
+
+
+def prepare_workspace(args) -> Path:
+    """Point the pipeline at the offline stand-ins and a scratch working directory"""
+    os.environ.update({
+        "IMAGE_PROVIDERS": "local",
+        "TRANSLATION_BACKEND": "local",
+        "EMBEDDING_MODEL": "local",
+        "VECTOR_BACKEND": "numpy",
+        "LOG_LEVEL": "WARNING",
+        "LOCAL_PROVIDER_LATENCY": str(args.provider_latency),
+        "LOCAL_TRANSLATION_LATENCY": str(args.translation_latency),
+        "LOCAL_PROVIDER_RANDOM_SEED": "0",
+    })
+    workspace = Path(tempfile.mkdtemp(prefix="bench_pipeline_"))
+    (workspace / "frontend").symlink_to(REPO_ROOT / "frontend", target_is_directory=True)
+    os.chdir(workspace)
+    sys.path.insert(0, str(REPO_ROOT / "backend"))
+    return workspace
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    return round(float(np.percentile(values, pct)), 2) if values else None
+
+
+def run_scenario(products: int, country: str, iterations: int, warmup: int) -> Dict[str, Any]:
+    from app.models import CampaignBrief
+    from app.routes import generate_campaign
+    from app.services import logging_db
+
+    runs = []
+    started = time.perf_counter()
+    for i in range(warmup + iterations):
+        brief = CampaignBrief(
+            products=PRODUCTS[:products], country_name=country, audience=AUDIENCE, message=MESSAGE, seed=i
+        )
+        cpu_started, wall_started = time.process_time(), time.perf_counter()
+        result = generate_campaign(brief, profile=None)
+        wall = time.perf_counter() - wall_started
+        cpu = time.process_time() - cpu_started
+        if i < warmup:
+            started = time.perf_counter()
+            continue
+        runs.append({
+            "campaign_id": result.campaign_id,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "images": result.metadata["total_images"],
+            "timings": result.metadata["timings"],
+            "peak_rss_bytes": (result.metadata.get("memory") or {}).get("peak_rss_bytes"),
+        })
+    elapsed = time.perf_counter() - started
+
+    stage_names = sorted({stage for run in runs for stage in run["timings"]["stages"]})
+    stages = {}
+    for stage in stage_names:
+        samples = [run["timings"]["stages"].get(stage, {}).get("ms", 0.0) for run in runs]
+        stages[stage] = {"p50_ms": percentile(samples, 50), "mean_ms": round(statistics.fmean(samples), 2)}
+
+    logging_db.flush()
+    ids = [run["campaign_id"] for run in runs]
+    aspect_ratios = {
+        ratio: round(ms, 2) for ratio, ms in logging_db.get_connection().execute(f"""
+            SELECT aspect_ratio, median(render_ms) FROM campaign_variants
+            WHERE campaign_id IN ({", ".join("?" for _ in ids)})
+            GROUP BY aspect_ratio ORDER BY aspect_ratio
+        """, ids).fetchall()
+    }
+
+    totals = [run["timings"]["total_ms"] for run in runs]
+    peaks = [run["peak_rss_bytes"] for run in runs if run["peak_rss_bytes"]]
+    return {
+        "products": products,
+        "country_name": country,
+        "script": COUNTRIES.get(country, "Latin"),
+        "campaigns": len(runs),
+        "total_ms": {"p50": percentile(totals, 50), "p95": percentile(totals, 95), "mean": round(statistics.fmean(totals), 2)},
+        "images_per_second": round(sum(run["images"] for run in runs) / elapsed, 3),
+        "cpu_ms_per_campaign": round(statistics.fmean(run["cpu_s"] for run in runs) * 1000, 2),
+        "peak_rss_bytes": max(peaks) if peaks else None,
+        "stages": stages,
+        "aspect_ratio_render_ms": aspect_ratios,
+    }
+
+
+def environment_info() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+# Environment fields that must match for timings to be comparable
+COMPARABLE_ENVIRONMENT = ("platform", "cpu_count", "python")
+
+
+def incomparable(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Differences in machine or configuration that make a baseline comparison meaningless"""
+    reasons = []
+    for key in COMPARABLE_ENVIRONMENT:
+        current, previous = results["environment"].get(key), baseline.get("environment", {}).get(key)
+        if current != previous:
+            reasons.append(f"{key} {previous} -> {current}")
+    for key, current in results["config"].items():
+        previous = baseline.get("config", {}).get(key)
+        if current != previous:
+            reasons.append(f"{key} {previous} -> {current}")
+    return reasons
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], thresholds: Dict[str, float]) -> List[str]:
+    """Regressions of `results` against `baseline`, as human-readable lines"""
+    regressions = []
+
+    def check(scenario: str, metric: str, current, previous, threshold: float, higher_is_better: bool = False,
+              min_delta: float = 0.0):
+        if current is None or not previous:
+            return
+        change = (previous - current) / previous if higher_is_better else (current - previous) / previous
+        if change > threshold and abs(current - previous) >= min_delta:
+            regressions.append(f"{scenario} {metric}: {previous} -> {current} ({change:+.0%}, threshold {threshold:.0%})")
+
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        check(name, "total_ms.p50", current["total_ms"]["p50"], previous["total_ms"]["p50"], thresholds["latency"])
+        check(name, "total_ms.p95", current["total_ms"]["p95"], previous["total_ms"]["p95"], thresholds["latency"])
+        check(name, "images_per_second", current["images_per_second"], previous["images_per_second"],
+              thresholds["throughput"], higher_is_better=True)
+        check(name, "cpu_ms_per_campaign", current["cpu_ms_per_campaign"], previous["cpu_ms_per_campaign"], thresholds["cpu"])
+        check(name, "peak_rss_bytes", current["peak_rss_bytes"], previous["peak_rss_bytes"], thresholds["memory"])
+        for stage, timing in current["stages"].items():
+            previous_stage = previous.get("stages", {}).get(stage)
+            if previous_stage:
+                check(name, f"stages.{stage}.p50_ms", timing["p50_ms"], previous_stage["p50_ms"], thresholds["latency"],
+                      min_delta=MIN_STAGE_DELTA_MS)
+    return regressions
+
+
+def print_scenario(name: str, result: Dict[str, Any]) -> None:
+    total = result["total_ms"]
+    peak = f"{result['peak_rss_bytes'] / 1_048_576:.0f}MB" if result["peak_rss_bytes"] else "n/a"
+    print(f"   {name:<22} p50={total['p50']:>8.1f}ms  p95={total['p95']:>8.1f}ms  "
+          f"{result['images_per_second']:>6.2f} img/s  cpu={result['cpu_ms_per_campaign']:>8.1f}ms  rss={peak}")
+    slowest = sorted(result["stages"].items(), key=lambda item: -item[1]["p50_ms"])[:4]
+    print("      stages: " + ", ".join(f"{stage}={timing['p50_ms']}ms" for stage, timing in slowest))
+    print("      render: " + ", ".join(f"{ratio}={ms}ms" for ratio, ms in result["aspect_ratio_render_ms"].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, nargs="+", default=[1, 3], help="Product counts per campaign")
+    parser.add_argument("--countries", nargs="+", default=list(COUNTRIES), help="Country codes (one per script)")
+    parser.add_argument("--iterations", type=int, default=3, help="Measured campaigns per scenario")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured campaigns per scenario")
+    parser.add_argument("--provider-latency", type=float, default=0.0, help="Simulated image provider latency (s)")
+    parser.add_argument("--translation-latency", type=float, default=0.0, help="Simulated translation latency (s)")
+    parser.add_argument("--json", type=Path, help="Write results to this JSON file")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    for metric, default in DEFAULT_THRESHOLDS.items():
+        parser.add_argument(f"--threshold-{metric}", type=float, default=default,
+                            help=f"Tolerated relative regression in {metric} (default {default})")
+    args = parser.parse_args()
+    baseline_path = args.baseline.resolve()
+    json_path = args.json.resolve() if args.json else None
+
+    workspace = prepare_workspace(args)
+    from app.services import logging_db
+
+    logging_db.init_db()
+    results: Dict[str, Any] = {"environment": environment_info(), "config": {
+        "iterations": args.iterations, "warmup": args.warmup,
+        "provider_latency": args.provider_latency, "translation_latency": args.translation_latency,
+    }, "scenarios": {}}
+    try:
+        print("📊 Pipeline benchmark (offline stand-ins)")
+        for products in args.products:
+            for country in args.countries:
+                name = f"{products}p_{country}"
+                results["scenarios"][name] = run_scenario(products, country, args.iterations, args.warmup)
+                print_scenario(name, results["scenarios"][name])
+    finally:
+        logging_db.close_db()
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    if json_path:
+        json_path.write_text(json.dumps(results, indent=2))
+        print(f"\n✅ Results saved to {json_path}")
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2))
+        print(f"✅ Baseline saved to {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        print(f"\nℹ️ No baseline at {baseline_path} (create one with --save-baseline)")
+        return
+    baseline = json.loads(baseline_path.read_text())
+    reasons = incomparable(results, baseline)
+    if reasons:
+        print(f"\n⚠️ Skipping comparison with {baseline_path.name}, recorded on a different machine or configuration: "
+              + "; ".join(reasons))
+        print("   Refresh it on this machine with --save-baseline")
+        return
+    thresholds = {metric: getattr(args, f"threshold_{metric}") for metric in DEFAULT_THRESHOLDS}
+    regressions = compare(results, baseline, thresholds)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) against {baseline_path.name}:")
+        for line in regressions:
+            print(f"   {line}")
+        sys.exit(1)
+    print(f"\n✅ No regressions against {baseline_path.name}")
+
+
+if __name__ == "__main__":
+    main()
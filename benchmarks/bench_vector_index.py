@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Vector index benchmark: NumPy exact index vs Chroma HNSW
+
+Compares build time, query latency, resident memory and recall@k at 1k, 10k and 100k
+vectors. Vectors are synthetic (clustered Gaussian, MiniLM dimension 384) so the
+benchmark needs no embedding model; recall is measured against float32 brute force.
+
+Usage:
+    python benchmarks/bench_vector_index.py                 # 1k, 10k, 100k
+    python benchmarks/bench_vector_index.py --sizes 1000 10000 --queries 200
+    python benchmarks/bench_vector_index.py --json bench_output.json
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from app.services.vector_index import NumpyVectorIndex
+
+DIM = 384
+BATCH = 5000
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux /proc, falls back to peak RSS elsewhere)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * 4096
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def make_corpus(n: int, queries: int, seed: int = 0):
+    """Clustered vectors so nearest neighbours are meaningful (like real campaign embeddings)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(n // 50, 1), DIM)).astype(np.float32)
+    assignment = rng.integers(0, len(centers), size=n)
+    vectors = centers[assignment] + 0.3 * rng.normal(size=(n, DIM)).astype(np.float32)
+    query_vectors = centers[rng.integers(0, len(centers), size=queries)] + 0.3 * rng.normal(size=(queries, DIM)).astype(np.float32)
+    return vectors, query_vectors
+
+
+def exact_top_k(vectors: np.ndarray, query_vectors: np.ndarray, k: int):
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = (query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)) @ normed.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+
+def percentile_ms(samples, pct):
+    return float(np.percentile(samples, pct) * 1000)
+
+
+def run_backend(name, collection, vectors, query_vectors, truth, k):
+    ids = [str(i) for i in range(len(vectors))]
+    rss_before = rss_bytes()
+
+    start = time.perf_counter()
+    for i in range(0, len(vectors), BATCH):
+        collection.upsert(ids=ids[i:i + BATCH], embeddings=vectors[i:i + BATCH].tolist())
+    build_s = time.perf_counter() - start
+
+    latencies, hits = [], 0
+    for q, expected in zip(query_vectors, truth):
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[q.tolist()], n_results=k)
+        latencies.append(time.perf_counter() - start)
+        hits += len({int(i) for i in result["ids"][0]} & expected)
+
+    return {
+        "backend": name,
+        "vectors": len(vectors),
+        "build_s": round(build_s, 3),
+        "query_p50_ms": round(percentile_ms(latencies, 50), 3),
+        "query_p95_ms": round(percentile_ms(latencies, 95), 3),
+        "rss_delta_mb": round((rss_bytes() - rss_before) / 1_048_576, 1),
+        f"recall_at_{k}": round(hits / (len(query_vectors) * k), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--json", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    try:
+        import chromadb
+    except ImportError:
+        chromadb = None
+        print("⚠️ chromadb not installed - benchmarking the NumPy index only")
+
+    results = []
+    for n in args.sizes:
+        print(f"\n📊 {n:,} vectors")
+        vectors, query_vectors = make_corpus(n, args.queries)
+        truth = exact_top_k(vectors, query_vectors, args.k)
+
+        tmp = Path(tempfile.mkdtemp(prefix="bench_vectors_"))
+        try:
+            backends = [("numpy", NumpyVectorIndex(tmp / "numpy", dim=DIM, initial_capacity=n))]
+            if chromadb is not None:
+                client = chromadb.PersistentClient(path=str(tmp / "chroma"))
+                backends.append(("chroma", client.get_or_create_collection(
+                    name="bench", metadata={"hnsw:space": "cosine"}
+                )))
+            for name, collection in backends:
+                result = run_backend(name, collection, vectors, query_vectors, truth, args.k)
+                results.append(result)
+                print("   " + "  ".join(f"{key}={value}" for key, value in result.items()))
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+        print(f"\n✅ Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
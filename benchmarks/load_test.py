@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Load test for POST /campaigns/generate
+
+Replays a mix of briefs against the FastAPI app at increasing load levels, either closed loop
+(--concurrency: N clients sending back to back) or open loop (--qps: arrivals at a fixed rate,
+regardless of how fast responses come back). By default the app runs in-process over httpx's
+ASGI transport with the offline stand-ins (local image provider and translation backend with
+simulated latency, hashing embeddings, NumPy vector index) in a scratch workspace; --url targets
+a running server instead (configure its providers yourself).
+
+Per level it reports throughput, p50/p95/p99 latency, the error rate by status, and the
+per-stage time from /metrics, then marks the saturation point: the last level before
+throughput stops growing by --min-gain (closed loop) or falls below 90% of the offered rate
+(open loop). Past that knee, extra load only adds queueing latency.
+
+Usage:
+    python benchmarks/load_test.py                                 # concurrency 1 2 4 8, 30s each
+    python benchmarks/load_test.py --concurrency 1 4 16 --duration 60
+    python benchmarks/load_test.py --qps 0.5 1 2 4 --provider-latency 2 --failure-rate 0.05
+    python benchmarks/load_test.py --briefs workload.json --json load_test.json
+    python benchmarks/load_test.py --url http://localhost:8080 --concurrency 2 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import shutil
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+# Shares the scratch workspace setup with the pipeline benchmark
+from bench_pipeline import environment_info, prepare_workspace
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Default brief mix: product counts, scripts (Latin, Arabic, CJK, Cyrillic) and audiences
+BRIEF_MIX: List[Dict[str, Any]] = [
+    {"products": ["hard hat"], "country_name": "US", "audience": "construction_workers",
+     "message": "Built for the toughest jobs. Safety you can wear."},
+    {"products": ["safety vest", "work gloves"], "country_name": "DE", "audience": "construction_workers",
+     "message": "Be seen on every site."},
+    {"products": ["steel toe boots"], "country_name": "SA", "audience": "construction_workers",
+     "message": "Comfort that lasts the whole shift."},
+    {"products": ["hard hat", "ear protection", "safety vest"], "country_name": "JP", "audience": "construction_workers",
+     "message": "Protection for the whole crew."},
+    {"products": ["work gloves"], "country_name": "RU", "audience": "construction_workers",
+     "message": "Grip and protection in any weather."},
+    {"products": ["safety vest"], "country_name": "BR", "audience": "construction_workers",
+     "message": "Safety first, every day."},
+]
+
+METRIC_LINE = re.compile(r'^(?P<name>[a-z_]+)(?:\{(?P<labels>[^}]*)\})? (?P<value>\S+)$')
+
+
+def load_briefs(path: Optional[Path]) -> List[Dict[str, Any]]:
+    """Briefs from a JSON list or a workload file ({"briefs": [...]}), or the default mix"""
+    if path is None:
+        return BRIEF_MIX
+    data = json.loads(path.read_text())
+    briefs = data["briefs"] if isinstance(data, dict) else data
+    if not briefs:
+        raise SystemExit(f"No briefs in {path}")
+    return briefs
+
+
+def parse_metrics(text: str) -> Dict[str, float]:
+    """Flat {'name{labels}': value} view of the Prometheus text format"""
+    samples = {}
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            key = match["name"] + (f"{{{match['labels']}}}" if match["labels"] else "")
+            samples[key] = float(match["value"])
+    return samples
+
+
+def stage_breakdown(before: Dict[str, float], after: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+    """Mean milliseconds and calls per stage between two /metrics scrapes"""
+    stages = {}
+    for key, total in after.items():
+        match = re.match(r'campaign_stage_duration_seconds_sum\{stage="([^"]+)"\}', key)
+        if not match:
+            continue
+        count_key = key.replace("_sum{", "_count{")
+        calls = after.get(count_key, 0) - before.get(count_key, 0)
+        if calls:
+            stages[match[1]] = {
+                "mean_ms": round((total - before.get(key, 0)) / calls * 1000, 2),
+                "calls": int(calls),
+            }
+    return dict(sorted(stages.items(), key=lambda item: -item[1]["mean_ms"] * item[1]["calls"]))
+
+
+async def scrape(client: httpx.AsyncClient) -> Dict[str, float]:
+    try:
+        response = await client.get("/metrics")
+        return parse_metrics(response.text) if response.status_code == 200 else {}
+    except httpx.HTTPError:
+        return {}
+
+
+async def run_level(client: httpx.AsyncClient, briefs, mode: str, level: float, duration: float, timeout: float, seed: int) -> Dict[str, Any]:
+    """Drive one load level for `duration` seconds (plus draining in-flight requests)"""
+    rng = random.Random(seed)
+    statuses: Counter = Counter()
+    latencies: List[float] = []
+    in_flight = peak_in_flight = 0
+
+    async def send():
+        nonlocal in_flight, peak_in_flight
+        brief = dict(rng.choice(briefs), seed=rng.randrange(2**31))
+        in_flight += 1
+        peak_in_flight = max(peak_in_flight, in_flight)
+        started = time.perf_counter()
+        try:
+            response = await client.post("/campaigns/generate", json=brief, timeout=timeout)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        finally:
+            in_flight -= 1
+        statuses[status] += 1
+        if status == "200":
+            latencies.append(time.perf_counter() - started)
+
+    metrics_before = await scrape(client)
+    started = time.perf_counter()
+    deadline = started + duration
+    if mode == "concurrency":
+        async def client_loop():
+            while time.perf_counter() < deadline:
+                await send()
+        await asyncio.gather(*(client_loop() for _ in range(int(level))))
+    else:
+        # Poisson arrivals at `level` requests per second
+        tasks, next_at = [], started
+        while True:
+            next_at += rng.expovariate(level)
+            if next_at >= deadline:
+                break
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            tasks.append(asyncio.create_task(send()))
+        await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    metrics_after = await scrape(client)
+
+    requests = sum(statuses.values())
+    ok = statuses.get("200", 0)
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "mode": mode,
+        "level": level,
+        "requests": requests,
+        "ok": ok,
+        "error_rate": round(1 - ok / requests, 4) if requests else 0.0,
+        "statuses": dict(statuses),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(ok / elapsed, 3),
+        "offered_rps": level if mode == "qps" else None,
+        "peak_in_flight": peak_in_flight,
+        "latency_ms": {
+            "p50": round(float(np.percentile(ms, 50)), 1) if ms else None,
+            "p95": round(float(np.percentile(ms, 95)), 1) if ms else None,
+            "p99": round(float(np.percentile(ms, 99)), 1) if ms else None,
+            "max": round(max(ms), 1) if ms else None,
+        },
+        "stages": stage_breakdown(metrics_before, metrics_after),
+    }
+
+
+def find_knee(levels: List[Dict[str, Any]], min_gain: float) -> Optional[Dict[str, Any]]:
+    """The last level that still added throughput (or kept up with the offered rate)"""
+    knee = None
+    for level in levels:
+        if level["mode"] == "qps":
+            if level["throughput_rps"] < 0.9 * level["offered_rps"]:
+                break
+        elif knee and level["throughput_rps"] < knee["throughput_rps"] * (1 + min_gain):
+            break
+        knee = level
+    return knee
+
+
+def print_level(result: Dict[str, Any]) -> None:
+    latency = result["latency_ms"]
+    fmt = lambda v: f"{v:>8.0f}" if v is not None else f"{'-':>8}"
+    errors = {status: n for status, n in result["statuses"].items() if status != "200"}
+    print(f"   {result['mode']}={result['level']:<5g} {result['throughput_rps']:>7.2f} rps  "
+          f"p50={fmt(latency['p50'])}ms p95={fmt(latency['p95'])}ms p99={fmt(latency['p99'])}ms  "
+          f"err={result['error_rate']:.1%}{' ' + json.dumps(errors) if errors else ''}  in-flight<={result['peak_in_flight']}")
+    if result["stages"]:
+        top = list(result["stages"].items())[:3]
+        print("      stages: " + ", ".join(f"{stage}={s['mean_ms']}ms x{s['calls']}" for stage, s in top))
+
+
+async def run(args, briefs) -> Dict[str, Any]:
+    mode, levels = ("qps", args.qps) if args.qps else ("concurrency", args.concurrency)
+    results = []
+
+    async def drive(client):
+        print(f"📈 Load test: {mode} {' '.join(f'{level:g}' for level in levels)}, {args.duration:g}s per level, {len(briefs)} briefs")
+        for i, level in enumerate(levels):
+            result = await run_level(client, briefs, mode, level, args.duration, args.timeout, args.seed + i)
+            results.append(result)
+            print_level(result)
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+            await drive(client)
+    else:
+        from app.main import app
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+                await drive(client)
+
+    knee = find_knee(results, args.min_gain)
+    return {"mode": mode, "levels": results, "knee": knee and {"level": knee["level"], "throughput_rps": knee["throughput_rps"]}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8], help="Closed-loop client counts")
+    load.add_argument("--qps", type=float, nargs="+", help="Open-loop arrival rates (requests/s)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per level")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout (s)")
+    parser.add_argument("--briefs", type=Path, help="JSON list of briefs or workload file (default: built-in mix)")
+    parser.add_argument("--url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--provider-latency", type=float, default=1.0, help="Simulated image provider latency (s)")
+    parser.add_argument("--provider-jitter", type=float, default=0.2, help="Simulated image provider jitter (s)")
+    parser.add_argument("--translation-latency", type=float, default=0.3, help="Simulated translation latency (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Simulated image provider failure rate (0-1)")
+    parser.add_argument("--min-gain", type=float, default=0.10, help="Throughput gain that still counts as scaling")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for brief selection and arrivals")
+    parser.add_argument("--json", type=Path, help="Write results to this JSON file")
+    args = parser.parse_args()
+    briefs = load_briefs(args.briefs.resolve() if args.briefs else None)
+    json_path = args.json.resolve() if args.json else None
+
+    workspace = None
+    if not args.url:
+        workspace = prepare_workspace(args)
+        os.environ["LOCAL_PROVIDER_JITTER"] = str(args.provider_jitter)
+        os.environ["LOCAL_PROVIDER_FAILURE_RATE"] = str(args.failure_rate)
+    try:
+        summary = asyncio.run(run(args, briefs))
+    finally:
+        if workspace:
+            os.chdir(REPO_ROOT)
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    knee = summary["knee"]
+    if knee:
+        print(f"\n🎯 Saturation: throughput peaks around {summary['mode']}={knee['level']:g} ({knee['throughput_rps']} rps)")
+    else:
+        print("\n⚠️ Saturated at the lowest level; try lower load")
+
+    if json_path:
+        summary["environment"] = environment_info()
+        summary["config"] = {key: value for key, value in vars(args).items() if key != "json" and key != "briefs"}
+        json_path.write_text(json.dumps(summary, indent=2, default=str))
+        print(f"✅ Results saved to {json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Replay recorded campaign briefs as a regression workload
+
+    extract  Collect the briefs of past campaigns (products, country, audience, message) from the
+             DuckDB campaigns/campaign_products tables and the response_artifact.json files in
+             assets/generated into a workload file. Campaigns found in both are taken once;
+             briefs that no longer validate (e.g. retired country names) are skipped.
+    run      Re-run a workload through generate_campaign with the offline stand-ins (as in
+             bench_pipeline.py) and save per-brief timings. With --baseline, compare at once.
+    compare  Compare two run results brief by brief: the median per-brief change in total time,
+             p50/p95 totals and per-stage p50s. Changes beyond the threshold exit with status 1.
+
+The workload file ({"briefs": [...]}) is also accepted by load_test.py --briefs.
+
+Usage:
+    python benchmarks/replay.py extract --output workload.json --since 2025-10-01 --limit 200
+    python benchmarks/replay.py run workload.json --output replay_main.json
+    python benchmarks/replay.py run workload.json --output replay_branch.json --baseline replay_main.json
+    python benchmarks/replay.py compare replay_main.json replay_branch.json --threshold 0.10
+"""
+
+import argparse
+import ast
+import json
+import os
+import shutil
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import duckdb
+import numpy as np
+
+from bench_pipeline import environment_info, prepare_workspace
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BRIEF_FIELDS = ("products", "country_name", "audience", "message")
+
+# Stage differences below this many milliseconds are treated as noise
+MIN_STAGE_DELTA_MS = 2.0
+
+
+def _legacy_products(value: Optional[str]) -> List[str]:
+    """The legacy schema stored products as str(list)"""
+    try:
+        products = ast.literal_eval(value) if value else []
+    except (ValueError, SyntaxError):
+        return [value]
+    return [str(product) for product in products] if isinstance(products, (list, tuple)) else [str(products)]
+
+
+def briefs_from_duckdb(db_path: Path, since: Optional[datetime]) -> List[Dict[str, Any]]:
+    """
+    Briefs from the campaigns table, products in their original order. Databases the server
+    hasn't migrated yet (one campaigns table with the products as a str(list) and the country
+    as "region") are read as they are.
+    """
+    if not db_path.exists():
+        return []
+    try:
+        conn = duckdb.connect(str(db_path), read_only=True)
+    except duckdb.Error as e:
+        # The running server holds the write lock; fall back to the artifacts
+        print(f"⚠️ Could not open {db_path} ({e}); using response artifacts only")
+        return []
+    try:
+        columns = {
+            (table, column) for table, column in conn.execute(
+                "SELECT table_name, column_name FROM information_schema.columns WHERE table_schema = 'main'"
+            ).fetchall()
+        }
+        if ("campaign_products", "campaign_id") in columns:
+            rows = conn.execute("""
+                SELECT c.campaign_id, c.created_at, c.country_name, c.audience, c.message,
+                       list(p.product ORDER BY p.position) FILTER (WHERE p.product IS NOT NULL)
+                FROM campaigns c LEFT JOIN campaign_products p USING (campaign_id)
+                WHERE ? IS NULL OR c.created_at >= ?
+                GROUP BY ALL
+            """, [since, since]).fetchall()
+        else:
+            country = "country_name" if ("campaigns", "country_name") in columns else "region"
+            rows = [
+                (campaign_id, created_at, country_name, audience, message, _legacy_products(products))
+                for campaign_id, created_at, country_name, audience, message, products in conn.execute(f"""
+                    SELECT campaign_id, created_at, {country}, audience, message, products
+                    FROM campaigns
+                    WHERE ? IS NULL OR created_at >= ?
+                """, [since, since]).fetchall()
+            ]
+    except duckdb.Error as e:
+        print(f"⚠️ Could not read campaigns from {db_path} ({e}); using response artifacts only")
+        return []
+    finally:
+        conn.close()
+    return [
+        {"campaign_id": campaign_id, "created_at": created_at.isoformat() if created_at else None,
+         "products": products or [], "country_name": country_name, "audience": audience, "message": message}
+        for campaign_id, created_at, country_name, audience, message, products in rows
+    ]
+
+
+def briefs_from_artifacts(generated_dir: Path, since: Optional[datetime]) -> List[Dict[str, Any]]:
+    """Briefs from response_artifact.json files (older ones record the country as "region")"""
+    briefs = []
+    for artifact_path in generated_dir.glob("*/response_artifact.json"):
+        try:
+            artifact = json.loads(artifact_path.read_text())
+            request = artifact["request"]
+            created_at = datetime.strptime(artifact["timestamp"], "%Y%m%d_%H%M%S")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Skipping {artifact_path}: {e}")
+            continue
+        if since and created_at < since:
+            continue
+        briefs.append({
+            "campaign_id": artifact.get("campaign_id"),
+            "created_at": created_at.isoformat(),
+            "products": request.get("products") or [],
+            "country_name": request.get("country_name") or request.get("region"),
+            "audience": request.get("audience"),
+            "message": request.get("message"),
+        })
+    return briefs
+
+
+def extract(args) -> None:
+    sys.path.insert(0, str(REPO_ROOT / "backend"))
+    from pydantic import ValidationError
+    from app.models import CampaignBrief
+
+    since = datetime.fromisoformat(args.since) if args.since else None
+    from_db = briefs_from_duckdb(args.db, since)
+    from_artifacts = briefs_from_artifacts(args.artifacts, since)
+
+    seen, briefs, skipped = set(), [], 0
+    for brief in from_db + from_artifacts:
+        if brief["campaign_id"] in seen:
+            continue
+        seen.add(brief["campaign_id"])
+        try:
+            CampaignBrief(**{field: brief[field] for field in BRIEF_FIELDS})
+        except ValidationError:
+            skipped += 1
+            continue
+        briefs.append(brief)
+    briefs.sort(key=lambda brief: brief["created_at"] or "")
+    if args.limit:
+        briefs = briefs[-args.limit:]  # most recent traffic
+
+    args.output.write_text(json.dumps({
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "source": {"duckdb": len(from_db), "artifacts": len(from_artifacts), "skipped_invalid": skipped},
+        "briefs": briefs,
+    }, indent=2))
+    print(f"✅ {len(briefs)} briefs ({len(from_db)} from DuckDB, {len(from_artifacts)} from artifacts, "
+          f"{skipped} invalid skipped) written to {args.output}")
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    ok = [result for result in results if result["status"] == 200]
+    totals = [result["total_ms"] for result in ok]
+    stages: Dict[str, List[float]] = {}
+    for result in ok:
+        for stage, ms in result["stages"].items():
+            stages.setdefault(stage, []).append(ms)
+    return {
+        "briefs": len(results),
+        "ok": len(ok),
+        "total_ms": {
+            "p50": round(float(np.percentile(totals, 50)), 2) if totals else None,
+            "p95": round(float(np.percentile(totals, 95)), 2) if totals else None,
+            "sum": round(sum(totals), 2),
+        },
+        "stages_p50_ms": {stage: round(float(np.percentile(ms, 50)), 2) for stage, ms in sorted(stages.items())},
+    }
+
+
+def replay(args) -> None:
+    workload = json.loads(args.workload.read_text())
+    briefs = workload["briefs"] if isinstance(workload, dict) else workload
+    output = args.output.resolve()
+    baseline = args.baseline.resolve() if args.baseline else None
+
+    workspace = prepare_workspace(args)
+    from fastapi import HTTPException
+    from app.models import CampaignBrief
+    from app.routes import generate_campaign
+    from app.services import logging_db
+
+    logging_db.init_db()
+    results = []
+    try:
+        print(f"🔁 Replaying {len(briefs)} briefs x{args.repeat}")
+        for index, recorded in enumerate(briefs):
+            brief = CampaignBrief(**{field: recorded[field] for field in BRIEF_FIELDS}, seed=index)
+            runs = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                try:
+                    result = generate_campaign(brief, profile=None)
+                    runs.append({"status": 200, "total_ms": result.metadata["timings"]["total_ms"],
+                                 "stages": {stage: t["ms"] for stage, t in result.metadata["timings"]["stages"].items()}})
+                except HTTPException as e:
+                    runs.append({"status": e.status_code, "total_ms": round((time.perf_counter() - started) * 1000, 2), "stages": {}})
+            # Median run per brief damps one-off stalls
+            median = sorted(runs, key=lambda run: run["total_ms"])[len(runs) // 2]
+            results.append({"key": recorded.get("campaign_id") or str(index), "country_name": brief.country_name,
+                            "products": len(brief.products), **median})
+            if (index + 1) % 10 == 0:
+                print(f"   {index + 1}/{len(briefs)}")
+    finally:
+        logging_db.close_db()
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    report = {
+        "environment": environment_info(),
+        "workload": str(args.workload),
+        "config": {"repeat": args.repeat, "provider_latency": args.provider_latency,
+                   "translation_latency": args.translation_latency},
+        "summary": summarize(results),
+        "results": results,
+    }
+    output.write_text(json.dumps(report, indent=2))
+    summary = report["summary"]
+    print(f"✅ {summary['ok']}/{summary['briefs']} briefs succeeded, p50={summary['total_ms']['p50']}ms "
+          f"p95={summary['total_ms']['p95']}ms; results saved to {output}")
+
+    if baseline:
+        regressions = compare_reports(json.loads(baseline.read_text()), report, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+def compare_reports(before: Dict[str, Any], after: Dict[str, Any], threshold: float) -> List[str]:
+    """Print a brief-by-brief comparison and return the regressions beyond `threshold`"""
+    before_by_key = {result["key"]: result for result in before["results"] if result["status"] == 200}
+    paired = [(before_by_key[result["key"]], result) for result in after["results"]
+              if result["status"] == 200 and result["key"] in before_by_key]
+    if not paired:
+        print("⚠️ No successful briefs in common")
+        return []
+
+    ratios = [b["total_ms"] / a["total_ms"] for a, b in paired if a["total_ms"]]
+    median_change = statistics.median(ratios) - 1
+    print(f"\n📊 {before['environment'].get('commit')} -> {after['environment'].get('commit')}: "
+          f"{len(paired)} briefs compared, median per-brief change {median_change:+.1%}")
+
+    regressions = []
+    if median_change > threshold:
+        regressions.append(f"median per-brief total_ms {median_change:+.1%}")
+    for metric in ("p50", "p95"):
+        a, b = before["summary"]["total_ms"][metric], after["summary"]["total_ms"][metric]
+        if a and b:
+            change = b / a - 1
+            print(f"   total_ms.{metric}: {a} -> {b} ({change:+.1%})")
+            if change > threshold:
+                regressions.append(f"total_ms.{metric} {a} -> {b} ({change:+.1%})")
+    for stage, b in after["summary"]["stages_p50_ms"].items():
+        a = before["summary"]["stages_p50_ms"].get(stage)
+        if a and b / a - 1 > threshold and b - a >= MIN_STAGE_DELTA_MS:
+            regressions.append(f"stages.{stage}.p50_ms {a} -> {b} ({b / a - 1:+.1%})")
+
+    worst = sorted(paired, key=lambda pair: pair[1]["total_ms"] / max(pair[0]["total_ms"], 1e-9), reverse=True)[:5]
+    print("   slowest relative to baseline: " + ", ".join(
+        f"{b['key'][:8]} ({b['country_name']}, {b['products']}p) {b['total_ms'] / a['total_ms'] - 1:+.0%}" for a, b in worst
+    ))
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {threshold:.0%}:")
+        for line in regressions:
+            print(f"   {line}")
+    else:
+        print(f"✅ No regressions beyond {threshold:.0%}")
+    return regressions
+
+
+def compare(args) -> None:
+    regressions = compare_reports(json.loads(args.before.read_text()), json.loads(args.after.read_text()), args.threshold)
+    sys.exit(1 if regressions else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    extract_parser = commands.add_parser("extract", help="Build a workload file from recorded campaigns")
+    extract_parser.add_argument("--db", type=Path, default=REPO_ROOT / "db" / "campaigns.duckdb")
+    extract_parser.add_argument("--artifacts", type=Path, default=REPO_ROOT / "assets" / "generated")
+    extract_parser.add_argument("--since", help="Only campaigns created at or after this ISO date/time")
+    extract_parser.add_argument("--limit", type=int, help="Keep the most recent N briefs")
+    extract_parser.add_argument("--output", type=Path, default=Path("workload.json"))
+    extract_parser.set_defaults(func=extract)
+
+    run_parser = commands.add_parser("run", help="Replay a workload with the offline stand-ins")
+    run_parser.add_argument("workload", type=Path)
+    run_parser.add_argument("--output", type=Path, default=Path("replay_results.json"))
+    run_parser.add_argument("--repeat", type=int, default=1, help="Runs per brief (median kept)")
+    run_parser.add_argument("--provider-latency", type=float, default=0.0, help="Simulated image provider latency (s)")
+    run_parser.add_argument("--translation-latency", type=float, default=0.0, help="Simulated translation latency (s)")
+    run_parser.add_argument("--baseline", type=Path, help="Earlier run results to compare against")
+    run_parser.add_argument("--threshold", type=float, default=0.10, help="Tolerated relative slowdown")
+    run_parser.set_defaults(func=replay)
+
+    compare_parser = commands.add_parser("compare", help="Compare two run results")
+    compare_parser.add_argument("before", type=Path)
+    compare_parser.add_argument("after", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Tolerated relative slowdown")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Parquet Export
+
+Exports campaign history from the master manifest into date-partitioned Parquet files
+under db/parquet (campaigns, campaign_products, campaign_variants, campaign_usage) using DuckDB.
+Runs incrementally: only campaigns not exported before are appended as new part files.
+
+Usage:
+    python export_parquet.py           # append new campaigns
+    python export_parquet.py --full    # rewrite the whole export
+
+Query the export directly, e.g.:
+    duckdb -c "SELECT * FROM read_parquet('db/parquet/campaigns/*/*.parquet', hive_partitioning = true)"
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from app.services.parquet_export import EXPORT_DIR, export_campaigns, images_per_country_per_week
+
+def main():
+    parser = argparse.ArgumentParser(description="Export campaign history to partitioned Parquet files")
+    parser.add_argument("--full", action="store_true", help="Delete the existing export and export every campaign again")
+    args = parser.parse_args()
+    
+    print("🚀 Exporting campaign history to Parquet...")
+    try:
+        result = export_campaigns(full=args.full)
+    except Exception as e:
+        print(f"❌ Error exporting campaigns: {e}")
+        sys.exit(1)
+    
+    print(f"✅ Export written to: {EXPORT_DIR}")
+    print(f"📊 Rows appended:")
+    for table, rows in result["rows"].items():
+        print(f"   - {table}: {rows}")
+    
+    print(f"🌍 Images per country per week:")
+    for row in images_per_country_per_week():
+        print(f"   - {row['week']} {row['country_name']}: {row['images']} images ({row['campaigns']} campaigns)")
+
+if __name__ == "__main__":
+    main()
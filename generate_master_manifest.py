@@ -1,48 +1,69 @@
 #!/usr/bin/env python3
 """
-Master Manifest Generator
+Master Manifest Generator (recovery tool)
 
-This script creates a master_manifest.json that concatenates all response_artifact.json files
-from the assets/generated directory, providing a comprehensive overview of all campaigns.
+The master manifest is maintained incrementally: every finished campaign is appended to
+assets/generated/master_manifest.jsonl and periodically compacted into master_manifest.json
+(see backend/app/services/manifest_store.py).
+
+This script rebuilds master_manifest.json from scratch by concatenating all response_artifact.json
+files in the assets/generated directory. Use it to recover from a lost or corrupted manifest.
+The snapshot is written atomically and the incremental log is cleared.
+
+Directories are listed with os.scandir (one stat per artifact), artifacts unchanged since the
+previous snapshot (same mtime and size) are reused without parsing, and the rest are parsed
+in a thread or process pool.
+
+Usage:
+    python generate_master_manifest.py                  # incremental, thread pool
+    python generate_master_manifest.py --full           # reparse every artifact
+    python generate_master_manifest.py --executor process --workers 8
 """
 
+import argparse
 import json
 import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from app.services.manifest_store import MANIFEST_PATH, build_manifest_info, manifest_entry, read_snapshot, write_snapshot
 
-def find_response_artifacts() -> List[Path]:
-    """Find all response_artifact.json files in the generated campaigns directory"""
+def find_response_artifacts() -> List[Tuple[Path, os.stat_result]]:
+    """Find all response_artifact.json files in the generated campaigns directory, with their stat results"""
     generated_dir = Path("assets/generated")
     if not generated_dir.exists():
         print("❌ No assets/generated directory found")
         return []
     
     artifacts = []
-    for campaign_dir in generated_dir.iterdir():
-        if campaign_dir.is_dir():
-            artifact_path = campaign_dir / "response_artifact.json"
-            if artifact_path.exists():
-                artifacts.append(artifact_path)
+    with os.scandir(generated_dir) as entries:
+        for entry in entries:
+            # is_dir() uses the cached d_type from the directory listing (no extra syscall)
+            if not entry.is_dir():
+                continue
+            artifact_path = Path(entry.path) / "response_artifact.json"
+            try:
+                artifacts.append((artifact_path, os.stat(artifact_path)))
+            except FileNotFoundError:
+                continue
     
-    return sorted(artifacts, key=lambda x: x.stat().st_mtime, reverse=True)  # Most recent first
+    return sorted(artifacts, key=lambda item: item[1].st_mtime, reverse=True)  # Most recent first
 
-def load_artifact(artifact_path: Path) -> Dict[str, Any]:
+def load_artifact(artifact_path: Path, stat: Optional[os.stat_result] = None) -> Dict[str, Any]:
     """Load and parse a response artifact JSON file"""
     try:
         with open(artifact_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
         # Add metadata about the file
-        data['_manifest_metadata'] = {
-            'file_path': str(artifact_path),
-            'file_size': artifact_path.stat().st_size,
-            'last_modified': datetime.fromtimestamp(artifact_path.stat().st_mtime).isoformat(),
-            'campaign_directory': str(artifact_path.parent)
-        }
-        
-        return data
+        return manifest_entry(data, artifact_path, stat)
     except Exception as e:
         print(f"⚠️ Error loading {artifact_path}: {e}")
         return {
@@ -51,85 +72,95 @@ def load_artifact(artifact_path: Path) -> Dict[str, Any]:
             '_manifest_metadata': {
                 'file_path': str(artifact_path),
                 'error': True,
-                'last_modified': datetime.fromtimestamp(artifact_path.stat().st_mtime).isoformat()
+                'last_modified': datetime.fromtimestamp(stat.st_mtime if stat else artifact_path.stat().st_mtime).isoformat()
             }
         }
 
-def generate_master_manifest() -> Dict[str, Any]:
+def _load_artifact_job(job: Tuple[str, os.stat_result]) -> Dict[str, Any]:
+    """Picklable wrapper so load_artifact can run in a process pool"""
+    path, stat = job
+    return load_artifact(Path(path), stat)
+
+def previous_entries() -> Dict[str, Dict[str, Any]]:
+    """Entries of the current snapshot keyed by artifact path, for skipping unchanged files"""
+    try:
+        snapshot = read_snapshot()
+    except Exception as e:
+        print(f"⚠️ Could not read previous manifest, reparsing everything: {e}")
+        return {}
+    entries = {}
+    for campaign in snapshot.get('campaigns', []):
+        metadata = campaign.get('_manifest_metadata', {})
+        if 'error' not in campaign and metadata.get('file_path') and metadata.get('mtime_ns') is not None:
+            entries[metadata['file_path']] = campaign
+    return entries
+
+def generate_master_manifest(full: bool = False, executor: str = "thread", workers: Optional[int] = None) -> Dict[str, Any]:
     """Generate the master manifest by concatenating all response artifacts"""
     print("🔍 Scanning for response artifacts...")
+    started = time.perf_counter()
     artifacts = find_response_artifacts()
     
     if not artifacts:
         print("❌ No response artifacts found")
         return {
-            'error': 'No response artifacts found',
-            'generated_at': datetime.now().isoformat(),
-            'total_campaigns': 0,
+            'manifest_info': build_manifest_info([]),
             'campaigns': []
         }
     
     print(f"📁 Found {len(artifacts)} response artifacts")
     
-    # Load all artifacts
-    campaigns = []
-    total_images = 0
-    total_products = 0
-    regions = set()
-    audiences = set()
-    
-    for artifact_path in artifacts:
-        print(f"📄 Loading {artifact_path.name} from {artifact_path.parent.name}")
-        campaign_data = load_artifact(artifact_path)
-        
-        if 'error' not in campaign_data:
-            campaigns.append(campaign_data)
-            
-            # Aggregate statistics
-            if 'response' in campaign_data and 'outputs' in campaign_data['response']:
-                for product, sizes in campaign_data['response']['outputs'].items():
-                    total_products += 1
-                    total_images += len(sizes)
-            
-            if 'request' in campaign_data:
-                if 'region' in campaign_data['request']:
-                    regions.add(campaign_data['request']['region'])
-                if 'audience' in campaign_data['request']:
-                    audiences.add(campaign_data['request']['audience'])
+    # Reuse entries whose artifact has the same mtime and size as in the previous snapshot
+    previous = {} if full else previous_entries()
+    campaigns: List[Optional[Dict[str, Any]]] = [None] * len(artifacts)
+    to_parse = []
+    for position, (artifact_path, stat) in enumerate(artifacts):
+        cached = previous.get(str(artifact_path))
+        cached_metadata = cached.get('_manifest_metadata', {}) if cached else {}
+        if cached and cached_metadata.get('mtime_ns') == stat.st_mtime_ns and cached_metadata.get('file_size') == stat.st_size:
+            campaigns[position] = cached
         else:
-            campaigns.append(campaign_data)
+            to_parse.append(position)
+    
+    # Parse the rest in parallel (processes sidestep the GIL for JSON decoding on large rebuilds)
+    pool_class: type[Executor] = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    jobs = [(str(artifacts[position][0]), artifacts[position][1]) for position in to_parse]
+    if jobs:
+        with pool_class(max_workers=workers) as pool:
+            for position, campaign in zip(to_parse, pool.map(_load_artifact_job, jobs, chunksize=32 if executor == "process" else 1)):
+                campaigns[position] = campaign
+    
+    elapsed = time.perf_counter() - started
+    rate = len(artifacts) / elapsed if elapsed > 0 else float('inf')
+    print(f"📄 Parsed {len(to_parse)} artifacts, reused {len(artifacts) - len(to_parse)} unchanged "
+          f"({elapsed:.2f}s, {rate:,.0f} files/s, {executor} pool)")
     
     # Create master manifest
     master_manifest = {
-        'manifest_info': {
-            'generated_at': datetime.now().isoformat(),
-            'total_campaigns': len(campaigns),
-            'total_images': total_images,
-            'total_products': total_products,
-            'unique_regions': sorted(list(regions)),
-            'unique_audiences': sorted(list(audiences)),
-            'generator_version': '1.0.0',
-            'description': 'Master manifest concatenating all campaign response artifacts'
-        },
+        'manifest_info': build_manifest_info(campaigns),
         'campaigns': campaigns
     }
     
     return master_manifest
 
 def main():
-    """Main function to generate and save the master manifest"""
-    print("🚀 Generating Master Manifest...")
+    """Main function to rebuild and save the master manifest"""
+    parser = argparse.ArgumentParser(description="Rebuild the master manifest from response artifacts")
+    parser.add_argument("--full", action="store_true", help="Reparse every artifact, ignoring the previous manifest")
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread", help="Pool used for parsing")
+    parser.add_argument("--workers", type=int, default=None, help="Pool size (default: Python's choice for the pool)")
+    args = parser.parse_args()
+    
+    print("🚀 Rebuilding Master Manifest...")
     
     # Generate the manifest
-    manifest = generate_master_manifest()
+    manifest = generate_master_manifest(full=args.full, executor=args.executor, workers=args.workers)
     
-    # Save to file
-    output_path = Path("assets/generated/master_manifest.json")
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    # Save to file (atomic replace; also clears the incremental log it supersedes)
+    output_path = MANIFEST_PATH
     
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        write_snapshot(manifest)
         
         print(f"✅ Master manifest saved to: {output_path}")
         print(f"📊 Summary:")
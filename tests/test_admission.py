@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test script for admission control: bounded campaign queue, rejections and per-provider slots
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+
+def _limit_campaigns(monkeypatch, max_concurrent: int, queue_size: int, queue_timeout: float = 30.0):
+    """Tighten the server's admission limits for one test (restored by monkeypatch)"""
+    from app.services import admission
+
+    controller = admission._controller
+    monkeypatch.setattr(controller, "max_concurrent", max_concurrent)
+    monkeypatch.setattr(controller, "queue_size", queue_size)
+    monkeypatch.setattr(controller, "queue_timeout", queue_timeout)
+    return controller
+
+
+def test_queue_rejections(monkeypatch):
+    """A full queue is rejected with 429, a queue wait that times out with 503"""
+    print("🧪 Testing Admission Queue")
+    print("=" * 40)
+
+    from app.services.admission import AdmissionRejected, admit_campaign, release_campaign
+    from app.services.metrics import ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED, render_prometheus
+
+    controller = _limit_campaigns(monkeypatch, max_concurrent=1, queue_size=1, queue_timeout=0.2)
+    rejected_before = {status: ADMISSION_REJECTED.value(status=status) for status in ("429", "503")}
+    assert admit_campaign() < 0.05
+
+    # One request queues and times out; while it waits, the next finds the queue full
+    outcomes = {}
+
+    def queued():
+        try:
+            admit_campaign()
+            outcomes["queued"] = "admitted"
+        except AdmissionRejected as e:
+            outcomes["queued"] = e
+
+    try:
+        waiter = threading.Thread(target=queued)
+        waiter.start()
+        while controller.waiting == 0:
+            time.sleep(0.005)
+        assert ADMISSION_QUEUE_DEPTH.value() == 1
+        try:
+            admit_campaign()
+            assert False, "a full queue should reject"
+        except AdmissionRejected as e:
+            assert e.status_code == 429 and e.retry_after >= 1
+        waiter.join()
+
+        rejected = outcomes["queued"]
+        assert isinstance(rejected, AdmissionRejected) and rejected.status_code == 503
+        assert controller.waiting == 0 and ADMISSION_QUEUE_DEPTH.value() == 0
+        assert ADMISSION_REJECTED.value(status="429") == rejected_before["429"] + 1
+        assert ADMISSION_REJECTED.value(status="503") == rejected_before["503"] + 1
+
+        # A release hands the slot to the next waiter
+        waiter = threading.Thread(target=queued)
+        waiter.start()
+        while controller.waiting == 0:
+            time.sleep(0.005)
+        release_campaign()
+        waiter.join()
+        assert outcomes["queued"] == "admitted" and controller.in_flight == 1
+    finally:
+        release_campaign()
+
+    assert controller.in_flight == 0
+    assert "# TYPE admission_queue_depth gauge" in render_prometheus()
+    print("✅ 429 when full, 503 after the queue timeout, slots handed over on release")
+
+
+def test_route_returns_retry_after(monkeypatch):
+    """A rejected campaign returns its status with a Retry-After header"""
+    print("\n🧪 Testing Rejected Campaign Response")
+    print("=" * 40)
+
+    # Offline embeddings and vector index, so the app imports without the model or ChromaDB
+    monkeypatch.setenv("EMBEDDING_MODEL", "local")
+    monkeypatch.setenv("VECTOR_BACKEND", "numpy")
+    from fastapi.testclient import TestClient
+    from app.services import admission
+
+    brief = {"products": ["vest"], "country_name": "US", "audience": "construction_workers", "message": "Be seen"}
+    _limit_campaigns(monkeypatch, max_concurrent=1, queue_size=0)
+    admission.admit_campaign()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            monkeypatch.chdir(tmp)
+            from app.main import app
+
+            response = TestClient(app).post("/campaigns/generate", json=brief)
+    finally:
+        admission.release_campaign()
+    assert response.status_code == 429, response.text
+    assert int(response.headers["Retry-After"]) >= 1
+    print(f"✅ 429 with Retry-After: {response.headers['Retry-After']}s")
+
+
+def test_provider_slots(monkeypatch):
+    """In-flight calls per provider stay under its limit; a call that finds no slot fails over"""
+    print("\n🧪 Testing Provider Slots")
+    print("=" * 40)
+
+    from app.services.admission import parse_provider_limits, provider_slot, set_provider_limit
+    from app.services.metrics import PROVIDER_IN_FLIGHT
+    from app.services.providers import ProviderError
+    from app.services import admission
+
+    assert parse_provider_limits("huggingface=4, openai=2,local=0,") == {"huggingface": 4, "openai": 2}
+
+    set_provider_limit("test_provider", 2)
+    lock = threading.Lock()
+    running = peak = 0
+
+    def call():
+        nonlocal running, peak
+        with provider_slot("test_provider"):
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == 2, peak
+    assert PROVIDER_IN_FLIGHT.value(provider="test_provider") == 0
+
+    # The only slot held: a second call gives up after the slot timeout
+    set_provider_limit("test_provider", 1)
+    monkeypatch.setattr(admission, "PROVIDER_SLOT_TIMEOUT", 0.05)
+    try:
+        with provider_slot("test_provider"):
+            try:
+                with provider_slot("test_provider"):
+                    assert False, "the slot is taken"
+            except ProviderError:
+                pass
+    finally:
+        set_provider_limit("test_provider", None)
+
+    # Unlisted providers are not limited
+    with provider_slot("unlimited_provider"), provider_slot("unlimited_provider"):
+        pass
+    print(f"✅ Peak in-flight {peak} with limit 2; busy provider raises ProviderError")
+
+
+if __name__ == "__main__":
+    import pytest
+
+    for test in (test_queue_rejections, test_route_returns_retry_after, test_provider_slots):
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            test(monkeypatch)
+    print("\n🎉 All admission tests passed!")
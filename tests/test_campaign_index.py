@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for the incremental master manifest and the in-memory campaign index
+used to enrich search results.
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+
+def _use_tmp_manifest(monkeypatch, tmp: str):
+    from app.services import manifest_store, campaign_index
+
+    generated = Path(tmp)
+    monkeypatch.setattr(manifest_store, "MANIFEST_PATH", generated / "master_manifest.json")
+    monkeypatch.setattr(manifest_store, "LOG_PATH", generated / "master_manifest.jsonl")
+    monkeypatch.setattr(manifest_store, "LOCK_PATH", generated / ".master_manifest.lock")
+    campaign_index.invalidate()
+    return manifest_store, campaign_index
+
+
+def _artifact(tmp: str, campaign_id: str):
+    campaign_dir = Path(tmp) / f"campaign_{campaign_id}"
+    campaign_dir.mkdir(parents=True, exist_ok=True)
+    artifact = {
+        "campaign_id": campaign_id,
+        "request": {"country_name": "US", "audience": "workers", "products": ["hat"]},
+        "response": {"outputs": {"hat": {"1:1": "a.png", "16:9": "b.png", "9:16": "c.png"}}},
+    }
+    path = campaign_dir / "response_artifact.json"
+    path.write_text(json.dumps(artifact))
+    return artifact, path
+
+
+def test_incremental_manifest(monkeypatch):
+    """Committed campaigns are visible immediately and compaction keeps them"""
+    print("🧪 Testing Incremental Master Manifest")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest_store, _ = _use_tmp_manifest(monkeypatch, tmp)
+        monkeypatch.setattr(manifest_store, "MANIFEST_COMPACT_EVERY", 3)
+
+        for campaign_id in ["a", "b"]:
+            manifest_store.record_campaign(*_artifact(tmp, campaign_id))
+        assert not manifest_store.MANIFEST_PATH.exists()
+
+        manifest = manifest_store.load_manifest()
+        assert [c["campaign_id"] for c in manifest["campaigns"]] == ["b", "a"]
+        assert manifest["manifest_info"]["total_images"] == 6
+
+        # Third commit reaches the threshold: log is folded into the snapshot
+        manifest_store.record_campaign(*_artifact(tmp, "c"))
+        assert manifest_store.MANIFEST_PATH.exists() and not manifest_store.LOG_PATH.exists()
+        snapshot = json.loads(manifest_store.MANIFEST_PATH.read_text())
+        assert [c["campaign_id"] for c in snapshot["campaigns"]] == ["c", "b", "a"]
+        assert snapshot["manifest_info"]["unique_regions"] == ["US"]
+    print("✅ Manifest log and compaction work")
+
+
+def test_campaign_index_follows_manifest(monkeypatch):
+    """The index is served from memory and follows snapshot rewrites and log appends"""
+    print("\n🧪 Testing Campaign Index")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest_store, campaign_index = _use_tmp_manifest(monkeypatch, tmp)
+        monkeypatch.setattr(manifest_store, "MANIFEST_COMPACT_EVERY", 100)
+
+        manifest_store.write_snapshot({"manifest_info": {}, "campaigns": [{"campaign_id": "a"}, {"campaign_id": "b"}]})
+        assert set(campaign_index.get_campaigns(["a", "b", "zzz"])) == {"a", "b"}
+
+        # Newly committed campaigns are read from the log tail
+        manifest_store.record_campaign(*_artifact(tmp, "c"))
+        campaign = campaign_index.get_campaign("c")
+        assert campaign["_manifest_metadata"]["campaign_directory"].endswith("campaign_c")
+
+        # A rebuild that includes the logged campaign replaces the snapshot and clears the log
+        manifest_store.write_snapshot({"manifest_info": {}, "campaigns": [{"campaign_id": x} for x in "abcd"]})
+        assert not manifest_store.LOG_PATH.exists()
+        assert campaign_index.get_campaign("d") is not None
+        assert campaign_index.get_campaign("c") is not None
+
+        campaign_index.invalidate()
+    print("✅ Campaign index lookups and invalidation work")
+
+
+def test_paginated_filtered_listing(monkeypatch):
+    """Cursor pages cover every matching campaign exactly once, newest first"""
+    print("\n🧪 Testing Paginated Manifest Listing")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest_store, campaign_index = _use_tmp_manifest(monkeypatch, tmp)
+        campaigns = [
+            {
+                "campaign_id": f"c{i}",
+                "timestamp": f"20251015_1200{i:02d}",
+                "request": {"country_name": "US" if i % 2 else "FR", "audience": "workers", "products": ["Hat"]},
+                "response": {"compliance": {"status": "approved"}},
+            }
+            for i in range(7)
+        ]
+        manifest_store.write_snapshot({"manifest_info": {}, "campaigns": campaigns})
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = campaign_index.list_campaigns(limit=2, cursor=cursor)
+            seen.extend(c["campaign_id"] for c in page)
+            if cursor is None:
+                break
+        assert seen == [f"c{i}" for i in reversed(range(7))]
+
+        page, cursor = campaign_index.list_campaigns(limit=10, sort="asc", country_name="US", product="hat")
+        assert [c["campaign_id"] for c in page] == ["c1", "c3", "c5"] and cursor is None
+
+        page, _ = campaign_index.list_campaigns(limit=10, compliance_status="failed")
+        assert page == []
+
+        assert campaign_index.get_manifest_info()["total_campaigns"] == 7
+        campaign_index.invalidate()
+    print("✅ Cursor pagination and filters work")
+
+
+if __name__ == "__main__":
+    import pytest
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_incremental_manifest(monkeypatch)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_campaign_index_follows_manifest(monkeypatch)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_paginated_filtered_listing(monkeypatch)
+    print("\n🎉 All manifest and campaign index tests passed!")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test script for per-campaign deadlines: budgets, call timeouts and stages cut to meet them
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+
+def test_budget_and_timeouts():
+    """The tighter of brief and server budgets applies; call timeouts shrink with the budget"""
+    print("🧪 Testing Deadline Budget")
+    print("=" * 40)
+
+    from app.models import CampaignBrief
+    from app.services import deadline
+
+    deadline.CAMPAIGN_DEADLINE_SECONDS = 60.0
+    try:
+        assert deadline.effective_budget(None) == 60.0
+        assert deadline.effective_budget(20.0) == 20.0
+        assert deadline.effective_budget(120.0) == 60.0
+    finally:
+        deadline.CAMPAIGN_DEADLINE_SECONDS = 0.0
+    assert deadline.effective_budget(None) is None
+
+    try:
+        CampaignBrief(products=["vest"], country_name="US", audience="a", message="m", deadline_seconds=0)
+        assert False, "a non-positive deadline should be rejected"
+    except ValueError:
+        pass
+
+    # No deadline: nothing is capped or reported
+    assert deadline.call_timeout(30) == 30 and deadline.covers("provider_call") and deadline.deadline_report() is None
+
+    token = deadline.start_deadline(10.0)
+    try:
+        assert 9.0 < deadline.call_timeout(30) <= 10.0
+        assert deadline.call_timeout(None) <= 10.0
+        assert not deadline.expired()
+    finally:
+        deadline.end_deadline(token)
+    print("✅ Budgets and timeouts follow the deadline")
+
+
+def test_stages_are_cut_when_out_of_time():
+    """Translation degrades, extra variants are skipped and image generation stops once time is up"""
+    print("\n🧪 Testing Stage Cuts")
+    print("=" * 40)
+
+    from app.services import deadline, generator
+    from app.services.metrics import STAGE_CUTS
+    from app.services.providers import generate_with_local
+
+    token = deadline.start_deadline(0.01)
+    time.sleep(0.02)
+    try:
+        assert deadline.expired()
+        # Untranslated copy instead of an LLM call
+        assert generator.translate_message_with_llm("Stay safe", "JP") == "Stay safe"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            base_image = Path(tmp) / "base_image.png"
+            base_image.write_bytes(generate_with_local("boots", 256, 256, seed=4)[0])
+            outputs = generator.create_size_variants(str(base_image), "c1", "boots", "US", "Stay safe", campaign_dir=Path(tmp))
+            assert list(outputs) == ["1:1"]
+
+            os.environ["IMAGE_PROVIDERS"] = "local"
+            try:
+                generator.generate_single_image("boots", "c1", "boots", "US", campaign_dir=Path(tmp))
+                assert False, "no image should be generated after the deadline"
+            except deadline.DeadlineExceeded:
+                pass
+            finally:
+                del os.environ["IMAGE_PROVIDERS"]
+
+        report = deadline.deadline_report()
+    finally:
+        deadline.end_deadline(token)
+
+    assert report["exceeded"] and report["budget_s"] == 0.01
+    cuts = {(c["stage"], c["action"], c.get("detail")): c["count"] for c in report["cuts"]}
+    assert cuts[("translation", "degraded", "original message used")] == 1
+    assert ("variant", "skipped", "16:9") in cuts and ("variant", "skipped", "9:16") in cuts
+    assert STAGE_CUTS.value(stage="variant", action="skipped") >= 2
+    print(f"✅ {len(cuts)} stage cuts reported")
+
+
+def test_cut_translation_is_not_billed(monkeypatch):
+    """A campaign whose translation is cut reports no LLM usage, not the previous campaign's"""
+    print("\n🧪 Testing Usage of a Degraded Campaign")
+    print("=" * 40)
+
+    for name, value in {"IMAGE_PROVIDERS": "local", "TRANSLATION_BACKEND": "local",
+                        "EMBEDDING_MODEL": "local", "VECTOR_BACKEND": "numpy"}.items():
+        monkeypatch.setenv(name, value)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "frontend").symlink_to(Path(__file__).parent.parent / "frontend", target_is_directory=True)
+        monkeypatch.chdir(tmp)
+        from app.models import CampaignBrief
+        from app.routes import generate_campaign
+        from app.services import embeddings, generator, logging_db
+        from app.services.vector_index import NumpyVectorIndex
+
+        index = NumpyVectorIndex(Path(tmp) / "vectors", dim=embeddings.model.get_sentence_embedding_dimension())
+        monkeypatch.setattr(embeddings, "collection", index)
+        logging_db.close_db()
+        monkeypatch.setattr(logging_db, "DB_PATH", Path(tmp) / "campaigns.duckdb")
+        logging_db.init_db()
+        try:
+            brief = dict(products=["hard hat"], country_name="JP", audience="construction_workers",
+                         message="Built for the toughest jobs. Safety you can wear.")
+            translated = generate_campaign(CampaignBrief(**brief), None)
+            assert translated.metadata["cost_usd"] > 0
+
+            # Enough time for everything but the translation
+            monkeypatch.setattr(generator, "covers", lambda *stages: "translation" not in stages)
+            degraded = generate_campaign(CampaignBrief(**brief, deadline_seconds=60), None)
+        finally:
+            logging_db.close_db()
+
+    assert degraded.metadata["cost_usd"] == 0.0
+    assert degraded.metadata["llm_usage"]["total_tokens"] == 0
+    assert any(c["stage"] == "translation" for c in degraded.metadata["deadline"]["cuts"])
+    print("✅ A cut translation costs nothing")
+
+
+if __name__ == "__main__":
+    import pytest
+
+    test_budget_and_timeouts()
+    test_stages_are_cut_when_out_of_time()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_cut_translation_is_not_billed(monkeypatch)
+    print("\n🎉 All deadline tests passed!")
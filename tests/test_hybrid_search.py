@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Test script for hybrid campaign search: reciprocal rank fusion and filtered keyword search.
+"""
+
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+
+def test_reciprocal_rank_fusion():
+    """Items ranked well in both lists should beat items ranked well in only one"""
+    print("🧪 Testing Reciprocal Rank Fusion")
+    print("=" * 40)
+
+    from app.services.search import reciprocal_rank_fusion
+
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "a"]])
+    ids = [item_id for item_id, _ in fused]
+    print(f"📊 Fused order: {ids}")
+
+    assert ids[:2] == ["b", "a"] or ids[:2] == ["a", "b"]
+    assert set(ids) == {"a", "b", "c", "d"}
+    assert fused[0][1] == 1 / 61 + 1 / 62
+    print("✅ RRF ordering is correct")
+
+
+def test_keyword_search_filters(monkeypatch):
+    """Keyword search should honour country/audience/product filters inside the query"""
+    print("\n🧪 Testing Filtered Keyword Search")
+    print("=" * 40)
+
+    from app.services import logging_db
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logging_db.close_db()
+        monkeypatch.setattr(logging_db, "DB_PATH", Path(tmp) / "campaigns.duckdb")
+        logging_db.init_db()
+
+        briefs = [
+            ("c1", ["hard hat"], "US", "construction_workers", "Stay safe on site with our hard hat"),
+            ("c2", ["hard hat"], "DE", "construction_workers", "Hard hat protection for every shift"),
+            ("c3", ["gloves"], "US", "warehouse_staff", "Warm gloves for winter shifts"),
+        ]
+        for campaign_id, products, country, audience, message in briefs:
+            brief = SimpleNamespace(products=products, country_name=country, audience=audience, message=message)
+            logging_db.log_campaign(campaign_id, brief, {}, {"status": "approved", "issues": []})
+        logging_db.flush()
+
+        hits = logging_db.search_messages("hard hat", top_k=5)
+        print(f"📊 Unfiltered hits: {hits}")
+        assert {campaign_id for campaign_id, _ in hits} == {"c1", "c2"}
+
+        hits = logging_db.search_messages("hard hat", top_k=5, country_name="DE")
+        assert [campaign_id for campaign_id, _ in hits] == ["c2"]
+
+        hits = logging_db.search_messages("shifts", top_k=5, product="gloves")
+        assert [campaign_id for campaign_id, _ in hits] == ["c3"]
+
+        hits = logging_db.search_messages("hard hat", top_k=5, date_from=datetime(2100, 1, 1))
+        assert hits == []
+
+        logging_db.close_db()
+    print("✅ Keyword filters are applied in SQL")
+
+
+def test_search_index_rebuilt_by_writer(monkeypatch):
+    """Searches use the last full-text index built; the writer rebuilds it at most every FTS_REBUILD_INTERVAL"""
+    print("\n🧪 Testing Full-Text Index Rebuilds")
+    print("=" * 40)
+
+    import threading
+    import time
+    from app.services import logging_db
+
+    # Record rebuilds instead of running them, so this runs without the fts extension
+    builds = []
+
+    def build(conn):
+        builds.append(threading.current_thread().name)
+        logging_db._fts_available, logging_db._fts_dirty, logging_db._fts_built_at = True, False, time.monotonic()
+        return True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logging_db.close_db()
+        monkeypatch.setattr(logging_db, "DB_PATH", Path(tmp) / "campaigns.duckdb")
+        monkeypatch.setattr(logging_db, "FTS_REBUILD_INTERVAL", 3600)
+        monkeypatch.setattr(logging_db, "_build_fts_index", build)
+        monkeypatch.setattr(logging_db, "_fts_available", None)
+        logging_db.init_db()
+
+        def log(campaign_id: str):
+            brief = SimpleNamespace(products=["vest"], country_name="US", audience="workers", message="Bright vests")
+            logging_db.log_campaign(campaign_id, brief, {}, {"status": "approved", "issues": []})
+            logging_db.flush()
+
+        # The first batch builds the index in the writer thread
+        log("c1")
+        assert builds == ["duckdb-writer"]
+
+        # Within the interval, searches use the index as it is instead of rebuilding it
+        log("c2")
+        assert logging_db._fts_dirty
+        assert logging_db._ensure_fts_index(logging_db.get_connection()) and builds == ["duckdb-writer"]
+
+        monkeypatch.setattr(logging_db, "FTS_REBUILD_INTERVAL", 0)
+        logging_db.flush()
+        assert builds == ["duckdb-writer", "duckdb-writer"] and not logging_db._fts_dirty
+
+        # A reopened connection without an index builds one on its first search
+        logging_db.close_db()
+        assert logging_db._ensure_fts_index(logging_db.get_connection())
+        assert builds[-1] == threading.current_thread().name
+        logging_db.close_db()
+    print("✅ The index is rebuilt off the request path")
+
+
+def test_filter_metadata_backfill(monkeypatch):
+    """Chroma entries stored before filtered search get product flags and an epoch created_at"""
+    print("\n🧪 Testing Filter Metadata Backfill")
+    print("=" * 40)
+
+    # Offline embeddings and vector index, so the module imports without the model or ChromaDB
+    monkeypatch.setenv("EMBEDDING_MODEL", "local")
+    monkeypatch.setenv("VECTOR_BACKEND", "numpy")
+    with tempfile.TemporaryDirectory() as tmp:
+        monkeypatch.chdir(tmp)
+        from app.services import embeddings
+
+    class StoredCollection:
+        def __init__(self, entries):
+            self.entries = entries
+
+        def get(self, include=None):
+            return {"ids": list(self.entries), "metadatas": list(self.entries.values())}
+
+        def update(self, ids, metadatas):
+            self.entries.update(zip(ids, metadatas))
+
+    stored = StoredCollection({
+        "old": {"products": '["hard hat", "safety gloves"]', "country_name": "US", "created_at": "20251015_093000"},
+        "undated": {"products": '["vest"]', "country_name": "DE"},
+        "new": {"products": '["vest"]', "product_vest": True, "created_at": 1760000000},
+    })
+    monkeypatch.setattr(embeddings, "VECTOR_BACKEND", "chroma")
+    monkeypatch.setattr(embeddings, "collection", stored)
+
+    assert embeddings.backfill_filter_metadata() == 2
+    old = stored.entries["old"]
+    assert old["product_hard_hat"] and old["product_safety_gloves"] and old["country_name"] == "US"
+    assert old["created_at"] == embeddings.to_epoch("20251015_093000")
+    assert stored.entries["undated"]["product_vest"] and "created_at" not in stored.entries["undated"]
+    # Running it again finds nothing left to add
+    assert embeddings.backfill_filter_metadata() == 0
+    print("✅ Older entries match product and date filters")
+
+
+if __name__ == "__main__":
+    import pytest
+
+    test_reciprocal_rank_fusion()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_keyword_search_filters(monkeypatch)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_search_index_rebuilt_by_writer(monkeypatch)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_filter_metadata_backfill(monkeypatch)
+    print("\n🎉 All hybrid search tests passed!")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script for structured JSON logging, context binding and DEBUG rate limiting
+"""
+
+import io
+import json
+import logging
+import sys
+import threading
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+
+def _capture(level: str = "DEBUG") -> io.StringIO:
+    from app.services.log import configure_logging
+
+    stream = io.StringIO()
+    configure_logging(level, stream=stream)
+    return stream
+
+
+def _records(stream: io.StringIO):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_records_with_context():
+    """Each record is one JSON line carrying bound context and extra fields"""
+    print("🧪 Testing JSON Log Records")
+    print("=" * 40)
+
+    from app.services.log import bind, get_logger, log_context, reset
+
+    stream = _capture()
+    logger = get_logger("tests.log")
+    token = bind(campaign_id="c1")
+    with log_context(product="hard hat"):
+        logger.info("rendered", extra={"aspect_ratio": "1:1", "render_ms": 12.5})
+    bind(campaign_id=None)
+    logger.warning("no context")
+    reset(token)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.error("failed", exc_info=True)
+
+    first, second, third = _records(stream)
+    assert first["level"] == "INFO" and first["logger"] == "app.tests.log" and first["msg"] == "rendered"
+    assert first["campaign_id"] == "c1" and first["product"] == "hard hat" and first["render_ms"] == 12.5
+    assert "campaign_id" not in second and "product" not in second
+    assert "ValueError: boom" in third["exc_info"]
+    print("✅ Records are JSON with bound context")
+
+
+def test_context_is_per_thread():
+    """Context bound in one thread doesn't leak into another"""
+    print("\n🧪 Testing Per-Thread Context")
+    print("=" * 40)
+
+    from app.services.log import bind, get_logger
+
+    stream = _capture()
+    logger = get_logger("tests.log")
+
+    def campaign(campaign_id: str):
+        bind(campaign_id=campaign_id)
+        logger.info("campaign completed")
+
+    threads = [threading.Thread(target=campaign, args=(f"c{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(r["campaign_id"] for r in _records(stream)) == ["c0", "c1", "c2", "c3"]
+    print("✅ Context is isolated per thread")
+
+
+def test_level_and_debug_rate_limit():
+    """DEBUG is dropped at INFO; at DEBUG a repeated message is throttled and the drop count reported"""
+    print("\n🧪 Testing Levels and DEBUG Rate Limit")
+    print("=" * 40)
+
+    from app.services.log import DebugRateLimitFilter, get_logger
+
+    logger = get_logger("tests.log")
+    stream = _capture("INFO")
+    logger.debug("per-image detail")
+    assert stream.getvalue() == ""
+
+    stream = _capture("DEBUG")
+    limiter = DebugRateLimitFilter(rate=5)
+    logging.getLogger("app").handlers[0].filters[-1] = limiter
+    for i in range(50):
+        logger.debug("per-image detail", extra={"i": i})
+    logger.info("summary")
+    records = _records(stream)
+    assert len([r for r in records if r["msg"] == "per-image detail"]) == 5
+    assert records[-1]["msg"] == "summary"
+
+    # Once the bucket refills, the next line reports how many were suppressed
+    limiter._buckets[("app.tests.log", "per-image detail")][0] = 1
+    logger.debug("per-image detail")
+    assert _records(stream)[-1]["suppressed"] == 45
+
+    from app.services.log import configure_logging
+    configure_logging("INFO", stream=sys.stdout)
+    print("✅ DEBUG output is rate limited")
+
+
+if __name__ == "__main__":
+    test_json_records_with_context()
+    test_context_is_per_thread()
+    test_level_and_debug_rate_limit()
+    print("\n🎉 All logging tests passed!")
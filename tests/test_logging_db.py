@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Test script for the normalized DuckDB campaign schema and the legacy-table migration
+"""
+
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import duckdb
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+
+def _use_tmp_db(tmp: str):
+    from app.services import logging_db
+
+    logging_db.close_db()
+    logging_db.DB_PATH = Path(tmp) / "campaigns.duckdb"
+    return logging_db
+
+
+def test_log_every_product_and_variant():
+    """All products and variants are logged, with per-variant stats"""
+    print("🧪 Testing Normalized Campaign Logging")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logging_db = _use_tmp_db(tmp)
+        logging_db.init_db()
+
+        brief = SimpleNamespace(products=["hard hat", "gloves"], country_name="US", audience="workers", message="Stay safe")
+        outputs = {
+            "hard hat": {"1:1": "hat/1x1.png", "16:9": "hat/16x9.png"},
+            "gloves": {"1:1": "gloves/1x1.png"},
+        }
+        stats = {"hard hat": {"1:1": {"bytes": 100, "width": 1024, "height": 1024, "render_ms": 12.5}}}
+        compliance = {"status": "warning", "issues": ["Contains 'guarantee'"]}
+        logging_db.log_campaign("c1", brief, outputs, compliance, stats)
+        logging_db.flush()
+
+        conn = logging_db.get_connection()
+        row = conn.execute("SELECT compliance_issues, total_products, total_images FROM campaigns").fetchone()
+        assert row == (["Contains 'guarantee'"], 2, 3)
+        products = conn.execute("SELECT product FROM campaign_products ORDER BY position").fetchall()
+        assert products == [("hard hat",), ("gloves",)]
+        variants = conn.execute("""
+            SELECT product, aspect_ratio, bytes, width, render_ms FROM campaign_variants ORDER BY product, aspect_ratio
+        """).fetchall()
+        assert variants == [
+            ("gloves", "1:1", None, None, None),
+            ("hard hat", "16:9", None, None, None),
+            ("hard hat", "1:1", 100, 1024, 12.5),
+        ]
+
+        # A failing insert leaves no partial rows behind
+        logging_db.log_campaign("c1", brief, outputs, compliance)
+        logging_db.flush()
+        assert conn.execute("SELECT count(*) FROM campaign_variants").fetchone()[0] == 3
+
+        # A brief that repeats a product still logs the campaign
+        repeated = SimpleNamespace(products=["hard hat", "hard hat"], country_name="US", audience="workers", message="m")
+        logging_db.log_campaign("c2", repeated, {"hard hat": {"1:1": "hat/1x1.png"}}, compliance)
+        logging_db.flush()
+        assert conn.execute("SELECT total_products FROM campaigns WHERE campaign_id = 'c2'").fetchone() == (1,)
+        assert conn.execute("SELECT product, position FROM campaign_products WHERE campaign_id = 'c2'").fetchall() == [("hard hat", 0)]
+
+        logging_db.close_db()
+    print("✅ Products and variants are logged in one transaction")
+
+
+def test_legacy_schema_migration():
+    """init_db moves rows from the legacy single-table schema into the normalized tables"""
+    print("\n🧪 Testing Legacy Schema Migration")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logging_db = _use_tmp_db(tmp)
+        legacy = duckdb.connect(str(logging_db.DB_PATH))
+        legacy.execute("""
+            CREATE TABLE campaigns (
+                campaign_id VARCHAR PRIMARY KEY, created_at TIMESTAMP, products VARCHAR, country_name VARCHAR,
+                audience VARCHAR, message TEXT, output_square VARCHAR, output_landscape VARCHAR,
+                output_portrait VARCHAR, compliance_status VARCHAR, compliance_issues TEXT
+            )
+        """)
+        legacy.execute(
+            "INSERT INTO campaigns VALUES ('old', ?, ?, 'FR', 'workers', 'Bonjour', 'a.png', 'b.png', 'c.png', 'approved', '[]')",
+            [datetime(2025, 10, 15), str(["hard hat", "gloves"])],
+        )
+        legacy.execute(
+            "INSERT INTO campaigns VALUES ('repeat', ?, ?, 'FR', 'workers', 'Bonjour', 'a.png', NULL, NULL, 'approved', '[]')",
+            [datetime(2025, 10, 16), str(["hard hat", "hard hat", "gloves"])],
+        )
+        legacy.close()
+
+        logging_db.init_db()
+        conn = logging_db.get_connection()
+        assert conn.execute("SELECT country_name, compliance_issues, total_products FROM campaigns WHERE campaign_id = 'old'").fetchone() == ("FR", [], 2)
+        assert conn.execute("SELECT count(*) FROM campaign_products WHERE campaign_id = 'old'").fetchone()[0] == 2
+        # A repeated product is migrated like log_campaign writes it: once, with no gap in the positions
+        assert conn.execute("SELECT total_products FROM campaigns WHERE campaign_id = 'repeat'").fetchone() == (2,)
+        assert conn.execute(
+            "SELECT product, position FROM campaign_products WHERE campaign_id = 'repeat' ORDER BY position"
+        ).fetchall() == [("hard hat", 0), ("gloves", 1)]
+        variants = conn.execute("SELECT DISTINCT product FROM campaign_variants").fetchall()
+        assert variants == [("hard hat",)]
+
+        # Running init_db again is a no-op
+        logging_db.close_db()
+        logging_db.init_db()
+        assert logging_db.get_connection().execute("SELECT count(*) FROM campaigns").fetchone()[0] == 2
+        logging_db.close_db()
+    print("✅ Legacy campaigns table is migrated")
+
+
+def test_concurrent_writes_are_batched():
+    """Concurrent handlers log through the background writer; a full queue falls back to synchronous writes"""
+    print("\n🧪 Testing Concurrent Batched Writes")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logging_db = _use_tmp_db(tmp)
+        logging_db.init_db()
+
+        def log(i: int):
+            brief = SimpleNamespace(products=["hat"], country_name="US", audience="workers", message=f"Campaign {i}")
+            logging_db.log_campaign(f"c{i}", brief, {"hat": {"1:1": f"{i}.png"}}, {"status": "approved", "issues": []})
+            logging_db.log_usage(f"c{i}", {"model": "gpt-4.1", "total_tokens": 10}, {"provider": "HF", "generation_time": "1.5s"}, 0.001)
+            # Reads from worker threads use their own cursor
+            return logging_db.get_connection().execute("SELECT 1").fetchone()[0]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            assert sum(pool.map(log, range(40))) == 40
+        assert logging_db.flush(timeout=10)
+
+        conn = logging_db.get_connection()
+        assert conn.execute("SELECT count(*) FROM campaigns").fetchone()[0] == 40
+        assert conn.execute("SELECT count(*), sum(image_generation_seconds) FROM campaign_usage").fetchone() == (40, 60.0)
+
+        # Rows still queued at shutdown are committed by close_db
+        logging_db.log_campaign("last", SimpleNamespace(products=[], country_name="US", audience="w", message="m"), {}, {})
+        logging_db.close_db()
+        logging_db.init_db()
+        assert logging_db.get_connection().execute("SELECT count(*) FROM campaigns").fetchone()[0] == 41
+        logging_db.close_db()
+    print("✅ Concurrent writes are committed in batches")
+
+
+def test_latency_percentiles():
+    """Stage timings are persisted and summarized with percentiles per stage, provider and country"""
+    print("\n🧪 Testing Latency Percentiles")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logging_db = _use_tmp_db(tmp)
+        logging_db.init_db()
+
+        for i in range(1, 101):
+            timings = {"total_ms": 1000.0 + i, "stages": {"provider_call": {"ms": float(i), "calls": 1}}}
+            provider = "Hugging Face" if i % 2 else "OpenAI"
+            memory = {"peak_rss_bytes": i * 1000, "stages": {"provider_call": {"rss_bytes": i * 1000}}}
+            logging_db.log_timings(f"c{i}", "US" if i <= 50 else "FR", provider, i % 10 == 0, 0.01, timings, memory)
+        logging_db.flush()
+
+        rows = logging_db.latency_percentiles(datetime(2000, 1, 1), stage="provider_call")
+        assert len(rows) == 1 and rows[0]["samples"] == 100
+        assert rows[0]["p50_ms"] == 50.5 and rows[0]["p99_ms"] == 99.01
+        assert rows[0]["cache_hit_rate"] == 0.1
+        assert rows[0]["max_rss_bytes"] == 100_000 and rows[0]["max_traced_peak_bytes"] is None
+
+        rows = logging_db.latency_percentiles(datetime(2000, 1, 1), group_by=["country", "provider"], stage="total")
+        assert [(r["country"], r["provider"], r["samples"]) for r in rows] == [
+            ("FR", "Hugging Face", 25), ("FR", "OpenAI", 25), ("US", "Hugging Face", 25), ("US", "OpenAI", 25)
+        ]
+        assert round(sum(r["cost_usd"] for r in rows), 6) == 1.0
+
+        assert logging_db.latency_percentiles(datetime(2100, 1, 1)) == []
+        logging_db.close_db()
+    print("✅ Latency percentiles are computed in SQL")
+
+
+if __name__ == "__main__":
+    test_log_every_product_and_variant()
+    test_legacy_schema_migration()
+    test_concurrent_writes_are_batched()
+    test_latency_percentiles()
+    print("\n🎉 All DuckDB logging tests passed!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for memory spans (RSS and tracemalloc peaks) and the top-allocators report
+"""
+
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+
+def _allocate(size: int) -> bytearray:
+    return bytearray(size)
+
+
+def test_campaign_peaks_with_tracing():
+    """Spans record each stage's traced peak for the campaign and keep snapshots for the admin report"""
+    print("🧪 Testing Traced Memory Spans")
+    print("=" * 40)
+
+    from app.services import memory
+
+    memory.start_tracing()
+    try:
+        token = memory.start_campaign_memory()
+        with memory.memory_span("size_variants"):
+            held = _allocate(4_000_000)
+            with memory.memory_span("overlay"):
+                transient = _allocate(2_000_000)
+                del transient
+        summary = memory.campaign_memory()
+        memory.end_campaign_memory(token)
+        del held
+
+        stages = summary["stages"]
+        assert stages["size_variants"]["traced_peak_bytes"] >= 6_000_000
+        assert 2_000_000 <= stages["overlay"]["traced_peak_bytes"] < 4_000_000
+        assert summary["peak_traced_bytes"] == stages["size_variants"]["traced_peak_bytes"]
+        assert summary["max_stage_end_rss_bytes"] > 0
+
+        report = memory.top_allocators(stage="size_variants", limit=3)
+        top = report["stages"]["size_variants"]["top"][0]
+        assert top["location"].endswith(f"test_memory.py:{_allocate.__code__.co_firstlineno + 1}")
+        assert top["size_diff_bytes"] >= 4_000_000
+        assert set(report["stages"]) == {"size_variants"}
+    finally:
+        memory.stop_tracing()
+    print("✅ Stage peaks and top allocators are recorded")
+
+
+def test_rss_only_without_tracing():
+    """Without tracemalloc only RSS is measured, and nothing is kept outside a campaign"""
+    print("\n🧪 Testing RSS-Only Spans")
+    print("=" * 40)
+
+    from app.services import memory
+
+    assert memory.campaign_memory() is None
+    with memory.memory_span("overlay"):
+        _allocate(1_000_000)
+    assert memory.campaign_memory() is None
+
+    token = memory.start_campaign_memory()
+    with memory.memory_span("overlay"):
+        _allocate(1_000_000)
+    summary = memory.campaign_memory()
+    memory.end_campaign_memory(token)
+    assert "peak_traced_bytes" not in summary
+    assert set(summary["stages"]["overlay"]) - {"peak_rss_bytes"} == {"rss_bytes", "rss_growth_bytes"}
+    report = memory.top_allocators()
+    assert report["tracing"] is False and report["stages"] == {}
+    print("✅ RSS is measured without tracing")
+
+
+def test_peak_rss_counts_freed_buffers():
+    """A stage's RSS peak includes buffers freed before the stage ends, unlike its end-of-stage RSS"""
+    print("\n🧪 Testing RSS High-Water Mark")
+    print("=" * 40)
+
+    from app.services import memory
+
+    if not memory.reset_peak_rss() or memory.peak_rss_bytes() is None:
+        print("⏭️  RSS high-water mark not available on this platform")
+        return
+
+    size = 64_000_000
+    token = memory.start_campaign_memory()
+    with memory.memory_span("overlay"):
+        transient = b"x" * size
+        del transient
+    summary = memory.campaign_memory()
+    memory.end_campaign_memory(token)
+
+    stage = summary["stages"]["overlay"]
+    assert stage["peak_rss_bytes"] >= stage["rss_bytes"] + size // 2, stage
+    assert summary["peak_rss_bytes"] == stage["peak_rss_bytes"]
+    assert summary["max_stage_end_rss_bytes"] == stage["rss_bytes"]
+    print(f"✅ Peak {stage['peak_rss_bytes'] / 1_048_576:.0f}MB vs {stage['rss_bytes'] / 1_048_576:.0f}MB at stage end")
+
+
+if __name__ == "__main__":
+    test_campaign_peaks_with_tracing()
+    test_rss_only_without_tracing()
+    test_peak_rss_counts_freed_buffers()
+    print("\n🎉 All memory tests passed!")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for stage latency spans, per-campaign timing breakdowns and Prometheus rendering
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+
+def test_histogram_and_counter_rendering():
+    """Histograms render cumulative buckets, sum and count in the Prometheus text format"""
+    print("🧪 Testing Prometheus Rendering")
+    print("=" * 40)
+
+    from app.services.metrics import Counter, Histogram, render_prometheus
+
+    histogram = Histogram("test_latency_seconds", "Test latency", labelnames=("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, stage="embed")
+    counter = Counter("test_events_total", "Test events", labelnames=("outcome",))
+    counter.inc(outcome='bad "quote"')
+
+    text = render_prometheus()
+    assert "# TYPE test_latency_seconds histogram" in text
+    assert 'test_latency_seconds_bucket{stage="embed",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{stage="embed",le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{stage="embed",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{stage="embed"} 3' in text
+    assert 'test_events_total{outcome="bad \\"quote\\""} 1.0' in text
+    print("✅ Metrics render in Prometheus format")
+
+
+def test_span_breakdown_is_per_campaign():
+    """Spans feed the stage histogram and only the breakdown of the campaign they ran in"""
+    print("\n🧪 Testing Per-Campaign Timing Breakdown")
+    print("=" * 40)
+
+    from app.services import metrics
+
+    before = metrics.STAGE_SECONDS.count(stage="overlay")
+    breakdowns = {}
+
+    def campaign(name: str, calls: int):
+        token = metrics.start_campaign_timings()
+        for _ in range(calls):
+            with metrics.span("overlay"):
+                pass
+        breakdowns[name] = metrics.campaign_timings()
+        metrics.end_campaign_timings(token)
+
+    threads = [threading.Thread(target=campaign, args=(f"c{i}", i + 1)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [breakdowns[f"c{i}"]["overlay"]["calls"] for i in range(3)] == [1, 2, 3]
+    assert metrics.STAGE_SECONDS.count(stage="overlay") == before + 6
+
+    # Outside a campaign spans are still observed, and failures are counted
+    try:
+        with metrics.span("compliance"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert metrics.STAGE_ERRORS.value(stage="compliance") == 1
+    assert metrics.campaign_timings() == {}
+    print("✅ Timing breakdowns are isolated per campaign")
+
+
+def test_variant_stats_are_per_campaign():
+    """Concurrent campaigns each read back the variant stats of their own images"""
+    print("\n🧪 Testing Per-Campaign Variant Stats")
+    print("=" * 40)
+
+    from app.services import generator
+    from app.services.providers import generate_with_local
+
+    with tempfile.TemporaryDirectory() as tmp:
+        both_rendered = threading.Barrier(2)
+        stats = {}
+
+        def campaign(name: str, seed: int):
+            campaign_dir = Path(tmp) / name
+            campaign_dir.mkdir()
+            base_image = campaign_dir / "base_image.png"
+            base_image.write_bytes(generate_with_local(name, 256, 256, seed=seed)[0])
+            outputs = generator.create_size_variants(str(base_image), name, "boots", "US", "Stay safe", campaign_dir=campaign_dir)
+            both_rendered.wait()
+            stats[name] = (generator.get_last_variant_metadata(), {ratio: os.path.getsize(path) for ratio, path in outputs.items()})
+
+        threads = [threading.Thread(target=campaign, args=(f"c{i}", i)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    for variant_stats, sizes in stats.values():
+        assert {ratio: s["bytes"] for ratio, s in variant_stats.items()} == sizes
+    assert stats["c0"][1] != stats["c1"][1]
+    print("✅ Variant stats are isolated per campaign")
+
+
+if __name__ == "__main__":
+    test_histogram_and_counter_rendering()
+    test_span_breakdown_is_per_campaign()
+    test_variant_stats_are_per_campaign()
+    print("\n🎉 All metrics tests passed!")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test script for the incremental, date-partitioned Parquet export of campaign history
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+
+def _campaign(campaign_id: str, timestamp: str, country_name: str, products=("hat",)):
+    return {
+        "campaign_id": campaign_id,
+        "timestamp": timestamp,
+        "request": {"country_name": country_name, "audience": "workers", "products": list(products), "message": "Hi"},
+        "response": {
+            "outputs": {p: {"1:1": f"{p}/1x1.png", "16:9": f"{p}/16x9.png", "9:16": f"{p}/9x16.png"} for p in products},
+            "compliance": {"status": "approved", "issues": []},
+        },
+        "metadata": {
+            "usage": {
+                "llm_usage": {"model": "gpt-4.1", "prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+                "image_generation": {"provider": "Hugging Face", "generation_time": "2.50s"},
+                "cost_usd": 0.0001,
+            }
+        },
+    }
+
+
+def test_incremental_partitioned_export():
+    """New campaigns are appended as new part files; re-exporting the same campaigns is a no-op"""
+    print("🧪 Testing Parquet Export")
+    print("=" * 40)
+
+    from app.services.parquet_export import connect_exports, export_campaigns
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export_dir = Path(tmp) / "parquet"
+        first = [_campaign("a", "20251013_090000", "US"), _campaign("b", "20251014_090000", "FR", ("hat", "boots"))]
+
+        result = export_campaigns(first, export_dir=export_dir)
+        assert result["exported_campaigns"] == 2
+        assert result["rows"] == {"campaigns": 2, "campaign_products": 3, "campaign_variants": 9, "campaign_usage": 2}
+        assert (export_dir / "campaigns" / "date=2025-10-13").is_dir()
+        assert (export_dir / "campaigns" / "date=2025-10-14").is_dir()
+
+        # Already exported campaigns are skipped; only the new one is appended
+        result = export_campaigns(first + [_campaign("c", "20251021_090000", "US")], export_dir=export_dir)
+        assert result["exported_campaigns"] == 1 and result["previously_exported"] == 2
+        assert len(list((export_dir / "campaigns").glob("date=2025-10-13/*.parquet"))) == 1
+
+        conn = connect_exports(export_dir)
+        assert conn.execute("SELECT count(*) FROM campaigns").fetchone()[0] == 3
+        assert conn.execute("SELECT sum(image_generation_seconds) FROM campaign_usage").fetchone()[0] == 7.5
+        conn.close()
+
+        result = export_campaigns(first, full=True, export_dir=export_dir)
+        assert result["exported_campaigns"] == 2
+    print("✅ Incremental partitioned export works")
+
+
+def test_interrupted_export_is_not_doubled(monkeypatch):
+    """A run that fails after writing some tables, or before recording its state, leaves no rows behind"""
+    print("\n🧪 Testing Interrupted Parquet Export")
+    print("=" * 40)
+
+    from app.services import parquet_export
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export_dir = Path(tmp) / "parquet"
+        campaigns = [_campaign("a", "20251013_090000", "US"), _campaign("b", "20251014_090000", "FR")]
+        write_table = parquet_export._write_table
+
+        def fail_on_usage(conn, name, *args):
+            if name == "campaign_usage":
+                raise IOError("disk full")
+            return write_table(conn, name, *args)
+
+        # Fails after three of the four tables were staged
+        monkeypatch.setattr(parquet_export, "_write_table", fail_on_usage)
+        try:
+            parquet_export.export_campaigns(campaigns, export_dir=export_dir)
+            assert False, "the failing table should abort the export"
+        except IOError:
+            pass
+        monkeypatch.undo()
+        assert not list(export_dir.glob("campaigns/date=*/*.parquet"))
+
+        # Crashes after publishing, before the state is written
+        def crash(path, data):
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(parquet_export, "atomic_write_json", crash)
+        try:
+            parquet_export.export_campaigns(campaigns, export_dir=export_dir)
+            assert False, "the state write should abort the export"
+        except KeyboardInterrupt:
+            pass
+        monkeypatch.undo()
+        assert list(export_dir.glob("campaigns/date=*/*.parquet"))
+
+        result = parquet_export.export_campaigns(campaigns, export_dir=export_dir)
+        assert result["exported_campaigns"] == 2 and result["previously_exported"] == 0
+        conn = parquet_export.connect_exports(export_dir)
+        assert conn.execute("SELECT count(*) FROM campaigns").fetchone()[0] == 2
+        assert conn.execute("SELECT count(*) FROM campaign_variants").fetchone()[0] == 6
+        conn.close()
+        assert not list((export_dir / parquet_export.STAGING_DIR).rglob("*.parquet"))
+    print("✅ Interrupted exports are rolled back by the next run")
+
+
+def test_images_per_country_per_week():
+    """The weekly rollup is answered from the Parquet files"""
+    print("\n🧪 Testing Images per Country per Week")
+    print("=" * 40)
+
+    from app.services.parquet_export import export_campaigns, images_per_country_per_week
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export_dir = Path(tmp) / "parquet"
+        assert images_per_country_per_week(export_dir) == []
+
+        export_campaigns([
+            _campaign("a", "20251013_090000", "US"),
+            _campaign("b", "20251014_090000", "US", ("hat", "boots")),
+            _campaign("c", "20251021_090000", "FR"),
+        ], export_dir=export_dir)
+
+        rows = images_per_country_per_week(export_dir)
+        assert rows == [
+            {"country_name": "US", "week": "2025-10-13", "images": 9, "campaigns": 2},
+            {"country_name": "FR", "week": "2025-10-20", "images": 3, "campaigns": 1},
+        ]
+        assert images_per_country_per_week(export_dir, date_from="2025-10-20") == rows[1:]
+    print("✅ Weekly rollup works")
+
+
+if __name__ == "__main__":
+    import pytest
+
+    test_incremental_partitioned_export()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_interrupted_export_is_not_doubled(monkeypatch)
+    test_images_per_country_per_week()
+    print("\n🎉 All Parquet export tests passed!")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for on-demand campaign profiling (cProfile pstats and sampled speedscope output)
+"""
+
+import json
+import pstats
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+
+def _busy(seconds: float) -> int:
+    total = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+def test_profile_flag_parsing():
+    """Header/query values select a format; unknown values are rejected"""
+    print("🧪 Testing Profile Flag Parsing")
+    print("=" * 40)
+
+    from app.services.profiling import parse_profile_flag
+
+    assert parse_profile_flag(None) is None
+    assert parse_profile_flag("0") is None
+    assert parse_profile_flag("true") == "pstats"
+    assert parse_profile_flag("Speedscope") == "speedscope"
+    try:
+        parse_profile_flag("flamegraph")
+        assert False, "unknown format should be rejected"
+    except ValueError:
+        pass
+    print("✅ Profile flags are parsed")
+
+
+def test_sampling_profile_is_speedscope_json():
+    """The sampling profiler captures the generating thread's stacks in speedscope's sampled format"""
+    print("\n🧪 Testing Sampling Profiler")
+    print("=" * 40)
+
+    from app.services.profiling import SamplingProfiler, finish_profile
+
+    profiler = SamplingProfiler(interval=0.002).start()
+    _busy(0.1)
+    with tempfile.TemporaryDirectory() as tmp:
+        info = finish_profile(profiler, Path(tmp), "campaign test", "sampled")
+        assert info["format"] == "speedscope" and info["trigger"] == "sampled" and info["samples"] > 5
+        profile = json.loads(Path(info["path"]).read_text())
+
+    frames = profile["shared"]["frames"]
+    sampled = profile["profiles"][0]
+    assert sampled["type"] == "sampled" and len(sampled["samples"]) == len(sampled["weights"])
+    assert any(frames[i]["name"] == "_busy" for stack in sampled["samples"] for i in stack)
+    print("✅ Sampled profile is written as speedscope JSON")
+
+
+def test_deterministic_profile_falls_back_when_busy():
+    """cProfile output is a loadable pstats file; a second concurrent request is sampled instead"""
+    print("\n🧪 Testing Deterministic Profiler")
+    print("=" * 40)
+
+    from app.services.profiling import finish_profile, start_profiler
+
+    first = start_profiler("pstats")
+    second = start_profiler("pstats")
+    _busy(0.02)
+    assert (first.format, second.format) == ("pstats", "speedscope")
+    with tempfile.TemporaryDirectory() as tmp:
+        second.stop()
+        info = finish_profile(first, Path(tmp), "campaign test", "requested")
+        stats = pstats.Stats(info["path"])
+        assert any(func[2] == "_busy" for func in stats.stats)
+
+    # Once released, cProfile is available again; without a directory nothing is saved
+    assert "path" not in finish_profile(start_profiler("pstats"), None, "campaign test", "requested")
+    print("✅ Deterministic profile is saved as pstats")
+
+
+def test_stop_is_idempotent_and_save_failures_are_reported():
+    """Stopping twice keeps another campaign's cProfile lock; a failed save is reported, not raised"""
+    print("\n🧪 Testing Profiler Stop and Save Failures")
+    print("=" * 40)
+
+    from app.services.profiling import finish_profile, start_profiler
+
+    first = start_profiler("pstats")
+    first.stop()
+    second = start_profiler("pstats")
+    first.stop()
+    fallback = start_profiler("pstats")
+    fallback.stop()
+    assert fallback.format == "speedscope", "the second campaign should still hold cProfile"
+
+    def failing_save(directory, name):
+        raise OSError("disk full")
+
+    second.save = failing_save
+    with tempfile.TemporaryDirectory() as tmp:
+        info = finish_profile(second, Path(tmp), "campaign test", "requested")
+    assert info["error"] == "disk full" and "path" not in info
+    second.stop()
+    third = start_profiler("pstats")
+    third.stop()
+    assert third.format == "pstats"
+    print("✅ Double stops are harmless and save failures are logged")
+
+
+if __name__ == "__main__":
+    test_profile_flag_parsing()
+    test_sampling_profile_is_speedscope_json()
+    test_deterministic_profile_falls_back_when_busy()
+    test_stop_is_idempotent_and_save_failures_are_reported()
+    print("\n🎉 All profiling tests passed!")
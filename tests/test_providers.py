@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Test script for the image provider registry and the offline local provider
+"""
+
+import base64
+import io
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+from PIL import Image
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+
+def test_local_provider_is_deterministic():
+    """The same prompt and seed give the same image; a different seed gives a different one"""
+    print("🧪 Testing Local Provider")
+    print("=" * 40)
+
+    from app.services.providers import generate_with_local
+
+    first, metadata = generate_with_local("hard hat on a site", 256, 128, seed=7)
+    second, _ = generate_with_local("hard hat on a site", 256, 128, seed=7)
+    other, _ = generate_with_local("hard hat on a site", 256, 128, seed=8)
+    assert first == second and first != other
+    assert metadata["provider"] == "Local" and metadata["dimensions"] == "256x128"
+    assert Image.open(io.BytesIO(first)).size == (256, 128)
+    print("✅ Local images are seeded and deterministic")
+
+
+def test_simulated_failures():
+    """LOCAL_PROVIDER_FAILURE_RATE makes that fraction of calls raise ProviderError"""
+    print("\n🧪 Testing Simulated Failures")
+    print("=" * 40)
+
+    from app.services import providers
+
+    providers.LOCAL_PROVIDER_FAILURE_RATE = 0.5
+    providers._chaos.seed(1)
+    failures = 0
+    try:
+        for _ in range(200):
+            try:
+                providers.generate_with_local("gloves", 16, 16)
+            except providers.ProviderError:
+                failures += 1
+    finally:
+        providers.LOCAL_PROVIDER_FAILURE_RATE = 0.0
+    assert 70 < failures < 130
+    print(f"✅ {failures}/200 calls failed")
+
+
+def test_generate_single_image_falls_back_through_chain(monkeypatch):
+    """generate_single_image skips unavailable providers and falls back past failing ones"""
+    print("\n🧪 Testing Provider Chain")
+    print("=" * 40)
+
+    from app.services import generator, providers
+    from app.services.metrics import PROVIDER_CALLS
+    from app.services.providers import ImageProvider
+
+    def broken(prompt, width, height, **params):
+        raise RuntimeError("quota exceeded")
+
+    monkeypatch.setitem(providers._providers, "broken", ImageProvider("broken", "Broken", broken))
+    monkeypatch.setitem(providers._providers, "offline", ImageProvider("offline", "Offline", broken, is_available=lambda: False))
+    monkeypatch.setenv("IMAGE_PROVIDERS", "offline,broken,local")
+    broken_errors = PROVIDER_CALLS.value(provider="broken", outcome="error")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = generator.generate_single_image("safety boots", "c1", "boots", "US", campaign_dir=Path(tmp), seed=3)
+        assert Image.open(path).size == (1024, 1024)
+        assert generator.get_last_image_generation_metadata()["provider"] == "Local"
+        assert PROVIDER_CALLS.value(provider="broken", outcome="error") == broken_errors + 1
+
+        monkeypatch.setenv("IMAGE_PROVIDERS", "offline,broken")
+        try:
+            generator.generate_single_image("safety boots", "c1", "boots", "US", campaign_dir=Path(tmp))
+            assert False, "an exhausted chain should raise"
+        except Exception as e:
+            assert "Offline: not configured" in str(e) and "Broken: quota exceeded" in str(e)
+    print("✅ Providers are tried in order")
+
+
+def test_openai_provider_decodes_inline_image(monkeypatch):
+    """DALL-E images are requested as b64_json and decoded without a download, crediting the download time saved"""
+    print("\n🧪 Testing OpenAI Inline Images")
+    print("=" * 40)
+
+    from collections import deque
+    from app.services import generator
+    from app.services.providers import generate_with_local
+
+    png, _ = generate_with_local("vest", 32, 32, seed=1)
+    requests = []
+
+    class ImageServer(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.end_headers()
+            self.wfile.write(png)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), ImageServer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    class Images:
+        def generate(self, **kwargs):
+            requests.append(kwargs)
+            if kwargs["response_format"] == "url":
+                return SimpleNamespace(data=[SimpleNamespace(b64_json=None, url=f"http://127.0.0.1:{server.server_port}/image.png")])
+            return SimpleNamespace(data=[SimpleNamespace(b64_json=base64.b64encode(png).decode(), url=None)])
+
+    monkeypatch.setattr(generator, "OpenAI", lambda api_key: SimpleNamespace(images=Images()))
+    monkeypatch.setattr(generator, "_openai_download_ms", deque(maxlen=generator.OPENAI_DOWNLOAD_WINDOW))
+    try:
+        # Nothing downloaded yet: the saving is unknown
+        image_bytes, metadata = generator.generate_with_openai("safety vest", 1024, 1024)
+        assert image_bytes == png
+        assert requests[0]["response_format"] == "b64_json"
+        assert metadata["transfer"]["download_skipped"] and metadata["transfer"]["saved_ms"] is None
+        assert metadata["transfer"]["payload_bytes"] == len(png)
+
+        # URL-mode downloads feed the estimate
+        monkeypatch.setattr(generator, "OPENAI_RESPONSE_FORMAT", "url")
+        image_bytes, metadata = generator.generate_with_openai("safety vest", 1024, 1024)
+        download_ms = metadata["transfer"]["download_ms"]
+        assert image_bytes == png and not metadata["transfer"]["download_skipped"]
+        assert list(generator._openai_download_ms) == [download_ms]
+
+        monkeypatch.setattr(generator, "OPENAI_RESPONSE_FORMAT", "b64_json")
+        _, metadata = generator.generate_with_openai("safety vest", 1024, 1024)
+        transfer = metadata["transfer"]
+        assert transfer["saved_ms"] == round(download_ms - transfer["decode_ms"], 2)
+    finally:
+        server.shutdown()
+    print(f"✅ Image decoded from the API response, saving ~{transfer['saved_ms']}ms")
+
+
+def test_huggingface_waits_for_cold_model():
+    """503 loading responses and 429s are retried within the deadline, with per-attempt timings"""
+    print("\n🧪 Testing Hugging Face Cold Starts")
+    print("=" * 40)
+
+    from app.services import generator
+    from app.services.metrics import PROVIDER_RETRIES
+    from app.services.providers import ProviderError, generate_with_local, retry_after_seconds
+
+    assert retry_after_seconds("120") == 120.0 and retry_after_seconds(None) is None
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0 and retry_after_seconds("soon") is None
+
+    png, _ = generate_with_local("helmet", 16, 16, seed=2)
+    replies = []
+
+    class ColdModel(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            status, headers, body = replies.pop(0)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), ColdModel)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    original_url, original_backoff = generator.HF_BASE_URL, generator.HF_BACKOFF_BASE
+    generator.HF_BASE_URL, generator.HF_BACKOFF_BASE = f"http://127.0.0.1:{server.server_port}", 0.01
+    try:
+        replies.extend([
+            (503, {"Content-Type": "application/json"}, b'{"error": "Model is currently loading", "estimated_time": 0.05}'),
+            (429, {"Retry-After": "0"}, b"rate limited"),
+            (502, {}, b"bad gateway"),
+            (200, {"Content-Type": "image/png"}, png),
+        ])
+        image_bytes, metadata = generator.generate_with_huggingface("hard hat", 16, 16)
+        assert image_bytes == png
+        assert [a["status"] for a in metadata["attempts"]] == [503, 429, 502, 200]
+        assert [a.get("reason") for a in metadata["attempts"]] == ["loading", "rate_limited", "unavailable", None]
+        assert metadata["attempts"][0]["wait_s"] == 0.05 and all("ms" in a for a in metadata["attempts"])
+        assert PROVIDER_RETRIES.value(provider="huggingface", reason="loading") == 1
+
+        # A load that won't finish before the deadline goes straight to the next provider
+        replies.append((503, {}, b'{"error": "Model is currently loading", "estimated_time": 600}'))
+        try:
+            generator.generate_with_huggingface("hard hat", 16, 16)
+            assert False, "a model loading past the deadline should fail fast"
+        except ProviderError as e:
+            assert "loading" in str(e) and len(e.attempts) == 1
+    finally:
+        generator.HF_BASE_URL, generator.HF_BACKOFF_BASE = original_url, original_backoff
+        server.shutdown()
+    print("✅ Cold model waited out, hopeless loads fail fast")
+
+
+if __name__ == "__main__":
+    import pytest
+
+    test_local_provider_is_deterministic()
+    test_simulated_failures()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_generate_single_image_falls_back_through_chain(monkeypatch)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_openai_provider_decodes_inline_image(monkeypatch)
+    test_huggingface_waits_for_cold_model()
+    print("\n🎉 All provider tests passed!")
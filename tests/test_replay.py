@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for extracting replay workloads from the DuckDB campaign history
+"""
+
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import duckdb
+
+# Add the backend and benchmarks directories to the Python path
+backend_dir = Path(__file__).parent.parent / "backend"
+benchmarks_dir = Path(__file__).parent.parent / "benchmarks"
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(benchmarks_dir))
+
+
+def test_briefs_from_legacy_database():
+    """A database still in the legacy single-table schema (products as str(list), "region") is read as is"""
+    print("🧪 Testing Legacy Database Extraction")
+    print("=" * 40)
+
+    from replay import briefs_from_duckdb
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "campaigns.duckdb"
+        conn = duckdb.connect(str(db_path))
+        conn.execute("""
+            CREATE TABLE campaigns (
+                campaign_id VARCHAR PRIMARY KEY, created_at TIMESTAMP, products VARCHAR, region VARCHAR,
+                audience VARCHAR, message VARCHAR, output_square VARCHAR, output_landscape VARCHAR,
+                output_portrait VARCHAR, compliance_status VARCHAR, compliance_issues VARCHAR
+            )
+        """)
+        conn.execute(
+            "INSERT INTO campaigns VALUES ('old', ?, ?, 'France', 'workers', 'Bonjour', 'a.png', NULL, NULL, 'approved', '[]')",
+            [datetime(2025, 10, 15), str(["hard hat", "gloves"])],
+        )
+        conn.execute(
+            "INSERT INTO campaigns VALUES ('older', ?, ?, 'Japan', 'workers', 'Hello', NULL, NULL, NULL, 'approved', '[]')",
+            [datetime(2025, 9, 1), str(["vest"])],
+        )
+        conn.close()
+
+        briefs = briefs_from_duckdb(db_path, datetime(2025, 10, 1))
+        assert briefs == [{
+            "campaign_id": "old", "created_at": "2025-10-15T00:00:00", "products": ["hard hat", "gloves"],
+            "country_name": "France", "audience": "workers", "message": "Bonjour",
+        }], briefs
+        assert len(briefs_from_duckdb(db_path, None)) == 2
+    print("✅ Legacy campaigns are extracted without migrating the database")
+
+
+def test_briefs_from_normalized_database(monkeypatch):
+    """Campaigns logged by the server come back with their products in brief order"""
+    print("\n🧪 Testing Normalized Database Extraction")
+    print("=" * 40)
+
+    from app.services import logging_db
+    from replay import briefs_from_duckdb
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "campaigns.duckdb"
+        logging_db.close_db()
+        monkeypatch.setattr(logging_db, "DB_PATH", db_path)
+        try:
+            logging_db.init_db()
+            brief = SimpleNamespace(products=["gloves", "hard hat"], country_name="Germany", audience="workers", message="Hallo")
+            logging_db.log_campaign("new", brief, {}, {"status": "approved", "issues": []})
+            logging_db.flush()
+        finally:
+            logging_db.close_db()
+
+        briefs = briefs_from_duckdb(db_path, None)
+        assert [(b["campaign_id"], b["products"], b["country_name"]) for b in briefs] == [("new", ["gloves", "hard hat"], "Germany")]
+
+        # A database without a campaigns table falls back to the artifacts instead of crashing
+        empty_path = Path(tmp) / "empty.duckdb"
+        duckdb.connect(str(empty_path)).close()
+        assert briefs_from_duckdb(empty_path, None) == []
+    print("✅ Normalized campaigns are extracted")
+
+
+if __name__ == "__main__":
+    import pytest
+
+    test_briefs_from_legacy_database()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_briefs_from_normalized_database(monkeypatch)
+    print("\n🎉 All replay tests passed!")
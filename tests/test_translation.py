@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test script for the pluggable translation backends and the offline local stand-in
+"""
+
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+
+def test_local_backend_scripts_and_tokens():
+    """The local backend returns copy in the target script plus the English seed, with token usage"""
+    print("🧪 Testing Local Translation Backend")
+    print("=" * 40)
+
+    from app.services.translation import estimate_tokens, translate_with_local
+
+    arabic, usage = translate_with_local("Stay safe on site", "Arabic", "Saudi Arabia")
+    assert any("؀" <= c <= "ۿ" for c in arabic.splitlines()[0])
+    assert arabic.splitlines()[1] == "Stay safe on site"
+    assert usage["model"] == "local-translation"
+    assert usage["total_tokens"] == usage["prompt_tokens"] + usage["completion_tokens"]
+
+    japanese, _ = translate_with_local("Stay safe on site", "Japanese", "Japan")
+    assert any("぀" <= c <= "ヿ" or "一" <= c <= "鿿" for c in japanese)
+    russian, _ = translate_with_local("Stay safe on site", "Russian", "Russia")
+    assert any("Ѐ" <= c <= "ӿ" for c in russian)
+    assert translate_with_local("Stay safe", "Tongan", "Tonga")[0].startswith("[Tongan] Stay safe")
+
+    # Non-Latin scripts cost roughly a token per character
+    assert estimate_tokens("abcdefgh") == 2 and estimate_tokens("安全第一") == 4
+    print("✅ Local backend returns script-appropriate copy")
+
+
+def test_translate_message_uses_configured_backend(monkeypatch):
+    """translate_message_with_llm goes through TRANSLATION_BACKEND and records its token usage"""
+    print("\n🧪 Testing Backend Selection")
+    print("=" * 40)
+
+    from app.services import generator
+    from app.services.translation import get_translation_backend
+
+    monkeypatch.setenv("TRANSLATION_BACKEND", "local")
+    translated = generator.translate_message_with_llm("Stay safe on site", "SA", "construction_workers")
+    assert translated.splitlines()[1] == "Stay safe on site"
+    assert generator.get_last_translation_metadata()["model"] == "local-translation"
+    # English-speaking countries are not translated
+    assert generator.translate_message_with_llm("Stay safe", "US") == "Stay safe"
+
+    # An unknown backend falls back to the original message like any translation failure
+    monkeypatch.setenv("TRANSLATION_BACKEND", "missing")
+    assert generator.translate_message_with_llm("Stay safe", "JP") == "Stay safe"
+
+    # Without TRANSLATION_BACKEND the OpenAI backend is used
+    monkeypatch.delenv("TRANSLATION_BACKEND")
+    assert get_translation_backend() is generator.translate_with_openai
+    print("✅ The configured backend is used")
+
+
+if __name__ == "__main__":
+    import pytest
+
+    test_local_backend_scripts_and_tokens()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_translate_message_uses_configured_backend(monkeypatch)
+    print("\n🎉 All translation tests passed!")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for the exact NumPy vector index (alternative search_similar backend).
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+
+def test_exact_top_k_matches_brute_force():
+    """Top-k from the float16 index should match a float32 brute-force ranking"""
+    print("🧪 Testing NumPy Vector Index")
+    print("=" * 35)
+
+    from app.services.vector_index import NumpyVectorIndex
+
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(500, 32)).astype(np.float32)
+    ids = [f"c{i}" for i in range(len(vectors))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Small initial capacity forces the memmap to grow during appends
+        index = NumpyVectorIndex(Path(tmp), dim=32, initial_capacity=16)
+        for start in range(0, len(vectors), 100):
+            index.upsert(
+                ids=ids[start:start + 100],
+                embeddings=vectors[start:start + 100].tolist(),
+                metadatas=[{"country_name": "US" if i % 2 else "DE", "created_at": i} for i in range(start, start + 100)],
+                documents=[f"message {i}" for i in range(start, start + 100)],
+            )
+        assert index.count() == 500
+
+        query = rng.normal(size=32).astype(np.float32)
+        normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        expected = [ids[i] for i in np.argsort(-(normed @ (query / np.linalg.norm(query))))[:10]]
+
+        result = index.query(query_embeddings=[query.tolist()], n_results=10)
+        print(f"📊 Top-3: {result['ids'][0][:3]}")
+        assert len(set(result["ids"][0]) & set(expected)) >= 9
+        assert result["distances"][0] == sorted(result["distances"][0])
+
+        # Reopening from disk restores every row
+        reopened = NumpyVectorIndex(Path(tmp), dim=32)
+        assert reopened.query(query_embeddings=[query.tolist()], n_results=10)["ids"] == result["ids"]
+    print("✅ Exact top-k matches brute force")
+
+
+def test_where_filter_and_upsert():
+    """Chroma-style where clauses restrict candidates and upserts overwrite in place"""
+    print("\n🧪 Testing Where Filters")
+    print("=" * 35)
+
+    from app.services.vector_index import NumpyVectorIndex
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = NumpyVectorIndex(Path(tmp), dim=3)
+        index.upsert(
+            ids=["a", "b", "c"],
+            embeddings=[[1, 0, 0], [0.9, 0.1, 0], [0, 1, 0]],
+            metadatas=[
+                {"country_name": "US", "product_hard_hat": True, "created_at": 100},
+                {"country_name": "DE", "product_hard_hat": True, "created_at": 200},
+                {"country_name": "US", "created_at": 300},
+            ],
+            documents=["a", "b", "c"],
+        )
+
+        where = {"$and": [{"product_hard_hat": True}, {"created_at": {"$gte": 150}}]}
+        assert index.query(query_embeddings=[[1, 0, 0]], n_results=3, where=where)["ids"] == [["b"]]
+        assert index.query(query_embeddings=[[1, 0, 0]], n_results=3, where={"country_name": "US"})["ids"] == [["a", "c"]]
+
+        index.upsert(ids=["a"], embeddings=[[0, 1, 0]], metadatas=[{"country_name": "FR"}], documents=["a2"])
+        assert index.count() == 3
+        assert index.get(ids=["a"])["documents"] == ["a2"]
+        assert index.query(query_embeddings=[[0, 1, 0]], n_results=1, where={"country_name": "FR"})["ids"] == [["a"]]
+    print("✅ Filters and upserts behave like Chroma")
+
+
+if __name__ == "__main__":
+    test_exact_top_k_matches_brute_force()
+    test_where_filter_and_upsert()
+    print("\n🎉 All vector index tests passed!")